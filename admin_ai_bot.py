@@ -2,25 +2,138 @@ import os
 import json
 import requests
 import logging
-from anthropic import Anthropic
+import threading
+from collections import OrderedDict, namedtuple
 from functools import lru_cache
+from code_search import CodeIndex
+from file_edits import FileEditor, EditError, EditConflict, content_hash
+from render_client import RenderClient
+from admin_tracing import TurnTrace, aggregator as trace_aggregator
+from lazy_imports import lazy_import
+from settings import settings
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FILE_CACHE_MAX_ENTRIES = settings.admin_file_cache_max_entries
+
+CachedFile = namedtuple("CachedFile", ["key", "content", "offsets", "digest"])
+
+class FileCache:
+    """Bounded LRU cache of file contents shared by the admin file tools.
+
+    Entries are validated against the file's (mtime, size) on every lookup, so
+    a file changed behind our back is re-read. Each entry keeps the offset of
+    every line start, which lets chunked reads slice the cached text directly
+    instead of re-reading and splitting the whole file, and the content hash
+    that edits use for compare-and-swap.
+    """
+
+    def __init__(self, max_entries=FILE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat_key(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _line_offsets(content):
+        offsets = [0]
+        index = content.find('\n')
+        while index != -1:
+            offsets.append(index + 1)
+            index = content.find('\n', index + 1)
+        # A trailing newline does not start another line (matches readlines())
+        if offsets[-1] == len(content):
+            offsets.pop()
+        return offsets
+
+    def _store(self, path, key, content):
+        entry = CachedFile(key, content, self._line_offsets(content), content_hash(content))
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get(self, path):
+        """Return (CachedFile, cached) for path, reading it if stale"""
+        key = self._stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                return entry, True
+
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return self._store(path, key, content), False
+
+    def get_lines(self, path, start_line=1, num_lines=200):
+        """Return (chunk, start_idx, lines_returned, CachedFile, cached) for a 1-indexed line range"""
+        entry, cached = self.get(path)
+        content, offsets = entry.content, entry.offsets
+        total_lines = len(offsets)
+        start_idx = min(max(0, start_line - 1), total_lines)
+        end_idx = min(total_lines, start_idx + max(0, num_lines))
+        start_pos = offsets[start_idx] if start_idx < total_lines else len(content)
+        end_pos = offsets[end_idx] if end_idx < total_lines else len(content)
+        return content[start_pos:end_pos], start_idx, end_idx - start_idx, entry, cached
+
+    def update(self, path, content):
+        """Record content just written to path so the next read is a cache hit"""
+        self._store(path, self._stat_key(path), content)
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
 # File cache to avoid re-reading unchanged files
-_file_cache = {}
+_file_cache = FileCache()
+
+# Search index over the files the admin tools can read, rebuilt per file on change
+_code_index = CodeIndex(lambda filename: _file_cache.get(filename)[0].content)
+
+# Atomic, locked edits that keep _file_cache in sync
+_file_editor = FileEditor(cache=_file_cache)
+
+PYTHON_FILES = ['app.py', 'models.py']
+DASHBOARD_FILES = [
+    'static/dashboard.html',
+    'static/admin-dashboard.html',
+    'static/sales.html',
+    'static/claim-domain.html',
+    'static/packages.html',
+    'static/register-complete.html',
+    'static/backoffice.html',
+    'static/css/style.css',
+    'static/admin-panel.html'
+]
+
+ANTHROPIC_API_KEY = settings.anthropic_api_key
+RENDER_API_KEY = settings.render_api_key
+NAMECHEAP_API_USER = settings.namecheap_api_user
+NAMECHEAP_API_KEY = settings.namecheap_api_key
+NAMECHEAP_USERNAME = settings.namecheap_username
+NAMECHEAP_CLIENT_IP = settings.namecheap_client_ip
 
-ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
-RENDER_API_KEY = os.environ.get("RENDER_API_KEY", "")
-NAMECHEAP_API_USER = os.environ.get("NAMECHEAP_API_USER", "")
-NAMECHEAP_API_KEY = os.environ.get("NAMECHEAP_API_KEY", "")
-NAMECHEAP_USERNAME = os.environ.get("NAMECHEAP_USERNAME", "")
-NAMECHEAP_CLIENT_IP = os.environ.get("NAMECHEAP_CLIENT_IP", "")
+anthropic = lazy_import("anthropic")
 
-anthropic_client = Anthropic(api_key=ANTHROPIC_API_KEY) if ANTHROPIC_API_KEY else None
+@lru_cache(maxsize=1)
+def get_anthropic_client():
+    """Build the Anthropic client on first use; None when no API key is configured"""
+    if not ANTHROPIC_API_KEY:
+        return None
+    return anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+
+render_client = RenderClient(api_key=RENDER_API_KEY)
 
-RENDER_API_BASE = "https://api.render.com/v1"
 NAMECHEAP_API_BASE = "https://api.namecheap.com/xml.response"
 
 def get_client_ip():
@@ -42,15 +155,8 @@ def list_render_services():
             logger.error("Render API key not configured")
             return {"error": "RENDER_API_KEY not configured. Please set this environment variable."}
         
-        headers = {
-            "Authorization": f"Bearer {RENDER_API_KEY}",
-            "Accept": "application/json"
-        }
         logger.info("Fetching Render services list")
-        response = requests.get(f"{RENDER_API_BASE}/services", headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        services = response.json()
+        services = render_client.list_services()
         result = []
         for service in services:
             result.append({
@@ -81,16 +187,11 @@ def get_render_service(service_id):
             logger.error("Render API key not configured")
             return {"error": "RENDER_API_KEY not configured. Please set this environment variable."}
         
-        headers = {
-            "Authorization": f"Bearer {RENDER_API_KEY}",
-            "Accept": "application/json"
-        }
         logger.info(f"Fetching details for Render service: {service_id}")
-        response = requests.get(f"{RENDER_API_BASE}/services/{service_id}", headers=headers, timeout=10)
-        response.raise_for_status()
+        service = render_client.get_service(service_id)
         
         logger.info(f"Successfully retrieved details for service {service_id}")
-        return {"service": response.json()}
+        return {"service": service}
     except requests.Timeout:
         logger.exception(f"Timeout getting Render service: {service_id}")
         return {"error": "Request timed out. Please try again."}
@@ -98,6 +199,29 @@ def get_render_service(service_id):
         logger.error(f"Failed to get Render service {service_id}: {str(e)}", exc_info=True)
         return {"error": f"Failed to get Render service: {str(e)}"}
 
+def get_render_services_status(service_ids=None):
+    """Get status and latest deploy for several (or all) Render services in one call"""
+    try:
+        if not RENDER_API_KEY:
+            logger.error("Render API key not configured")
+            return {"error": "RENDER_API_KEY not configured. Please set this environment variable."}
+        
+        logger.info(f"Fetching status for Render services: {service_ids or 'all'}")
+        statuses = render_client.get_services_status(service_ids)
+        
+        logger.info(f"Successfully retrieved status for {len(statuses)} Render services")
+        return {
+            "services": statuses,
+            "count": len(statuses),
+            "message": f"Retrieved status for {len(statuses)} Render services."
+        }
+    except requests.Timeout:
+        logger.exception("Timeout getting Render services status")
+        return {"error": "Request timed out. Please try again."}
+    except Exception as e:
+        logger.error(f"Failed to get Render services status: {str(e)}", exc_info=True)
+        return {"error": f"Failed to get Render services status: {str(e)}"}
+
 def restart_render_service(service_id):
     """Restart a Render service"""
     try:
@@ -105,17 +229,8 @@ def restart_render_service(service_id):
             logger.error("Render API key not configured")
             return {"error": "RENDER_API_KEY not configured. Please set this environment variable."}
         
-        headers = {
-            "Authorization": f"Bearer {RENDER_API_KEY}",
-            "Accept": "application/json"
-        }
         logger.info(f"Restarting Render service: {service_id}")
-        response = requests.post(
-            f"{RENDER_API_BASE}/services/{service_id}/restart",
-            headers=headers,
-            timeout=10
-        )
-        response.raise_for_status()
+        render_client.restart_service(service_id)
         
         logger.info(f"Successfully restarted service {service_id}")
         return {"success": True, "message": f"Service {service_id} restarted successfully"}
@@ -133,18 +248,8 @@ def suspend_render_service(service_id):
             logger.error("Render API key not configured")
             return {"error": "RENDER_API_KEY not configured. Please set this environment variable."}
         
-        headers = {
-            "Authorization": f"Bearer {RENDER_API_KEY}",
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
         logger.info(f"Suspending Render service: {service_id}")
-        response = requests.post(
-            f"{RENDER_API_BASE}/services/{service_id}/suspend",
-            headers=headers,
-            timeout=10
-        )
-        response.raise_for_status()
+        render_client.suspend_service(service_id)
         
         logger.info(f"Successfully suspended service {service_id}")
         return {"success": True, "message": f"Service {service_id} suspended successfully"}
@@ -162,17 +267,8 @@ def resume_render_service(service_id):
             logger.error("Render API key not configured")
             return {"error": "RENDER_API_KEY not configured. Please set this environment variable."}
         
-        headers = {
-            "Authorization": f"Bearer {RENDER_API_KEY}",
-            "Accept": "application/json"
-        }
         logger.info(f"Resuming Render service: {service_id}")
-        response = requests.post(
-            f"{RENDER_API_BASE}/services/{service_id}/resume",
-            headers=headers,
-            timeout=10
-        )
-        response.raise_for_status()
+        render_client.resume_service(service_id)
         
         logger.info(f"Successfully resumed service {service_id}")
         return {"success": True, "message": f"Service {service_id} resumed successfully"}
@@ -373,6 +469,24 @@ FUNCTION_DEFINITIONS = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_render_services_status",
+            "description": "Get the status and latest deploy of several Render services at once (all services if no IDs given). Use this instead of calling get_render_service repeatedly.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "service_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional list of Render service IDs. If omitted, returns status for every service in the account."
+                    }
+                },
+                "required": []
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -506,9 +620,25 @@ FUNCTION_DEFINITIONS = [
                     "new_content": {
                         "type": "string",
                         "description": "The new content to insert"
+                    },
+                    "edits": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "old_content": {"type": "string"},
+                                "new_content": {"type": "string"}
+                            },
+                            "required": ["old_content", "new_content"]
+                        },
+                        "description": "Optional list of several replacements to apply to this file in order, in a single write. Prefer this over multiple edit calls on the same file."
+                    },
+                    "expected_hash": {
+                        "type": "string",
+                        "description": "Optional content_hash returned by the read tool. The edit is rejected if the file changed since that read."
                     }
                 },
-                "required": ["filename", "old_content", "new_content"]
+                "required": ["filename"]
             }
         }
     },
@@ -577,9 +707,51 @@ FUNCTION_DEFINITIONS = [
                     "new_content": {
                         "type": "string",
                         "description": "The new content to insert"
+                    },
+                    "edits": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "old_content": {"type": "string"},
+                                "new_content": {"type": "string"}
+                            },
+                            "required": ["old_content", "new_content"]
+                        },
+                        "description": "Optional list of several replacements to apply to this file in order, in a single write. Prefer this over multiple edit calls on the same file."
+                    },
+                    "expected_hash": {
+                        "type": "string",
+                        "description": "Optional content_hash returned by the read tool. The edit is rejected if the file changed since that read."
+                    }
+                },
+                "required": ["filename"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_code",
+            "description": "Search app.py, models.py and the dashboard files for symbols (functions, classes, JS functions, element ids, CSS selectors), Flask routes, or text. Returns matching line ranges with their source. Use this before read_python_file to find where something is handled.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Name, route path, or text to search for (case-insensitive), e.g. 'register_user', '/api/admin', 'pass_up'"
+                    },
+                    "kind": {
+                        "type": "string",
+                        "enum": ["any", "symbol", "route", "text"],
+                        "description": "Restrict matches to one kind. Default: any"
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum number of matches to return. Default: 20"
                     }
                 },
-                "required": ["filename", "old_content", "new_content"]
+                "required": ["query"]
             }
         }
     },
@@ -605,30 +777,21 @@ FUNCTION_DEFINITIONS = [
 
 def read_dashboard_file(filename):
     """Read a dashboard file (HTML, CSS, JS)"""
-    allowed_files = [
-        'static/dashboard.html',
-        'static/admin-dashboard.html',
-        'static/sales.html',
-        'static/claim-domain.html',
-        'static/packages.html',
-        'static/register-complete.html',
-        'static/backoffice.html',
-        'static/css/style.css',
-        'static/admin-panel.html'
-    ]
+    allowed_files = DASHBOARD_FILES
     
     if filename not in allowed_files:
         return {"error": f"Access denied. Only dashboard files can be read. Allowed files: {', '.join(allowed_files)}"}
     
     try:
         logger.info(f"Reading file: {filename}")
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
+        entry, cached = _file_cache.get(filename)
         logger.info(f"Successfully read file: {filename}")
         return {
             "filename": filename,
-            "content": content,
-            "success": True
+            "content": entry.content,
+            "content_hash": entry.digest,
+            "success": True,
+            "cached": cached
         }
     except FileNotFoundError:
         logger.error(f"File not found: {filename}", exc_info=True)
@@ -637,19 +800,18 @@ def read_dashboard_file(filename):
         logger.error(f"Failed to read file {filename}: {str(e)}", exc_info=True)
         return {"error": f"Failed to read file: {str(e)}"}
 
-def edit_dashboard_file(filename, old_content, new_content):
-    """Edit a dashboard file by replacing old_content with new_content"""
-    allowed_files = [
-        'static/dashboard.html',
-        'static/admin-dashboard.html',
-        'static/sales.html',
-        'static/claim-domain.html',
-        'static/packages.html',
-        'static/register-complete.html',
-        'static/backoffice.html',
-        'static/css/style.css',
-        'static/admin-panel.html'
-    ]
+def _collect_edits(old_content, new_content, edits):
+    """Normalize the single-edit and batched-edit tool arguments into (old, new) pairs"""
+    batch = []
+    if old_content is not None:
+        batch.append((old_content, new_content or ""))
+    for edit in edits or []:
+        batch.append((edit.get("old_content", ""), edit.get("new_content", "")))
+    return batch
+
+def edit_dashboard_file(filename, old_content=None, new_content=None, edits=None, expected_hash=None):
+    """Edit a dashboard file by replacing old_content with new_content (or applying a batch of edits)"""
+    allowed_files = DASHBOARD_FILES
     
     if filename not in allowed_files:
         return {"error": f"Access denied. Only dashboard files can be edited. Allowed files: {', '.join(allowed_files)}"}
@@ -657,23 +819,22 @@ def edit_dashboard_file(filename, old_content, new_content):
     try:
         logger.info(f"Editing file: {filename}")
         
-        with open(filename, 'r', encoding='utf-8') as f:
-            current_content = f.read()
-        
-        if old_content not in current_content:
-            return {"error": "Old content not found in file. Please read the file first to get the exact content."}
-        
-        updated_content = current_content.replace(old_content, new_content, 1)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(updated_content)
+        batch = _collect_edits(old_content, new_content, edits)
+        new_hash = _file_editor.apply(filename, batch, expected_hash=expected_hash)
         
         logger.info(f"Successfully edited file: {filename}")
         return {
             "filename": filename,
             "success": True,
+            "edits_applied": len(batch),
+            "content_hash": new_hash,
             "message": f"Successfully updated {filename}"
         }
+    except EditConflict as e:
+        logger.warning(f"Edit conflict on {filename}: {str(e)}")
+        return {"error": str(e), "conflict": True}
+    except EditError as e:
+        return {"error": str(e)}
     except FileNotFoundError:
         logger.error(f"File not found: {filename}", exc_info=True)
         return {"error": f"File not found: {filename}"}
@@ -689,12 +850,11 @@ def create_html_page(filename, content):
     try:
         logger.info(f"Creating new HTML page: {filename}")
         
-        if os.path.exists(filename):
+        try:
+            _file_editor.create(filename, content)
+        except FileExistsError:
             return {"error": f"File {filename} already exists. Use edit_dashboard_file to modify it."}
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
         logger.info(f"Successfully created HTML page: {filename}")
         return {
             "filename": filename,
@@ -713,72 +873,42 @@ def read_python_file(filename, start_line=1, num_lines=200):
         start_line: Line number to start reading from (1-indexed, default: 1)
         num_lines: Number of lines to read (default: 200, use -1 for entire file)
     """
-    allowed_files = ['app.py', 'models.py']
+    allowed_files = PYTHON_FILES
     
     if filename not in allowed_files:
         return {"error": f"Access denied. Only these files can be read: {', '.join(allowed_files)}"}
     
     try:
-        # Get file info
-        current_mtime = os.path.getmtime(filename)
-        
-        # For full file reads, use cache
+        # For full file reads, return the cached content as-is
         if num_lines == -1:
-            cache_key = f"{filename}_full"
-            
-            if cache_key in _file_cache:
-                cached_mtime, cached_content = _file_cache[cache_key]
-                if cached_mtime == current_mtime:
-                    logger.info(f"Using cached full content for: {filename}")
-                    return {
-                        "filename": filename,
-                        "content": cached_content,
-                        "total_lines": len(cached_content.splitlines()),
-                        "success": True,
-                        "cached": True
-                    }
-            
-            # Read full file
-            logger.info(f"Reading full Python file: {filename}")
-            with open(filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Cache it
-            _file_cache[cache_key] = (current_mtime, content)
-            
+            entry, cached = _file_cache.get(filename)
+            logger.info(f"{'Using cached' if cached else 'Read'} full content for: {filename}")
             return {
                 "filename": filename,
-                "content": content,
-                "total_lines": len(content.splitlines()),
+                "content": entry.content,
+                "total_lines": len(entry.offsets),
+                "content_hash": entry.digest,
                 "success": True,
-                "cached": False
+                "cached": cached
             }
         
-        # For chunked reads
+        # For chunked reads, slice the cached content by line offsets
         logger.info(f"Reading {filename} lines {start_line} to {start_line + num_lines - 1}")
-        with open(filename, 'r', encoding='utf-8') as f:
-            all_lines = f.readlines()
-        
-        total_lines = len(all_lines)
-        
-        # Adjust for 1-indexed start_line
-        start_idx = max(0, start_line - 1)
-        end_idx = min(total_lines, start_idx + num_lines)
-        
-        chunk_lines = all_lines[start_idx:end_idx]
-        content = ''.join(chunk_lines)
+        content, start_idx, lines_returned, entry, cached = _file_cache.get_lines(filename, start_line, num_lines)
+        total_lines = len(entry.offsets)
         
-        logger.info(f"Successfully read {len(chunk_lines)} lines from {filename}")
+        logger.info(f"Successfully read {lines_returned} lines from {filename}")
         return {
             "filename": filename,
             "content": content,
             "start_line": start_line,
-            "end_line": start_idx + len(chunk_lines),
-            "lines_returned": len(chunk_lines),
+            "end_line": start_idx + lines_returned,
+            "lines_returned": lines_returned,
             "total_lines": total_lines,
+            "content_hash": entry.digest,
             "success": True,
-            "cached": False,
-            "note": f"Showing lines {start_line}-{start_idx + len(chunk_lines)} of {total_lines}. Use start_line and num_lines to read other sections."
+            "cached": cached,
+            "note": f"Showing lines {start_line}-{start_idx + lines_returned} of {total_lines}. Use start_line and num_lines to read other sections."
         }
     except FileNotFoundError:
         logger.error(f"File not found: {filename}", exc_info=True)
@@ -787,9 +917,9 @@ def read_python_file(filename, start_line=1, num_lines=200):
         logger.error(f"Failed to read Python file {filename}: {str(e)}", exc_info=True)
         return {"error": f"Failed to read file: {str(e)}"}
 
-def edit_python_file(filename, old_content, new_content):
-    """Edit a Python file (app.py or models.py) by replacing content"""
-    allowed_files = ['app.py', 'models.py']
+def edit_python_file(filename, old_content=None, new_content=None, edits=None, expected_hash=None):
+    """Edit a Python file (app.py or models.py) by replacing content (or applying a batch of edits)"""
+    allowed_files = PYTHON_FILES
     
     if filename not in allowed_files:
         return {"error": f"Access denied. Only these files can be edited: {', '.join(allowed_files)}"}
@@ -797,30 +927,50 @@ def edit_python_file(filename, old_content, new_content):
     try:
         logger.info(f"Editing Python file: {filename}")
         
-        with open(filename, 'r', encoding='utf-8') as f:
-            current_content = f.read()
-        
-        if old_content not in current_content:
-            return {"error": "Old content not found in file. Please read the file first to get the exact content."}
-        
-        updated_content = current_content.replace(old_content, new_content, 1)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(updated_content)
+        batch = _collect_edits(old_content, new_content, edits)
+        new_hash = _file_editor.apply(filename, batch, expected_hash=expected_hash)
         
         logger.info(f"Successfully edited Python file: {filename}")
         return {
             "filename": filename,
             "success": True,
+            "edits_applied": len(batch),
+            "content_hash": new_hash,
             "message": f"Successfully updated {filename}. Remember to restart the Flask server for changes to take effect!"
         }
+    except EditConflict as e:
+        logger.warning(f"Edit conflict on {filename}: {str(e)}")
+        return {"error": str(e), "conflict": True}
+    except EditError as e:
+        return {"error": str(e)}
     except Exception as e:
         logger.error(f"Failed to edit Python file {filename}: {str(e)}", exc_info=True)
         return {"error": f"Failed to edit file: {str(e)}"}
 
+def search_code(query, kind="any", max_results=20):
+    """Search the readable backend and dashboard files using the prebuilt code index"""
+    if not query or not query.strip():
+        return {"error": "A search query is required"}
+    if kind not in ("any", "symbol", "route", "text"):
+        return {"error": f"Invalid kind: {kind}. Use any, symbol, route or text."}
+    
+    try:
+        logger.info(f"Searching code for: {query} (kind={kind})")
+        result = _code_index.search(query, PYTHON_FILES + DASHBOARD_FILES, kind=kind, max_results=max_results)
+        logger.info(f"Found {result['total_matches']} matches for: {query}")
+        return {
+            "query": query,
+            "success": True,
+            **result
+        }
+    except Exception as e:
+        logger.error(f"Failed to search code for {query}: {str(e)}", exc_info=True)
+        return {"error": f"Failed to search code: {str(e)}"}
+
 AVAILABLE_FUNCTIONS = {
     "list_render_services": list_render_services,
     "get_render_service": get_render_service,
+    "get_render_services_status": get_render_services_status,
     "restart_render_service": restart_render_service,
     "suspend_render_service": suspend_render_service,
     "resume_render_service": resume_render_service,
@@ -832,12 +982,30 @@ AVAILABLE_FUNCTIONS = {
     "create_html_page": create_html_page,
     "read_python_file": read_python_file,
     "edit_python_file": edit_python_file,
+    "search_code": search_code,
     "read_env_variables": read_env_variables
 }
 
+def _create_message(trace, span_name, **kwargs):
+    """Call the Claude API inside a tracing span"""
+    span = trace.start_span("model", span_name)
+    response = get_anthropic_client().messages.create(**kwargs)
+    trace.record_model_call(span, response)
+    logger.info(f"Model call {span_name} took {span['duration_ms']}ms ({span['input_tokens']} in / {span['output_tokens']} out tokens)")
+    return response, span
+
+def _execute_function(trace, function_name, function_args):
+    """Run an admin tool inside a tracing span and return its JSON payload"""
+    span = trace.start_span("tool", function_name)
+    function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
+    payload = json.dumps(function_response)
+    trace.record_tool_call(span, function_response, payload)
+    logger.info(f"Function {function_name} took {span['duration_ms']}ms ({span['payload_bytes']} bytes, cache_hit={span['cache_hit']})")
+    return payload, span
+
 def process_admin_command(user_message, conversation_history=None):
     """Process an admin command using AI with function calling"""
-    if not anthropic_client:
+    if get_anthropic_client() is None:
         return {
             "response": "Claude API is not configured. Please set the ANTHROPIC_API_KEY environment variable to enable AI admin features.",
             "conversation_history": conversation_history or []
@@ -852,9 +1020,10 @@ def process_admin_command(user_message, conversation_history=None):
             "content": """You are Coey, a full-stack AI developer with self-healing capabilities.
 
 CAPABILITIES:
-• Render: list, restart, suspend, resume services
+• Render: list, bulk status, restart, suspend, resume services
 • Namecheap: check domains, list domains, get info
 • Files: read/edit HTML, CSS, Python (app.py, models.py)
+• Search: find functions, routes and text across app.py, models.py and dashboard files
 • Create: new HTML pages, Flask routes, database models
 • Env: read environment variables (API keys, secrets, config)
 • Debug & Self-Heal: automatically detect and fix issues
@@ -892,11 +1061,12 @@ PROACTIVE MONITORING:
 
 WORKFLOW:
 1. Only read files when necessary (don't read app.py/models.py for simple questions)
-2. When reading Python files, use chunks (200 lines) for speed - default parameters are optimized
-3. Make precise edits
-4. Verify changes only if editing
-5. Test if critical
-6. Explain clearly
+2. To find where something is handled, call search_code first - it returns the matching lines directly
+3. When reading Python files, use chunks (200 lines) for speed - default parameters are optimized
+4. Make precise edits (batch several changes to one file with the edits parameter and pass the content_hash from your read as expected_hash)
+5. Verify changes only if editing
+6. Test if critical
+7. Explain clearly
 
 PERFORMANCE BEST PRACTICES:
 • Use chunked reading: Read 200-line sections instead of full files for instant responses
@@ -908,12 +1078,15 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
         }
     ] + conversation_history + [{"role": "user", "content": user_message}]
     
+    trace = TurnTrace(user_message)
     try:
         logger.info(f"Processing admin command: {user_message}")
         system_message = messages[0]["content"]
         user_messages = messages[1:]
         
-        response = anthropic_client.messages.create(
+        response, _ = _create_message(
+            trace,
+            "initial",
             model="claude-3-5-sonnet-20241022",
             max_tokens=4096,
             system=system_message,
@@ -937,13 +1110,12 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
                 logger.info(f"Executing function: {function_name} with args: {function_args}")
                 
                 if function_name in AVAILABLE_FUNCTIONS:
-                    function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
-                    logger.info(f"Function {function_name} response: {function_response}")
+                    payload, _ = _execute_function(trace, function_name, function_args)
                     
                     tool_results.append({
                         "type": "tool_result",
                         "tool_use_id": tool_call.id,
-                        "content": json.dumps(function_response)
+                        "content": payload
                     })
                 else:
                     logger.warning(f"Unknown function called: {function_name}")
@@ -958,7 +1130,9 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
                 "content": tool_results
             })
             
-            final_response = anthropic_client.messages.create(
+            final_response, _ = _create_message(
+                trace,
+                "final",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=4096,
                 system=system_message,
@@ -985,10 +1159,16 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
             "response": f"I encountered an error while processing your command: {str(e)}. Please check the configuration and try again.",
             "conversation_history": conversation_history
         }
+    finally:
+        trace_aggregator.record(trace)
+
+def process_admin_command_streaming(user_message, conversation_history=None, include_metrics=False):
+    """Process an admin command with streaming responses
 
-def process_admin_command_streaming(user_message, conversation_history=None):
-    """Process an admin command with streaming responses"""
-    if not anthropic_client:
+    When include_metrics is set, a "metrics" event is yielded after every model
+    and tool call, plus a per-turn summary before "done".
+    """
+    if get_anthropic_client() is None:
         yield json.dumps({
             "type": "error",
             "content": "Claude API is not configured. Please set the ANTHROPIC_API_KEY environment variable to enable AI admin features."
@@ -1004,9 +1184,10 @@ def process_admin_command_streaming(user_message, conversation_history=None):
             "content": """You are Coey, a full-stack AI developer with self-healing capabilities.
 
 CAPABILITIES:
-• Render: list, restart, suspend, resume services
+• Render: list, bulk status, restart, suspend, resume services
 • Namecheap: check domains, list domains, get info
 • Files: read/edit HTML, CSS, Python (app.py, models.py)
+• Search: find functions, routes and text across app.py, models.py and dashboard files
 • Create: new HTML pages, Flask routes, database models
 • Env: read environment variables (API keys, secrets, config)
 • Debug & Self-Heal: automatically detect and fix issues
@@ -1044,11 +1225,12 @@ PROACTIVE MONITORING:
 
 WORKFLOW:
 1. Only read files when necessary (don't read app.py/models.py for simple questions)
-2. When reading Python files, use chunks (200 lines) for speed - default parameters are optimized
-3. Make precise edits
-4. Verify changes only if editing
-5. Test if critical
-6. Explain clearly
+2. To find where something is handled, call search_code first - it returns the matching lines directly
+3. When reading Python files, use chunks (200 lines) for speed - default parameters are optimized
+4. Make precise edits (batch several changes to one file with the edits parameter and pass the content_hash from your read as expected_hash)
+5. Verify changes only if editing
+6. Test if critical
+7. Explain clearly
 
 PERFORMANCE BEST PRACTICES:
 • Use chunked reading: Read 200-line sections instead of full files for instant responses
@@ -1060,6 +1242,7 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
         }
     ] + conversation_history + [{"role": "user", "content": user_message}]
     
+    trace = TurnTrace(user_message)
     try:
         logger.info(f"Processing admin command (streaming): {user_message}")
         
@@ -1070,13 +1253,17 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
         user_messages = messages[1:]
         
         # Use Claude's API (non-streaming for now - streaming can be added later)
-        response = anthropic_client.messages.create(
+        response, span = _create_message(
+            trace,
+            "initial",
             model="claude-3-5-sonnet-20241022",
             max_tokens=4096,
             system=system_message,
             messages=user_messages,
             tools=FUNCTION_DEFINITIONS
         )
+        if include_metrics:
+            yield json.dumps({"type": "metrics", "span": span}) + "\n"
         
         # Check for tool calls in Claude's response
         tool_calls = [block for block in response.content if block.type == "tool_use"]
@@ -1113,19 +1300,22 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
                     action_msg = f"Editing {function_args.get('filename', 'file')}..."
                 elif function_name == "edit_dashboard_file":
                     action_msg = f"Updating {function_args.get('filename', 'file')}..."
+                elif function_name == "search_code":
+                    action_msg = f"Searching code for {function_args.get('query', '')}..."
                 
                 yield json.dumps({"type": "status", "content": action_msg}) + "\n"
                 
                 logger.info(f"Executing function: {function_name} with args: {function_args}")
                 
                 if function_name in AVAILABLE_FUNCTIONS:
-                    function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
-                    logger.info(f"Function {function_name} response: {function_response}")
+                    payload, span = _execute_function(trace, function_name, function_args)
+                    if include_metrics:
+                        yield json.dumps({"type": "metrics", "span": span}) + "\n"
                     
                     tool_results.append({
                         "type": "tool_result",
                         "tool_use_id": tc.id,
-                        "content": json.dumps(function_response)
+                        "content": payload
                     })
             
             # Add tool results to messages
@@ -1135,23 +1325,33 @@ For backend changes, remind user to restart Flask server. Be proactive, self-rel
             })
             
             # Get final response from Claude
-            final_response = anthropic_client.messages.create(
+            final_response, span = _create_message(
+                trace,
+                "final",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=4096,
                 system=system_message,
                 messages=user_messages
             )
+            if include_metrics:
+                yield json.dumps({"type": "metrics", "span": span}) + "\n"
             
             # Extract and yield text content
             text_content = " ".join([block.text for block in final_response.content if block.type == "text"])
             if text_content:
                 yield json.dumps({"type": "content", "content": text_content}) + "\n"
             
+            if include_metrics:
+                yield json.dumps({"type": "metrics", "turn": trace.summary()}) + "\n"
             yield json.dumps({"type": "done", "conversation_history": user_messages}) + "\n"
         else:
             # No tool calls - return the initial response
+            if include_metrics:
+                yield json.dumps({"type": "metrics", "turn": trace.summary()}) + "\n"
             yield json.dumps({"type": "done", "conversation_history": user_messages}) + "\n"
             
     except Exception as e:
         logger.error(f"Error processing streaming command: {str(e)}", exc_info=True)
         yield json.dumps({"type": "error", "error": f"I encountered an error: {str(e)}"}) + "\n"
+    finally:
+        trace_aggregator.record(trace)
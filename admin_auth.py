@@ -0,0 +1,134 @@
+import time
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+from flask import request, jsonify, g
+from itsdangerous import BadSignature, SignatureExpired
+from settings import settings
+
+ADMIN_TOKEN_MAX_AGE = 86400  # 24 hour expiry
+ADMIN_TOKEN_CACHE_SIZE = settings.admin_token_cache_size
+ADMIN_RATE_LIMIT_PER_MINUTE = settings.admin_rate_limit_per_minute
+
+
+class AdminAuthError(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class AdminAuth:
+    """Bearer-token check shared by every admin endpoint.
+
+    A token's signature is verified once; the payload is then kept in a small
+    LRU until the token's own expiry (issue time + max_age), so the admin
+    panel's repeated calls skip the HMAC. Only a digest of the token is kept.
+    Each token also gets per-minute request accounting, with an optional
+    per-minute limit (ADMIN_RATE_LIMIT_PER_MINUTE, 0 = no limit).
+    """
+
+    def __init__(self, serializer, max_age=ADMIN_TOKEN_MAX_AGE, max_entries=ADMIN_TOKEN_CACHE_SIZE,
+                 rate_limit_per_minute=ADMIN_RATE_LIMIT_PER_MINUTE):
+        self.serializer = serializer
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self._verified = OrderedDict()  # digest -> (payload, expires_at)
+        self._usage = OrderedDict()     # digest -> {'minute', 'count', 'total', 'limited', 'last_seen'}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'verifications': 0, 'rejected': 0, 'rate_limited': 0}
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _cached(self, digest):
+        with self._lock:
+            entry = self._verified.get(digest)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._verified[digest]
+                return None
+            self._verified.move_to_end(digest)
+            return payload
+
+    def verify(self, token):
+        """Return the token payload, raising AdminAuthError if it is not a valid admin token"""
+        digest = self._digest(token)
+        payload = self._cached(digest)
+        if payload is not None:
+            self.stats['hits'] += 1
+            return digest, payload
+
+        self.stats['verifications'] += 1
+        try:
+            payload, issued_at = self.serializer.loads(token, max_age=self.max_age, return_timestamp=True)
+        except (BadSignature, SignatureExpired):
+            self.stats['rejected'] += 1
+            raise AdminAuthError('Invalid or expired token')
+        if not isinstance(payload, dict) or not payload.get('admin'):
+            self.stats['rejected'] += 1
+            raise AdminAuthError('Unauthorized')
+
+        with self._lock:
+            self._verified[digest] = (payload, issued_at.timestamp() + self.max_age)
+            self._verified.move_to_end(digest)
+            while len(self._verified) > self.max_entries:
+                self._verified.popitem(last=False)
+        return digest, payload
+
+    def _account(self, digest):
+        minute = int(time.time() // 60)
+        with self._lock:
+            usage = self._usage.get(digest)
+            if usage is None:
+                usage = self._usage[digest] = {'minute': minute, 'count': 0, 'total': 0, 'limited': 0, 'last_seen': None}
+            self._usage.move_to_end(digest)
+            while len(self._usage) > self.max_entries:
+                self._usage.popitem(last=False)
+            if usage['minute'] != minute:
+                usage['minute'] = minute
+                usage['count'] = 0
+            usage['last_seen'] = time.time()
+            if self.rate_limit_per_minute and usage['count'] >= self.rate_limit_per_minute:
+                usage['limited'] += 1
+                self.stats['rate_limited'] += 1
+                raise AdminAuthError('Too many requests', status=429)
+            usage['count'] += 1
+            usage['total'] += 1
+
+    def authenticate(self, auth_header):
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise AdminAuthError('Unauthorized')
+        digest, payload = self.verify(auth_header.split(' ')[1])
+        self._account(digest)
+        return payload
+
+    def required(self, view):
+        """Decorator: reject the request unless it carries a valid admin bearer token"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                g.admin = self.authenticate(request.headers.get('Authorization'))
+            except AdminAuthError as e:
+                return jsonify({'error': e.message}), e.status
+            return view(*args, **kwargs)
+        return wrapper
+
+    def revoke(self, token):
+        with self._lock:
+            self._verified.pop(self._digest(token), None)
+
+    def snapshot(self):
+        with self._lock:
+            tokens = [
+                {'token': digest[:12], 'requests_this_minute': usage['count'], 'total_requests': usage['total'],
+                 'rate_limited': usage['limited'], 'last_seen': usage['last_seen']}
+                for digest, usage in self._usage.items()
+            ]
+            cached = len(self._verified)
+        return dict(self.stats, cached_tokens=cached, tokens=tokens)
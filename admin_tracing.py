@@ -0,0 +1,129 @@
+import time
+import uuid
+import threading
+from collections import deque
+
+SAMPLES_PER_SPAN = 200
+RECENT_TURNS = 50
+
+
+class TurnTrace:
+    """Timing spans for one admin chat turn (model calls and tool calls)"""
+
+    def __init__(self, user_message=''):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.message_preview = user_message[:80]
+        self.spans = []
+
+    def start_span(self, kind, name):
+        return {"kind": kind, "name": name, "_start": time.perf_counter()}
+
+    def finish_span(self, span, **attrs):
+        span["duration_ms"] = round((time.perf_counter() - span.pop("_start")) * 1000, 2)
+        span.update(attrs)
+        self.spans.append(span)
+        return span
+
+    def record_model_call(self, span, response):
+        usage = getattr(response, "usage", None)
+        return self.finish_span(
+            span,
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            stop_reason=getattr(response, "stop_reason", None)
+        )
+
+    def record_tool_call(self, span, function_response, payload):
+        cached = function_response.get("cached") if isinstance(function_response, dict) else None
+        return self.finish_span(
+            span,
+            payload_bytes=len(payload.encode("utf-8")),
+            cache_hit=cached,
+            error=isinstance(function_response, dict) and "error" in function_response
+        )
+
+    def summary(self):
+        model_spans = [s for s in self.spans if s["kind"] == "model"]
+        tool_spans = [s for s in self.spans if s["kind"] == "tool"]
+        return {
+            "turn_id": self.turn_id,
+            "started_at": self.started_at,
+            "message": self.message_preview,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 2),
+            "model_ms": round(sum(s["duration_ms"] for s in model_spans), 2),
+            "tool_ms": round(sum(s["duration_ms"] for s in tool_spans), 2),
+            "input_tokens": sum(s.get("input_tokens", 0) for s in model_spans),
+            "output_tokens": sum(s.get("output_tokens", 0) for s in model_spans),
+            "tool_payload_bytes": sum(s.get("payload_bytes", 0) for s in tool_spans),
+            "spans": list(self.spans)
+        }
+
+
+class TraceAggregator:
+    """Process-wide rollup of admin chat turns, served by /api/admin/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._recent = deque(maxlen=RECENT_TURNS)
+        self._turns = 0
+
+    def record(self, trace):
+        summary = trace.summary()
+        with self._lock:
+            self._turns += 1
+            self._recent.append(summary)
+            for span in trace.spans:
+                key = f"{span['kind']}:{span['name']}"
+                stats = self._spans.get(key)
+                if stats is None:
+                    stats = self._spans[key] = {
+                        "count": 0, "errors": 0, "cache_hits": 0, "total_ms": 0.0, "max_ms": 0.0,
+                        "input_tokens": 0, "output_tokens": 0, "payload_bytes": 0,
+                        "samples": deque(maxlen=SAMPLES_PER_SPAN)
+                    }
+                stats["count"] += 1
+                stats["errors"] += 1 if span.get("error") else 0
+                stats["cache_hits"] += 1 if span.get("cache_hit") else 0
+                stats["total_ms"] += span["duration_ms"]
+                stats["max_ms"] = max(stats["max_ms"], span["duration_ms"])
+                stats["input_tokens"] += span.get("input_tokens", 0)
+                stats["output_tokens"] += span.get("output_tokens", 0)
+                stats["payload_bytes"] += span.get("payload_bytes", 0)
+                stats["samples"].append(span["duration_ms"])
+        return summary
+
+    @staticmethod
+    def _percentile(samples, pct):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def snapshot(self):
+        with self._lock:
+            spans = {}
+            for key, stats in self._spans.items():
+                spans[key] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "cache_hits": stats["cache_hits"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                    "p50_ms": self._percentile(stats["samples"], 50),
+                    "p95_ms": self._percentile(stats["samples"], 95),
+                    "max_ms": stats["max_ms"],
+                    "input_tokens": stats["input_tokens"],
+                    "output_tokens": stats["output_tokens"],
+                    "payload_bytes": stats["payload_bytes"]
+                }
+            slowest = sorted(self._recent, key=lambda t: t["total_ms"], reverse=True)[:10]
+            return {
+                "turns": self._turns,
+                "spans": spans,
+                "slowest_recent_turns": slowest
+            }
+
+
+aggregator = TraceAggregator()
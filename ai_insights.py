@@ -0,0 +1,342 @@
+import os
+import json
+import fcntl
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from models import db, User
+import rollups
+from analytics import time_series
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# the newest OpenAI model is "gpt-5" which was released August 7, 2025.
+# do not change this unless explicitly requested by the user
+INSIGHTS_MODEL = settings.ai_insights_model
+INSIGHTS_TTL = settings.ai_insights_ttl
+INSIGHTS_REFRESH_SECONDS = settings.ai_insights_refresh_seconds
+INSIGHTS_TIMEOUT = settings.ai_insights_timeout
+# Latest result shared between the worker processes on one host; the lock
+# next to it makes exactly one of them the background refresher
+INSIGHTS_SHARED_PATH = settings.ai_insights_shared_path
+# How often the refresher checks the wake file other processes touch
+WAKE_POLL_SECONDS = 1.0
+
+SYSTEM_PROMPT = "You are a business intelligence assistant providing concise, actionable insights."
+
+
+def collect_stats(now=None):
+    """Platform stats for the insights prompt, read from the rollup and time-series layers"""
+    now = now or datetime.utcnow()
+    totals = rollups.platform_totals()
+    verified = db.session.query(db.func.count(User.id)).filter(User.email_verified.is_(True)).scalar()
+
+    stats = {
+        'total_users': totals['total_users'],
+        'verified_users': int(verified or 0),
+        'total_revenue': round(totals['total_revenue'], 2),
+        'domain_revenue': round(totals['domain_revenue'], 2),
+        'subscription_revenue': round(totals['subscription_revenue'], 2),
+        'active_referrals': totals['active_referrals'],
+        'active_rentals': totals['active_rentals'],
+    }
+    for days in (7, 30):
+        # Day-aligned windows so the fingerprint only moves when the numbers do
+        series = time_series.series(['signups', 'conversions', 'revenue'], 'day', now - timedelta(days=days - 1), now, now=now)
+        metrics = series['metrics']
+        stats[f'signups_{days}d'] = metrics['signups']['totals'].get('signups', 0)
+        stats[f'leads_{days}d'] = metrics['conversions']['totals'].get('leads', 0)
+        stats[f'conversions_{days}d'] = metrics['conversions']['totals'].get('conversions', 0)
+        stats[f'revenue_{days}d'] = round(sum(metrics['revenue']['totals'].values()), 2)
+    return stats
+
+
+def fingerprint(stats):
+    return hashlib.sha256(json.dumps(stats, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def build_prompt(stats):
+    lead_rate = (stats['conversions_30d'] / stats['leads_30d'] * 100) if stats['leads_30d'] else 0.0
+    return f"""As a business analyst, provide brief insights (2-3 sentences) for this affiliate marketing platform:
+
+Total Users: {stats['total_users']}
+Verified Users: {stats['verified_users']}
+Total Revenue: ${stats['total_revenue']}
+Domain Revenue: ${stats['domain_revenue']}
+Subscription Revenue: ${stats['subscription_revenue']}
+Active Referrals: {stats['active_referrals']}
+Active Domain Rentals: {stats['active_rentals']}
+Signups (7d / 30d): {stats['signups_7d']} / {stats['signups_30d']}
+Revenue (7d / 30d): ${stats['revenue_7d']} / ${stats['revenue_30d']}
+Lead Conversion (30d): {stats['conversions_30d']} of {stats['leads_30d']} ({lead_rate:.1f}%)
+
+Focus on growth trends, conversion rates, and actionable recommendations."""
+
+
+class InsightsService:
+    """Generates AI insights from server-side stats and caches them by stats fingerprint.
+
+    Identical stats within the TTL are served from memory, concurrent requests
+    for the same fingerprint share one model call, and a single OpenAI client
+    (with its pooled HTTP connections) is reused across calls. With a refresh
+    interval set, one process per host (whichever first takes the lock beside
+    shared_path) runs a background thread that keeps the result warm; every
+    process publishes its results to shared_path and reads the others', so
+    admin requests return the latest result without waiting on the model.
+    Any process wakes the refresher early by touching the wake file beside
+    shared_path, which the refresher polls.
+    """
+
+    def __init__(self, model=INSIGHTS_MODEL, ttl=INSIGHTS_TTL, base_url=None, api_key=None, timeout=INSIGHTS_TIMEOUT,
+                 refresh_interval=INSIGHTS_REFRESH_SECONDS, shared_path=INSIGHTS_SHARED_PATH):
+        self.model = model
+        self.ttl = ttl
+        self.base_url = base_url or settings.openai_base_url or None
+        self.api_key = api_key
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.shared_path = shared_path
+        self._shared_mtime = None
+        self._wake_mtime = None
+        self._refresh_lock_file = None
+        self._client = None
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._latest = None
+        self._refresh_event = threading.Event()
+        self._refresh_thread = None
+        self._stop_refresh = threading.Event()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        api_key=self.api_key or settings.openai_api_key or None,
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        max_retries=1
+                    )
+        return self._client
+
+    def _generate(self, stats):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_prompt(stats)}
+            ],
+            max_completion_tokens=200
+        )
+        return response.choices[0].message.content
+
+    def _publish(self, result):
+        if not self.shared_path:
+            return
+        tmp_path = f"{self.shared_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self.shared_path)
+        except OSError:
+            logger.warning("Could not publish AI insights to %s", self.shared_path, exc_info=True)
+
+    def _load_shared(self):
+        """Adopt a newer result published by another process"""
+        if not self.shared_path:
+            return
+        try:
+            mtime = os.stat(self.shared_path).st_mtime_ns
+            if mtime == self._shared_mtime:
+                return
+            with open(self.shared_path) as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._shared_mtime = mtime
+        if self._latest is None or shared.get('created', 0) > self._latest['created']:
+            self._latest = shared
+
+    def _fresh(self, key):
+        latest = self._latest
+        if latest and latest['fingerprint'] == key and time.time() - latest['created'] < self.ttl:
+            return latest
+        return None
+
+    def refresh(self, stats=None, force=False):
+        """Return the insight for the current stats, calling the model only on a cache miss"""
+        stats = stats or collect_stats()
+        key = fingerprint(stats)
+        if not force:
+            cached = self._fresh(key)
+            if cached:
+                return dict(cached, cached=True)
+
+        with self._lock:
+            waiter = self._inflight.get(key)
+            if waiter is None:
+                waiter = self._inflight[key] = {'event': threading.Event(), 'result': None, 'error': None}
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            waiter['event'].wait(self.timeout * 2)
+            if waiter['error'] is not None:
+                raise waiter['error']
+            if waiter['result'] is None:
+                raise TimeoutError('Timed out waiting for AI insights')
+            return dict(waiter['result'], cached=True)
+
+        try:
+            result = {
+                'insights': self._generate(stats),
+                'stats': stats,
+                'fingerprint': key,
+                'created': time.time(),
+                'generated_at': datetime.utcnow().isoformat()
+            }
+            self._latest = result
+            self._publish(result)
+            waiter['result'] = result
+            return dict(result, cached=False)
+        except Exception as e:
+            waiter['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter['event'].set()
+
+    def get(self, force=False):
+        """Insight for the admin panel.
+
+        With background refresh configured, returns the latest result (this
+        process's or the one published by the refreshing process) immediately,
+        flagged stale if the stats have moved on, and asks the refresher
+        (in whichever process holds the lock) for a new one instead of
+        blocking on the model.
+        """
+        if force or self.refresh_interval <= 0:
+            return self.refresh(force=force)
+
+        self._load_shared()
+        if self._latest is None:
+            return self.refresh()
+        stats = collect_stats()
+        key = fingerprint(stats)
+        cached = self._fresh(key)
+        if cached:
+            return dict(cached, cached=True)
+        if time.time() - self._latest['created'] > max(self.ttl, 2 * self.refresh_interval):
+            # Nothing has refreshed for too long (no refresher process running)
+            return self.refresh(stats)
+        self._request_refresh()
+        return dict(self._latest, cached=True, stale=True)
+
+    def _request_refresh(self):
+        """Wake the refresher, which may be running in another process"""
+        if not self.shared_path:
+            self._refresh_event.set()
+            return
+        wake_path = f"{self.shared_path}.wake"
+        try:
+            with open(wake_path, 'a'):
+                pass
+            # An explicit timestamp, so coarse filesystem clocks can't swallow a request
+            now = time.time_ns()
+            os.utime(wake_path, ns=(now, now))
+        except OSError:
+            logger.warning("Could not request an AI insights refresh via %s", wake_path, exc_info=True)
+
+    def _wake_requested(self):
+        """True once for each touch of the wake file since the last check"""
+        if not self.shared_path:
+            return False
+        try:
+            mtime = os.stat(f"{self.shared_path}.wake").st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._wake_mtime:
+            return False
+        self._wake_mtime = mtime
+        return True
+
+    def _wait_for_refresh(self, interval):
+        """Sleep until the interval passes, a wake request arrives, or the refresher is stopped"""
+        deadline = time.monotonic() + interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._refresh_event.wait(min(WAKE_POLL_SECONDS, remaining)):
+                break
+            if self._wake_requested():
+                break
+        self._refresh_event.clear()
+
+    def _acquire_refresh_lock(self):
+        if not self.shared_path:
+            return True
+        lock_file = open(f"{self.shared_path}.lock", 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held for the life of the process; released by the OS when it exits
+        self._refresh_lock_file = lock_file
+        return True
+
+    def start_background_refresh(self, app, interval=None):
+        """Refresh every interval seconds (or when woken) in a daemon thread.
+
+        Called from serving processes only (gunicorn's post_worker_init, the
+        dev server), never at import, so CLI commands don't start it. Only the
+        process that takes the refresh lock starts the thread; a replacement
+        worker takes over the lock when the refresher exits.
+        """
+        interval = self.refresh_interval if interval is None else interval
+        if interval <= 0 or self._refresh_thread is not None or not self._acquire_refresh_lock():
+            return None
+
+        # Requests made before this process became the refresher are covered by its first refresh
+        self._wake_requested()
+
+        def run():
+            while not self._stop_refresh.is_set():
+                try:
+                    with app.app_context():
+                        self.refresh()
+                except Exception:
+                    logger.exception("AI insights refresh failed")
+                self._wait_for_refresh(interval)
+
+        self._refresh_thread = threading.Thread(target=run, name='ai-insights-refresh', daemon=True)
+        self._refresh_thread.start()
+        return self._refresh_thread
+
+    def stop_background_refresh(self):
+        """Stop the refresh thread and release the refresh lock"""
+        thread = self._refresh_thread
+        if thread is None:
+            return
+        self._stop_refresh.set()
+        self._refresh_event.set()
+        thread.join(self.timeout * 2)
+        self._refresh_thread = None
+        self._stop_refresh.clear()
+        if self._refresh_lock_file is not None:
+            self._refresh_lock_file.close()
+            self._refresh_lock_file = None
+
+
+def public_result(result):
+    """Strip internal bookkeeping before returning a result as JSON"""
+    return {key: value for key, value in result.items() if key != 'created'}
+
+
+insights_service = InsightsService()
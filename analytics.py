@@ -0,0 +1,264 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from models import db, User, Payment, PaymentCharge, SubscriptionCharge, EmailLead, AffiliateClick
+from settings import settings
+
+GRANULARITIES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+SQLITE_FORMATS = {'hour': '%Y-%m-%d %H:00:00', 'day': '%Y-%m-%d 00:00:00'}
+MYSQL_FORMATS = {'hour': '%Y-%m-%d %H:00:00', 'day': '%Y-%m-%d 00:00:00'}
+
+# Buckets that ended less than this long ago are still recomputed, so rows
+# committed slightly late (webhooks, slow transactions) are not frozen out
+SETTLE_SECONDS = settings.analytics_settle_seconds
+MAX_BUCKETS = settings.analytics_max_buckets
+CACHE_MAX_ENTRIES = settings.analytics_cache_max_entries
+
+# Columns the bucketed queries filter and group on
+INDEXED_COLUMNS = [
+    User.created_at,
+    EmailLead.created_at,
+    Payment.payment_date,
+    PaymentCharge.payment_date,
+    SubscriptionCharge.payment_date,
+    AffiliateClick.clicked_at,
+]
+
+
+def floor_time(value, granularity):
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def naive_utc(value):
+    """Columns are naive UTC; convert aware datetimes instead of dropping their offset"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return naive_utc(value)
+    return datetime.fromisoformat(str(value))
+
+
+def bucket_expression(column, granularity):
+    """SQL expression truncating column to the start of its hour or day"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return db.func.date_trunc(granularity, column)
+    if dialect == 'mysql':
+        return db.func.date_format(column, MYSQL_FORMATS[granularity])
+    return db.func.strftime(SQLITE_FORMATS[granularity], column)
+
+
+def _grouped(granularity, column, start, end, value, series, *conditions):
+    """Yield (bucket, series, value) from one GROUP BY query; series is a name or a column"""
+    bucket = bucket_expression(column, granularity)
+    columns = [bucket, value] if isinstance(series, str) else [bucket, value, series]
+    query = (
+        db.session.query(*columns)
+        .filter(column >= start, column < end, *conditions)
+        .group_by(*[c for c in columns if c is not value])
+    )
+    for row in query:
+        name = series if isinstance(series, str) else (row[2] or 'unknown')
+        yield row[0], name, row[1] or 0
+
+
+def _signups(granularity, start, end):
+    yield from _grouped(granularity, User.created_at, start, end, db.func.count(User.id), 'signups')
+
+
+def _conversions(granularity, start, end):
+    bucket = bucket_expression(EmailLead.created_at, granularity)
+    query = (
+        db.session.query(
+            bucket,
+            db.func.count(EmailLead.id),
+            db.func.sum(db.case((EmailLead.converted.is_(True), 1), else_=0))
+        )
+        .filter(EmailLead.created_at >= start, EmailLead.created_at < end)
+        .group_by(bucket)
+    )
+    for day, leads, converted in query:
+        yield day, 'leads', leads
+        yield day, 'conversions', converted or 0
+
+
+def _revenue(granularity, start, end):
+    yield from _grouped(granularity, Payment.payment_date, start, end, db.func.sum(Payment.amount),
+                        'package', Payment.status == 'completed')
+    yield from _grouped(granularity, PaymentCharge.payment_date, start, end, db.func.sum(PaymentCharge.amount),
+                        PaymentCharge.charge_type, PaymentCharge.status == 'completed')
+    yield from _grouped(granularity, SubscriptionCharge.payment_date, start, end, db.func.sum(SubscriptionCharge.amount),
+                        'subscription', SubscriptionCharge.status == 'paid')
+
+
+def _clicks(granularity, start, end):
+    yield from _grouped(granularity, AffiliateClick.clicked_at, start, end, db.func.count(AffiliateClick.id), 'clicks')
+    yield from _grouped(granularity, AffiliateClick.clicked_at, start, end,
+                        db.func.count(db.distinct(AffiliateClick.ip_hash)), 'unique_visitors')
+
+
+def _click_range_totals(start, end):
+    """A visitor seen in several buckets counts once over the whole range"""
+    visitors = (
+        db.session.query(db.func.count(db.distinct(AffiliateClick.ip_hash)))
+        .filter(AffiliateClick.clicked_at >= start, AffiliateClick.clicked_at < end)
+        .scalar()
+    )
+    return {'unique_visitors': visitors or 0}
+
+
+METRICS = {
+    'signups': _signups,
+    'clicks': _clicks,
+    'conversions': _conversions,
+    'revenue': _revenue,
+}
+
+# Series whose range total is not the sum of its buckets (distinct counts)
+RANGE_TOTALS = {
+    'clicks': _click_range_totals,
+}
+
+# Metrics whose closed buckets can still change: conversions are bucketed by
+# EmailLead.created_at but count the converted flag, which flips whenever the
+# lead converts, so they are recomputed on every call
+UNCACHED_METRICS = {'conversions'}
+
+
+class TimeSeries:
+    """Bucketed metric series with a per-bucket cache.
+
+    A bucket whose end is more than SETTLE_SECONDS in the past is closed: it is
+    computed once and served from memory afterwards (except for
+    UNCACHED_METRICS, which are always recomputed). Open buckets (normally
+    just the current one) are recomputed on every call, so a poll of a fully
+    cached range costs a single small GROUP BY over the last bucket.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, settle_seconds=SETTLE_SECONDS):
+        self.max_entries = max_entries
+        self.settle = timedelta(seconds=settle_seconds)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _store(self, key, values):
+        with self._lock:
+            self._cache[key] = values
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, metric=None):
+        with self._lock:
+            if metric is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == metric]:
+                    del self._cache[key]
+
+    def _compute(self, metric, granularity, start, end):
+        computed = {}
+        for bucket, name, value in METRICS[metric](granularity, start, end):
+            values = computed.setdefault(floor_time(_as_datetime(bucket), granularity), {})
+            values[name] = values.get(name, 0) + value
+        return computed
+
+    def buckets(self, metric, granularity, start, end, now=None):
+        """Return ([bucket_start, ...], {bucket_start: {series: value}}, stats)"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}. Choose from: {', '.join(METRICS)}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity}. Choose from: {', '.join(GRANULARITIES)}")
+
+        step = GRANULARITIES[granularity]
+        now = naive_utc(now or datetime.utcnow())
+        start, end = naive_utc(start), min(naive_utc(end), now)
+        starts = []
+        cursor = floor_time(start, granularity)
+        while cursor < end:
+            starts.append(cursor)
+            cursor += step
+        if len(starts) > MAX_BUCKETS:
+            raise ValueError(f"Range covers {len(starts)} {granularity} buckets; the limit is {MAX_BUCKETS}")
+
+        # Nothing is closed for metrics that can change after the fact
+        closed_before = now - self.settle if metric not in UNCACHED_METRICS else datetime.min
+        values = {}
+        to_compute = []
+        for bucket in starts:
+            cached = self._cached((metric, granularity, bucket)) if bucket + step <= closed_before else None
+            if cached is None:
+                to_compute.append(bucket)
+            else:
+                values[bucket] = cached
+
+        # One query per contiguous run of uncached buckets; a warm cache leaves
+        # only the open tail to recompute
+        runs = []
+        for bucket in to_compute:
+            if runs and runs[-1][1] == bucket:
+                runs[-1][1] = bucket + step
+            else:
+                runs.append([bucket, bucket + step])
+        for run_start, run_end in runs:
+            computed = self._compute(metric, granularity, run_start, run_end)
+            bucket = run_start
+            while bucket < run_end:
+                values[bucket] = computed.get(bucket, {})
+                if bucket + step <= closed_before:
+                    self._store((metric, granularity, bucket), values[bucket])
+                bucket += step
+
+        stats = {'cached_buckets': len(starts) - len(to_compute), 'computed_buckets': len(to_compute), 'queries': len(runs)}
+        return starts, values, stats
+
+    def series(self, metrics, granularity, start, end, now=None):
+        """Return a JSON-ready dict of aligned series for each requested metric"""
+        result = {'granularity': granularity, 'metrics': {}, 'cache': {}}
+        starts = []
+        for metric in metrics:
+            starts, values, stats = self.buckets(metric, granularity, start, end, now)
+            names = sorted({name for bucket_values in values.values() for name in bucket_values})
+            totals = {name: sum(values[bucket].get(name, 0) for bucket in starts) for name in names}
+            if metric in RANGE_TOTALS and starts:
+                range_totals = RANGE_TOTALS[metric](starts[0], starts[-1] + GRANULARITIES[granularity])
+                totals.update({name: value for name, value in range_totals.items() if name in totals})
+                stats['queries'] += 1
+            result['metrics'][metric] = {
+                'series': {name: [values[bucket].get(name, 0) for bucket in starts] for name in names},
+                'totals': totals,
+            }
+            result['cache'][metric] = stats
+        result['buckets'] = [bucket.isoformat() for bucket in starts]
+        return result
+
+
+def ensure_indexes():
+    """Create the created_at / payment_date indexes on tables that predate them"""
+    created = []
+    for column in INDEXED_COLUMNS:
+        for index in column.table.indexes:
+            if list(index.columns) == [column]:
+                index.create(db.engine, checkfirst=True)
+                created.append(index.name)
+    return created
+
+
+time_series = TimeSeries()
@@ -1,31 +1,66 @@
 import os
-from flask import Flask, request, jsonify, send_from_directory, redirect, session, Response, stream_with_context
+import logging
+import requests
+import xml.etree.ElementTree as ET
+from flask import Flask, request, jsonify, send_from_directory, redirect, session, Response, stream_with_context, abort
 from flask_cors import CORS
+from flask_migrate import Migrate, upgrade as migrate_upgrade, stamp as migrate_stamp
 from datetime import datetime, timedelta
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-import stripe
-from models import db, User, Payment, Referral, EmailLead, DomainRental, PaymentCharge, SubscriptionCharge
-from dotenv import load_dotenv
-from admin_ai_bot import process_admin_command, process_admin_command_streaming
-from namecheap_client import NamecheapClient
+from admin_auth import AdminAuth
+from settings import settings
+from lazy_imports import lazy_import
+from models import db, User, Payment, Referral, EmailLead, DomainRental, PaymentCharge, SubscriptionCharge, AffiliateClick
+from admin_tracing import aggregator as admin_trace_aggregator
+from namecheap_client import get_namecheap_client
+from db_config import normalize_database_url, engine_options, instrument_engine, pool_metrics
+from referrals import ReferralAttribution
+from bulk_import import BulkImporter, BulkImportError, IMPORT_MODELS
+from exports import export_stream, EXPORT_DATASETS
+import rollups
+from analytics import time_series, ensure_indexes as ensure_analytics_indexes
+from ai_insights import insights_service, public_result
+from assets import AssetManifest, PageCache, IMMUTABLE_CACHE_CONTROL
+from compression import init_compression, send_precompressed, precompress_static, choose_encoding
+from routing import HostRouter, AffiliateResolver, is_username_format
+from clicks import ClickRecorder, hash_ip
+from ratelimit import create_rate_limiter, parse_rate, client_ip
+from profiling import init_profiling, request_profiler
+from log_config import configure_logging, log_pipeline
 import json
+import click
 
-load_dotenv()
+# Heavy SDKs are imported on first use so workers boot without paying for them
+stripe = lazy_import('stripe', setup=lambda module: setattr(module, 'api_key', settings.stripe_secret_key))
+admin_ai_bot = lazy_import('admin_ai_bot')
+
+# Structured logs go through a queue to a writer thread (LOG_LEVEL, LOG_FORMAT)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='static', static_url_path='')
 CORS(app)
+init_compression(app)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
+app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(settings.database_url)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.getenv('SESSION_SECRET', 'dev-secret-key-change-in-production')
+app.config['SECRET_KEY'] = settings.session_secret
 
 db.init_app(app)
-
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY', '')
+# render_as_batch lets autogenerated migrations ALTER tables on SQLite too
+migrate = Migrate(app, db, render_as_batch=True)
 
 serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'])
+admin_auth = AdminAuth(serializer)
+
+# Per-client limits ("requests/seconds") on endpoints that call Namecheap or Stripe
+rate_limiter = create_rate_limiter()
+DOMAIN_AVAILABILITY_RATE = parse_rate(settings.rate_limit_domain_availability, '30/60')
+CLAIM_DOMAIN_RATE = parse_rate(settings.rate_limit_claim_domain, '10/60')
+DOMAIN_CHECKOUT_RATE = parse_rate(settings.rate_limit_domain_checkout, '5/60')
 
-PROMO_ACTIVE = os.getenv('PROMO_ACTIVE', 'true').lower() == 'true'
+PROMO_ACTIVE = settings.promo_active
 PROMO_PRICE = 20
 
 PACKAGE_PRICES = {
@@ -35,60 +70,77 @@ PACKAGE_PRICES = {
     'empire': {'name': 'Empire', 'price': PROMO_PRICE if PROMO_ACTIVE else 499, 'regular_price': 499, 'stripe_price_id': 'price_empire'}
 }
 
-SITE_OWNER_USERNAME = os.getenv('SITE_OWNER_USERNAME', 'rizzosai')
+SITE_OWNER_USERNAME = settings.site_owner_username
 
+referral_attribution = ReferralAttribution(SITE_OWNER_USERNAME)
+
+# Schema changes are applied once per deploy with `flask bootstrap-db`;
+# workers only attach instrumentation to the engine here.
 with app.app_context():
-    db.create_all()
+    instrument_engine(db.engine)
+    # Per-route latency, SQL and outbound HTTP metrics; /metrics for Prometheus
+    init_profiling(app, db.engine, request_profiler)
+
+asset_manifest = AssetManifest(app.static_folder)
+page_cache = PageCache(asset_manifest)
+# Landing pages take the promo traffic; load them before the first request
+page_cache.preload(['email-capture.html', 'claim-domain.html', 'domain-entry.html', 'packages.html'])
+
+def html_page(filename):
+    """Serve an HTML shell from static/ with asset URLs fingerprinted; the shell itself is never cached"""
+    try:
+        return page_cache.response(filename, request.headers.get('Accept-Encoding'))
+    except FileNotFoundError:
+        abort(404)
+
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    logical_path = asset_manifest.resolve(filename)
+    if logical_path is None:
+        abort(404)
+    response = send_precompressed(app.static_folder, logical_path, max_age=31536000)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+def static_file(filename):
+    return send_precompressed(app.static_folder, filename)
+
+# Plain /css, /js, ... URLs also get the precompressed variants
+app.view_functions['static'] = static_file
+
+# sales.* hosts land on the domain claim page, everything else on email capture
+host_router = HostRouter([('sales.', 'claim-domain.html')], default='email-capture.html')
+
+affiliate_resolver = AffiliateResolver(
+    lookup=lambda username: db.session.query(User.id).filter_by(username=username, email_verified=True).first() is not None,
+    load_all=lambda: db.session.execute(db.select(User.username).where(User.email_verified.is_(True))).scalars().all()
+)
+
+click_recorder = ClickRecorder(app)
 
 @app.route('/')
 def index():
-    host = request.host.lower()
-    if 'sales.' in host:
-        response = send_from_directory('static', 'claim-domain.html')
-    else:
-        response = send_from_directory('static', 'email-capture.html')
-
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return html_page(host_router.page_for(request.host))
 
 @app.route('/domain-entry')
 def domain_entry():
-    response = send_from_directory('static', 'domain-entry.html')
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return html_page('domain-entry.html')
 
 @app.route('/packages')
 def packages():
-    response = send_from_directory('static', 'packages.html')
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return html_page('packages.html')
 
 @app.route('/claim-domain')
 def claim_domain_page():
-    response = send_from_directory('static', 'claim-domain.html')
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    return response
+    return html_page('claim-domain.html')
 
 @app.route('/privacy-policy.html')
 def privacy_policy():
-    response = send_from_directory('static', 'privacy-policy.html')
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    return response
+    return html_page('privacy-policy.html')
 
 @app.route('/terms-of-service.html')
 def terms_of_service():
-    response = send_from_directory('static', 'terms-of-service.html')
-    response.headers['Content-Type'] = 'text/html; charset=utf-8'
-    return response
+    return html_page('terms-of-service.html')
 
 @app.route('/backoffice-coey')
 def backoffice_coey():
@@ -97,18 +149,13 @@ def backoffice_coey():
 @app.route('/api/admin/stats', methods=['GET'])
 def admin_stats():
     try:
-        all_users = User.query.all()
-        verified_users = User.query.filter_by(email_verified=True).all()
-        all_payments = Payment.query.filter_by(status='completed').all()
-        all_referrals = Referral.query.all()
-
-        total_revenue = sum(p.amount for p in all_payments)
+        totals = rollups.platform_totals()
 
         return jsonify({
-            'total_users': len(all_users),
-            'verified_users': len(verified_users),
-            'total_revenue': total_revenue,
-            'active_referrals': len(all_referrals)
+            'total_users': totals['total_users'],
+            'verified_users': User.query.filter_by(email_verified=True).count(),
+            'total_revenue': totals['total_revenue'],
+            'active_referrals': totals['active_referrals']
         })
     except Exception as e:
         return jsonify({
@@ -135,7 +182,7 @@ def claude_chat():
         return jsonify(result)
 
     except Exception as e:
-        print(f"Coey AI error: {str(e)}")
+        logger.error("Coey AI error: %s", e)
         # Intelligent fallback
         message_lower = data.get('message', '').lower()
 
@@ -154,9 +201,21 @@ def claude_chat():
 
 @app.route('/<username>')
 def affiliate_link(username):
-    user = User.query.filter_by(username=username.lower(), email_verified=True).first()
-    if user:
+    # Paths that can't be usernames (wp-login.php, .env, ...) are rejected
+    # by format, so only plausible usernames reach the resolver's cache or DB
+    if affiliate_resolver.is_affiliate(username):
+        click_recorder.record(
+            username,
+            host=request.host,
+            referer=request.referrer,
+            user_agent=request.user_agent.string,
+            ip_hash=hash_ip(client_ip(), app.config['SECRET_KEY'])
+        )
         return redirect(f'/packages?ref={username}')
+    # This catch-all outranks the static route for top-level paths, so hand
+    # real files such as dashboard.html back to it
+    if not is_username_format(username) and os.path.isfile(os.path.join(app.static_folder, username)):
+        return static_file(username)
     return redirect('/')
 
 @app.route('/api/packages', methods=['GET'])
@@ -184,9 +243,7 @@ def create_checkout_session():
 
         package = PACKAGE_PRICES[package_id]
 
-        base_url = os.getenv('REPLIT_DOMAINS', 'http://localhost:5000').split(',')[0]
-        if not base_url.startswith('http'):
-            base_url = f'https://{base_url}'
+        base_url = settings.public_base_url
 
         session = stripe.checkout.Session.create(
             payment_method_types=['card'],
@@ -241,7 +298,7 @@ def register_user():
         if User.query.filter_by(email=email).first():
             return jsonify({'error': 'Email already registered'}), 400
 
-        if not stripe.api_key:
+        if not settings.stripe_secret_key:
             return jsonify({'error': 'Payment system not configured'}), 500
 
         try:
@@ -298,33 +355,12 @@ def register_user():
         )
         db.session.add(payment)
 
-        if referrer_username:
-            referrer = User.query.filter_by(username=referrer_username.lower(), email_verified=True).first()
-            if referrer:
-                referral_count = Referral.query.filter_by(referrer_id=referrer.id).count()
-                referral_order = referral_count + 1
-
-                actual_referrer = referrer
-                pass_up = False
-
-                if referral_order == 2:
-                    site_owner = User.query.filter_by(username=SITE_OWNER_USERNAME.lower()).first()
-                    if site_owner and site_owner.id != referrer.id:
-                        actual_referrer = site_owner
-                        pass_up = True
-                        referrer.pass_up_used = True
-                        print(f"\n🎯 PASS-UP ACTIVATED: {referrer.username}'s REFERRAL #{referral_order} ({user.username}) → PASSED UP TO SITE OWNER ({SITE_OWNER_USERNAME})!\n")
-                    else:
-                        print(f"\n⚠️ PASS-UP FAILED: Site owner '{SITE_OWNER_USERNAME}' not found or referrer is owner\n")
-                else:
-                    print(f"\n✅ DIRECT REFERRAL: {referrer.username}'s REFERRAL #{referral_order} ({user.username}) → CREDITED TO {referrer.username}\n")
-
-                referral = Referral(  # type: ignore
-                    referrer_id=actual_referrer.id,
-                    referred_id=user.id,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(referral)
+        rollups.record_signup(user)
+        rollups.record_charge(user.id, payment.amount, 'package', payment.payment_date)
+
+        referral = referral_attribution.attribute(referrer_username, user)
+        if referral:
+            rollups.record_referral(referral)
 
         db.session.commit()
 
@@ -357,6 +393,7 @@ def verify_email(token):
         user.email_verified = True
         user.verified_at = datetime.utcnow()
         db.session.commit()
+        affiliate_resolver.mark_verified(user.username)
 
         return redirect('/dashboard?verified=true')
 
@@ -370,61 +407,56 @@ def verify_email(token):
 @app.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard():
     try:
-        users = User.query.filter_by(email_verified=True).all()
-
-        leaderboard_data = []
-        for user in users:
-            try:
-                referrals_count = Referral.query.filter_by(referrer_id=user.id).count()
-
-                earnings = (user.daily_rate or 0) * max(referrals_count, 1)
-
-                leaderboard_data.append({
-                    'name': user.full_name or user.username or 'Unknown',
-                    'username': user.username or 'unknown',
-                    'earnings': earnings,
-                    'referrals': referrals_count,
-                    'tier': user.package_tier or 'unknown'
-                })
-            except Exception as user_error:
-                print(f"Error processing user {getattr(user, 'id', 'unknown')}: {str(user_error)}")
-                continue
+        rows = (
+            rollups.user_stats_query()
+            .filter(User.email_verified.is_(True))
+            .order_by(db.desc('earnings'), User.id)
+            .limit(50)
+            .all()
+        )
 
-        leaderboard_data.sort(key=lambda x: x['earnings'], reverse=True)
+        leaderboard_data = [{
+            'name': user.full_name or user.username or 'Unknown',
+            'username': user.username or 'unknown',
+            'earnings': earnings,
+            'referrals': referrals_count,
+            'tier': user.package_tier or 'unknown'
+        } for user, referrals_count, earnings in rows]
 
         return jsonify({
             'success': True,
-            'leaderboard': leaderboard_data[:50]
+            'leaderboard': leaderboard_data
         })
 
     except Exception as e:
-        print(f"Leaderboard error: {str(e)}")
+        logger.exception("Leaderboard query failed")
         return jsonify({'success': True, 'leaderboard': []}), 200
 
 @app.route('/api/user/<username>', methods=['GET'])
 def get_user_stats(username):
     try:
-        user = User.query.filter_by(username=username.lower()).first()
-        if not user:
+        row = rollups.user_stats_query().filter(User.username == username.lower()).first()
+        if not row:
             return jsonify({'error': 'User not found'}), 404
+        user, referral_count, total_earnings = row
 
         if not user.email_verified:
             return jsonify({'error': 'Email not verified'}), 403
 
-        referrals = Referral.query.filter_by(referrer_id=user.id).all()
-        referral_list = []
-
-        for ref in referrals:
-            referred_user = User.query.get(ref.referred_id)
-            if referred_user:
-                referral_list.append({
-                    'username': referred_user.username,
-                    'name': referred_user.full_name,
-                    'joined': ref.created_at.isoformat(),
-                    'tier': referred_user.package_tier
-                })
-
-        total_earnings = user.daily_rate * max(len(referrals), 1)
+        referrals = (
+            db.session.query(Referral.created_at, User.username, User.full_name, User.package_tier)
+            .join(User, User.id == Referral.referred_id)
+            .filter(Referral.referrer_id == user.id)
+            .order_by(Referral.created_at)
+            .all()
+        )
+        link_clicks = db.session.query(db.func.count(AffiliateClick.id)).filter(AffiliateClick.username == user.username).scalar()
+        referral_list = [{
+            'username': referred_username,
+            'name': referred_name,
+            'joined': created_at.isoformat(),
+            'tier': referred_tier
+        } for created_at, referred_username, referred_name, referred_tier in referrals]
 
         return jsonify({
             'success': True,
@@ -437,8 +469,9 @@ def get_user_stats(username):
             'onboarding_completed': user.onboarding_completed,
             'created_at': user.created_at.isoformat(),
             'affiliate_link': f"https://sales.rizzosai.com/{user.username}",
-            'total_referrals': len(referrals),
+            'total_referrals': referral_count,
             'total_earnings': total_earnings,
+            'link_clicks': link_clicks,
             'referrals': referral_list
         })
 
@@ -462,9 +495,9 @@ def complete_onboarding(username):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/claim-domain', methods=['POST'])
+@rate_limiter.limit('claim-domain', CLAIM_DOMAIN_RATE)
 def claim_domain():
     try:
-        import requests
         data = request.json
         if not data:
             return jsonify({'error': 'Invalid request data'}), 400
@@ -474,11 +507,9 @@ def claim_domain():
         if not domain or not email:
             return jsonify({'error': 'Domain and email are required'}), 400
 
-        api_user = os.getenv('NAMECHEAP_API_USER')
-        api_key = os.getenv('NAMECHEAP_API_KEY')
-        username = os.getenv('NAMECHEAP_USERNAME')
-        forwarded_for = request.headers.get('X-Forwarded-For', request.remote_addr)
-        client_ip = (forwarded_for or '127.0.0.1').split(',')[0].strip()
+        api_user = settings.namecheap_api_user
+        api_key = settings.namecheap_api_key
+        username = settings.namecheap_username
 
         if not all([api_user, api_key, username]):
             return jsonify({'error': 'Namecheap API not configured'}), 500
@@ -488,7 +519,7 @@ def claim_domain():
             'ApiUser': api_user,
             'ApiKey': api_key,
             'UserName': username,
-            'ClientIp': client_ip,
+            'ClientIp': client_ip(),
             'Command': 'namecheap.domains.check',
             'DomainList': domain
         }
@@ -496,7 +527,6 @@ def claim_domain():
         response = requests.get(api_url, params=params, timeout=10)
 
         if response.status_code == 200:
-            import xml.etree.ElementTree as ET
             root = ET.fromstring(response.content)
 
             available = root.find(".//{http://api.namecheap.com/xml.response}DomainCheckResult")
@@ -520,14 +550,14 @@ def claim_domain():
             return jsonify({'error': 'Domain check failed. Please try again.'}), 500
 
     except Exception as e:
-        print(f"Domain claim error: {str(e)}")
+        logger.exception("Domain claim failed")
         return jsonify({'error': 'Unable to process request. Please try again later.'}), 500
 
 @app.route('/api/webhook/stripe', methods=['POST'])
 def stripe_webhook():
     payload = request.data
     sig_header = request.headers.get('Stripe-Signature')
-    webhook_secret = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+    webhook_secret = settings.stripe_webhook_secret
 
     try:
         event = stripe.Webhook.construct_event(
@@ -536,7 +566,7 @@ def stripe_webhook():
 
         if event['type'] == 'checkout.session.completed':
             session = event['data']['object']
-            print(f"Payment completed for session: {session['id']}")
+            logger.info("Checkout completed for session %s", session['id'], extra={'event': 'checkout_completed'})
 
         elif event['type'] == 'invoice.payment_succeeded':
             invoice = event['data']['object']
@@ -560,12 +590,14 @@ def stripe_webhook():
                         payment_date=datetime.utcnow()
                     )
                     db.session.add(subscription_charge)
+                    rollups.record_charge(domain_rental.user_id, subscription_charge.amount, 'subscription', subscription_charge.payment_date)
+                    rollups.record_rental_status(domain_rental.user_id, domain_rental.rental_status, 'active')
 
                     domain_rental.rental_status = 'active'
                     domain_rental.rent_expires_at = datetime.fromtimestamp(invoice['period_end'])
 
                     db.session.commit()
-                    print(f"✅ Subscription payment recorded for domain: {domain_rental.domain_name}")
+                    logger.info("Subscription payment recorded for %s", domain_rental.domain_name, extra={'event': 'subscription_paid', 'domain': domain_rental.domain_name})
 
         elif event['type'] == 'invoice.payment_failed':
             invoice = event['data']['object']
@@ -587,11 +619,13 @@ def stripe_webhook():
                         payment_date=datetime.utcnow()
                     )
                     db.session.add(subscription_charge)
+                    rollups.record_failed_charge(subscription_charge.payment_date)
+                    rollups.record_rental_status(domain_rental.user_id, domain_rental.rental_status, 'payment_failed')
 
                     domain_rental.rental_status = 'payment_failed'
 
                     db.session.commit()
-                    print(f"❌ Subscription payment FAILED for domain: {domain_rental.domain_name}")
+                    logger.warning("Subscription payment failed for %s", domain_rental.domain_name, extra={'event': 'subscription_payment_failed', 'domain': domain_rental.domain_name})
 
         elif event['type'] == 'customer.subscription.deleted':
             subscription = event['data']['object']
@@ -602,14 +636,15 @@ def stripe_webhook():
             ).first()
 
             if domain_rental:
+                rollups.record_rental_status(domain_rental.user_id, domain_rental.rental_status, 'cancelled')
                 domain_rental.rental_status = 'cancelled'
 
-                namecheap = NamecheapClient()
+                namecheap = get_namecheap_client()
                 hold_result = namecheap.hold_domain(domain_rental.domain_name)
 
                 if hold_result.get('success'):
                     domain_rental.registrar_status = 'on_hold'
-                    print(f"🔒 Domain {domain_rental.domain_name} put on hold after subscription cancellation")
+                    logger.info("Domain %s put on hold after subscription cancellation", domain_rental.domain_name, extra={'event': 'domain_on_hold', 'domain': domain_rental.domain_name})
 
                 db.session.commit()
 
@@ -617,70 +652,66 @@ def stripe_webhook():
 
     except Exception as e:
         db.session.rollback()
-        print(f"Webhook error: {str(e)}")
+        logger.warning("Stripe webhook rejected: %s", e)
         return jsonify({'error': str(e)}), 400
 
 def send_verification_email(email, full_name, username, token):
-    base_url = os.getenv('REPLIT_DOMAINS', 'http://localhost:5000').split(',')[0]
-    if not base_url.startswith('http'):
-        base_url = f'https://{base_url}'
+    base_url = settings.public_base_url
 
     verification_url = f"{base_url}/api/verify-email/{token}"
 
-    print(f"\n{'='*60}")
-    print(f"VERIFICATION EMAIL FOR: {email}")
-    print(f"Name: {full_name}")
-    print(f"Username: {username}")
-    print(f"Verification URL: {verification_url}")
-    print(f"{'='*60}\n")
+    logger.info("Verification email for %s", email, extra={
+        'event': 'verification_email', 'email': email, 'full_name': full_name,
+        'username': username, 'verification_url': verification_url,
+    })
+
+WELCOME_EMAIL_TEMPLATE = """Subject: Welcome! Your Domain {domain_name} is Ready 🚀
+
+Hi {full_name},
+
+Congratulations! Your domain {domain_name} has been successfully registered
+and your 7-Day Freedom Pass is now ACTIVE!
+
+YOUR ACCOUNT DETAILS:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✓ Email: {email}
+✓ Username: {username}
+✓ Domain: {domain_name}
+✓ Dashboard: {dashboard_url}
+✓ Your Affiliate Link: {affiliate_url}
+
+WHAT'S NEXT:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+1. Access your dashboard: {dashboard_url}
+2. Share your affiliate link to start earning: {affiliate_url}
+3. Every referral pays you $20/day!
+4. Your daily $20 rental subscription is now active
+
+IMPORTANT:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+• Your 7-Day Freedom Pass gives you full access
+• Domain rental: $20/day (billed daily)
+• Refer others and they pay YOUR rental fees!
+
+Questions? Reply to this email or contact support.
+
+Welcome to RizzosAI! 🎯"""
 
 def send_domain_welcome_email(email, full_name, domain_name, username):
-    base_url = os.getenv('REPLIT_DOMAINS', 'http://localhost:5000').split(',')[0]
-    if not base_url.startswith('http'):
-        base_url = f'https://{base_url}'
+    base_url = settings.public_base_url
 
     dashboard_url = f"{base_url}/dashboard"
     affiliate_url = f"https://sales.rizzosai.com/{username}"
 
-    print(f"\n{'='*80}")
-    print(f"🎉 DOMAIN REGISTRATION SUCCESS - WELCOME EMAIL")
-    print(f"{'='*80}")
-    print(f"TO: {email}")
-    print(f"NAME: {full_name}")
-    print(f"DOMAIN: {domain_name}")
-    print(f"")
-    print(f"Subject: Welcome! Your Domain {domain_name} is Ready 🚀")
-    print(f"")
-    print(f"Hi {full_name},")
-    print(f"")
-    print(f"Congratulations! Your domain {domain_name} has been successfully registered")
-    print(f"and your 7-Day Freedom Pass is now ACTIVE!")
-    print(f"")
-    print(f"YOUR ACCOUNT DETAILS:")
-    print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    print(f"✓ Email: {email}")
-    print(f"✓ Username: {username}")
-    print(f"✓ Domain: {domain_name}")
-    print(f"✓ Dashboard: {dashboard_url}")
-    print(f"✓ Your Affiliate Link: {affiliate_url}")
-    print(f"")
-    print(f"WHAT'S NEXT:")
-    print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    print(f"1. Access your dashboard: {dashboard_url}")
-    print(f"2. Share your affiliate link to start earning: {affiliate_url}")
-    print(f"3. Every referral pays you $20/day!")
-    print(f"4. Your daily $20 rental subscription is now active")
-    print(f"")
-    print(f"IMPORTANT:")
-    print(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    print(f"• Your 7-Day Freedom Pass gives you full access")
-    print(f"• Domain rental: $20/day (billed daily)")
-    print(f"• Refer others and they pay YOUR rental fees!")
-    print(f"")
-    print(f"Questions? Reply to this email or contact support.")
-    print(f"")
-    print(f"Welcome to RizzosAI! 🎯")
-    print(f"{'='*80}\n")
+    logger.info("Domain welcome email for %s (%s)", email, domain_name, extra={
+        'event': 'domain_welcome_email', 'email': email, 'username': username,
+        'domain': domain_name, 'dashboard_url': dashboard_url, 'affiliate_url': affiliate_url,
+    })
+    # The full body is only rendered when debug output is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Domain welcome email body:\n%s", WELCOME_EMAIL_TEMPLATE.format(
+            email=email, full_name=full_name, domain_name=domain_name, username=username,
+            dashboard_url=dashboard_url, affiliate_url=affiliate_url))
 
 # Admin routes
 @app.route('/domain-setup-guide.html')
@@ -704,8 +735,8 @@ def admin_login():
     username = data.get('username')
     password = data.get('password')
 
-    admin_username = os.getenv('ADMIN_USERNAME', 'admin')
-    admin_password = os.getenv('ADMIN_PASSWORD', 'rizzosai2025')
+    admin_username = settings.admin_username
+    admin_password = settings.admin_password
 
     if username == admin_username and password == admin_password:
         token = serializer.dumps({'admin': True, 'username': username})
@@ -714,42 +745,20 @@ def admin_login():
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @app.route('/api/admin/dashboard', methods=['GET'])
+@admin_auth.required
 def get_admin_dashboard():
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Unauthorized'}), 401
-
-    token = auth_header.split(' ')[1]
-    try:
-        data = serializer.loads(token, max_age=86400)  # 24 hour expiry
-        if not data.get('admin'):
-            return jsonify({'error': 'Unauthorized'}), 401
-    except (BadSignature, SignatureExpired):
-        return jsonify({'error': 'Invalid or expired token'}), 401
-
-    all_users = User.query.order_by(User.created_at.desc()).all()
-    verified_users = User.query.filter_by(email_verified=True).all()
-    all_payments = Payment.query.filter_by(status='completed').all()
-    all_referrals = Referral.query.all()
-    recent_signups = User.query.order_by(User.created_at.desc()).limit(10).all()
-
-    total_revenue = sum(p.amount for p in all_payments)
+    user_rows = rollups.user_stats_query().order_by(User.created_at.desc()).all()
+    totals = rollups.platform_totals()
 
     users_data = []
-    for user in all_users:
-        referrals = Referral.query.filter_by(referrer_id=user.id).all()
-        referred_users = [User.query.get(r.referred_id) for r in referrals if User.query.get(r.referred_id)]
-        referrals_earning = [r for r in referred_users if r and not r.pass_up_used]
-
-        total_earnings = len(referrals_earning) * user.daily_rate
-
+    for user, referral_count, total_earnings in user_rows:
         users_data.append({
             'username': user.username,
             'email': user.email,
             'domain_name': user.domain_name,
             'package_tier': user.package_tier,
             'daily_rate': user.daily_rate,
-            'referral_count': len(referrals),
+            'referral_count': referral_count,
             'total_earnings': total_earnings,
             'email_verified': user.email_verified,
             'created_at': user.created_at.isoformat()
@@ -759,65 +768,71 @@ def get_admin_dashboard():
         'username': user.username,
         'package_tier': user.package_tier,
         'created_at': user.created_at.isoformat()
-    } for user in recent_signups]
+    } for user, _, _ in user_rows[:10]]
 
     return jsonify({
         'stats': {
-            'total_users': len(all_users),
-            'verified_users': len(verified_users),
-            'total_revenue': total_revenue,
-            'active_referrals': len(all_referrals)
+            'total_users': totals['total_users'],
+            'verified_users': sum(1 for user, _, _ in user_rows if user.email_verified),
+            'total_revenue': totals['total_revenue'],
+            'active_referrals': totals['active_referrals'],
+            'domain_revenue': totals['domain_revenue'],
+            'subscription_revenue': totals['subscription_revenue'],
+            'active_rentals': totals['active_rentals']
         },
         'users': users_data,
         'recent_signups': recent_signups_data
     })
 
-@app.route('/api/admin/ai-insights', methods=['POST'])
-def get_ai_insights():
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Unauthorized'}), 401
-
-    token = auth_header.split(' ')[1]
-    try:
-        data = serializer.loads(token, max_age=86400)  # 24 hour expiry
-        if not data.get('admin'):
-            return jsonify({'error': 'Unauthorized'}), 401
-    except (BadSignature, SignatureExpired):
-        return jsonify({'error': 'Invalid or expired token'}), 401
+@app.route('/api/admin/export/<dataset>', methods=['GET'])
+@admin_auth.required
+def export_admin_data(dataset):
+    if dataset not in EXPORT_DATASETS:
+        return jsonify({'error': f"Unknown dataset. Choose from: {', '.join(EXPORT_DATASETS)}"}), 404
+
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    use_gzip = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    # Without ?gzip the download is still gzip-encoded in transit when the client accepts it
+    transfer_gzip = not use_gzip and choose_encoding(request.headers.get('Accept-Encoding'), ('gzip',)) == 'gzip'
+    body, content_type, filename = export_stream(dataset, fmt=fmt, gzip=use_gzip, content_encoding=transfer_gzip)
+    response = Response(stream_with_context(body), content_type=content_type)
+    if transfer_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
+@app.route('/api/admin/analytics', methods=['GET'])
+@admin_auth.required
+def admin_analytics():
+    granularity = request.args.get('granularity', 'day').lower()
+    metrics = [m.strip() for m in request.args.get('metrics', 'signups,clicks,conversions,revenue').split(',') if m.strip()]
     try:
-        from openai import OpenAI
-        # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
-        # do not change this unless explicitly requested by the user
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-        data = request.json
-        if not data:
-            return jsonify({'error': 'Invalid request data'}), 400
-        stats = data.get('stats', {})
-
-        prompt = f"""As a business analyst, provide brief insights (2-3 sentences) for this affiliate marketing platform:
-
-Total Users: {stats.get('total_users', 0)}
-Verified Users: {stats.get('verified_users', 0)}
-Total Revenue: ${stats.get('total_revenue', 0)}
-Active Referrals: {stats.get('active_referrals', 0)}
-
-Focus on growth trends, conversion rates, and actionable recommendations."""
-
-        response = client.chat.completions.create(
-            model="gpt-5",
-            messages=[
-                {"role": "system", "content": "You are a business intelligence assistant providing concise, actionable insights."},
-                {"role": "user", "content": prompt}
-            ],
-            max_completion_tokens=200
-        )
+        now = datetime.utcnow()
+        if request.args.get('start'):
+            start = datetime.fromisoformat(request.args['start'])
+        else:
+            default_days = 2 if granularity == 'hour' else 30
+            start = now - timedelta(days=int(request.args.get('days', default_days)))
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else now
+        result = time_series.series(metrics, granularity, start, end, now=now)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        insights = response.choices[0].message.content
-        return jsonify({'insights': insights})
+    return jsonify(dict(result, success=True))
 
+@app.route('/api/admin/ai-insights', methods=['GET', 'POST'])
+@admin_auth.required
+def get_ai_insights():
+    try:
+        # Stats are computed server-side; anything the browser posts is ignored
+        force = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        return jsonify(public_result(insights_service.get(force=force)))
     except Exception as e:
         return jsonify({'insights': f'AI insights temporarily unavailable. Error: {str(e)}'})
 
@@ -826,32 +841,22 @@ def admin_panel():
     return send_from_directory('static', 'admin-panel.html')
 
 @app.route('/api/admin/chat', methods=['POST'])
+@admin_auth.required
 def admin_chat():
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Unauthorized'}), 401
-
-    token = auth_header.split(' ')[1]
-    try:
-        token_data = serializer.loads(token, max_age=86400)
-        if not token_data.get('admin'):
-            return jsonify({'error': 'Unauthorized'}), 401
-    except (BadSignature, SignatureExpired):
-        return jsonify({'error': 'Unauthorized'}), 401
-
     try:
         data = request.json
         if not data:
             return jsonify({'error': 'Invalid request data'}), 400
         user_message = data.get('message', '').strip()
         conversation_history = data.get('conversation_history', [])
+        include_metrics = bool(data.get('metrics', False))
 
         if not user_message:
             return jsonify({'error': 'Message is required'}), 400
 
         def generate():
             try:
-                for chunk in process_admin_command_streaming(user_message, conversation_history):
+                for chunk in admin_ai_bot.process_admin_command_streaming(user_message, conversation_history, include_metrics=include_metrics):
                     yield f"data: {json.dumps(chunk)}\n\n"
             except Exception as e:
                 yield f"data: {json.dumps({'error': str(e)})}\n\n"
@@ -860,27 +865,37 @@ def admin_chat():
     except Exception as e:
         return jsonify({'error': f'Failed to process command: {str(e)}'}), 500
 
+@app.route('/api/admin/metrics', methods=['GET'])
+@admin_auth.required
+def admin_chat_metrics():
+    return jsonify(dict(admin_trace_aggregator.snapshot(), auth=admin_auth.snapshot()))
+
+@app.route('/api/admin/db-metrics', methods=['GET'])
+@admin_auth.required
+def admin_db_metrics():
+    return jsonify(dict(
+        pool_metrics.snapshot(db.engine),
+        affiliate_resolver=affiliate_resolver.snapshot(),
+        click_recorder=click_recorder.snapshot(),
+        rate_limiter=rate_limiter.snapshot(),
+        logging=log_pipeline.snapshot()
+    ))
+
+@app.route('/api/admin/slow-requests', methods=['GET'])
+@admin_auth.required
+def admin_slow_requests():
+    return jsonify(dict(request_profiler.snapshot(), recent=request_profiler.slow_request_log()))
+
 @app.route('/api/admin/status', methods=['GET'])
+@admin_auth.required
 def admin_status():
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return jsonify({'error': 'Unauthorized'}), 401
-
-    token = auth_header.split(' ')[1]
-    try:
-        token_data = serializer.loads(token, max_age=86400)
-        if not token_data.get('admin'):
-            return jsonify({'error': 'Unauthorized'}), 401
-    except (BadSignature, SignatureExpired):
-        return jsonify({'error': 'Invalid or expired token'}), 401
-
-    render_configured = bool(os.getenv('RENDER_API_KEY'))
-    namecheap_configured = bool(os.getenv('NAMECHEAP_API_KEY') and os.getenv('NAMECHEAP_API_USER'))
+    render_configured = bool(settings.render_api_key)
+    namecheap_configured = settings.namecheap_configured
 
     return jsonify({
         'render_configured': render_configured,
         'namecheap_configured': namecheap_configured,
-        'openai_configured': bool(os.getenv('OPENAI_API_KEY'))
+        'openai_configured': bool(settings.openai_api_key)
     })
 
 @app.route('/api/capture-email', methods=['POST'])
@@ -934,6 +949,7 @@ def submit_domain():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/check-domain-availability', methods=['POST'])
+@rate_limiter.limit('check-domain-availability', DOMAIN_AVAILABILITY_RATE)
 def check_domain_availability():
     try:
         data = request.json
@@ -955,7 +971,7 @@ def check_domain_availability():
                 'message': f'{domain} is already registered in our system'
             })
 
-        namecheap = NamecheapClient()
+        namecheap = get_namecheap_client()
         check_result = namecheap.check_domain_availability(domain)
 
         if not check_result.get('success'):
@@ -979,6 +995,7 @@ def check_domain_availability():
         }), 500
 
 @app.route('/api/create-domain-checkout', methods=['POST'])
+@rate_limiter.limit('create-domain-checkout', DOMAIN_CHECKOUT_RATE)
 def create_domain_checkout():
     try:
         data = request.json
@@ -1001,7 +1018,7 @@ def create_domain_checkout():
                 'error': f'{domain} is already registered in our system'
             }), 400
 
-        namecheap = NamecheapClient()
+        namecheap = get_namecheap_client()
         check_result = namecheap.check_domain_availability(domain)
 
         if not check_result.get('success') or not check_result.get('available'):
@@ -1009,9 +1026,7 @@ def create_domain_checkout():
                 'error': f'{domain} is not available for registration'
             }), 400
 
-        base_url = os.getenv('REPLIT_DOMAINS', 'http://localhost:5000').split(',')[0]
-        if not base_url.startswith('http'):
-            base_url = f'https://{base_url}'
+        base_url = settings.public_base_url
 
         checkout_session = stripe.checkout.Session.create(
             payment_method_types=['card'],
@@ -1078,7 +1093,7 @@ def process_domain_payment():
         if not domain_name or not email or not full_name:
             return jsonify({'error': 'Missing payment metadata'}), 400
 
-        namecheap = NamecheapClient()
+        namecheap = get_namecheap_client()
 
         check_result = opensrs.check_domain_availability(domain_name)
         if not check_result.get('success') or not check_result.get('available'):
@@ -1109,40 +1124,11 @@ def process_domain_payment():
             )
             db.session.add(user)
             db.session.flush()
+            rollups.record_signup(user)
 
-        if referrer_username:
-            referrer = User.query.filter_by(username=referrer_username.lower(), email_verified=True).first()
-            if referrer:
-                referral_count = Referral.query.filter_by(referrer_id=referrer.id).count()
-                referral_order = referral_count + 1
-
-                actual_referrer = referrer
-                passed_up = False
-                pass_up_recipient_id = None
-
-                if referral_order == 2:
-                    site_owner = User.query.filter_by(username=SITE_OWNER_USERNAME.lower()).first()
-                    if site_owner and site_owner.id != referrer.id:
-                        actual_referrer = site_owner
-                        passed_up = True
-                        pass_up_recipient_id = site_owner.id
-                        referrer.pass_up_used = True
-                        print(f"\n🎯 DOMAIN RENTAL PASS-UP: {referrer.username}'s REFERRAL #{referral_order} ({user.username}) → PASSED UP TO {SITE_OWNER_USERNAME}!\n")
-                    else:
-                        print(f"\n⚠️ PASS-UP FAILED: Site owner '{SITE_OWNER_USERNAME}' not found or referrer is owner\n")
-                else:
-                    print(f"\n✅ DOMAIN RENTAL REFERRAL: {referrer.username}'s REFERRAL #{referral_order} ({user.username}) → CREDITED TO {referrer.username}\n")
-
-                referral = Referral(  # type: ignore
-                    referrer_id=actual_referrer.id,
-                    referred_id=user.id,
-                    referral_order=referral_order,
-                    passed_up=passed_up,
-                    pass_up_recipient=pass_up_recipient_id,
-                    commission_amount=20.00,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(referral)
+        referral = referral_attribution.attribute(referrer_username, user, commission_amount=20.00, label='DOMAIN RENTAL REFERRAL')
+        if referral:
+            rollups.record_referral(referral)
 
         payment_charge = PaymentCharge(  # type: ignore
             user_id=user.id,
@@ -1154,6 +1140,7 @@ def process_domain_payment():
             payment_date=datetime.utcnow()
         )
         db.session.add(payment_charge)
+        rollups.record_charge(user.id, payment_charge.amount, 'domain', payment_charge.payment_date)
 
         subscription = stripe.Subscription.create(
             customer=str(stripe_session.customer) if stripe_session.customer else '',
@@ -1185,14 +1172,16 @@ def process_domain_payment():
             created_at=datetime.utcnow()
         )
         db.session.add(domain_rental)
+        rollups.record_rental_status(user.id, None, domain_rental.rental_status, domain_rental.rent_started_at)
 
-        promotion_end = os.getenv('PROMOTION_END_DATE')
+        promotion_end = settings.promotion_end_date
         if promotion_end:
             user.freedom_pass_expires = datetime.fromisoformat(promotion_end)
         else:
             user.freedom_pass_expires = datetime.utcnow() + timedelta(days=7)
 
         db.session.commit()
+        affiliate_resolver.mark_verified(user.username)
 
         send_domain_welcome_email(email, full_name, domain_name, user.username)
 
@@ -1211,13 +1200,14 @@ def process_domain_payment():
 @app.route('/api/live-signups', methods=['GET'])
 def live_signups():
     try:
+        now = datetime.utcnow()
         recent_users = User.query.filter(
-            User.created_at >= datetime.utcnow() - timedelta(hours=24)
+            User.created_at >= now - timedelta(hours=24)
         ).order_by(User.created_at.desc()).limit(10).all()
 
         signups = []
         for user in recent_users:
-            time_ago = datetime.utcnow() - user.created_at
+            time_ago = now - user.created_at
             minutes_ago = int(time_ago.total_seconds() / 60)
 
             if minutes_ago < 1:
@@ -1235,10 +1225,12 @@ def live_signups():
                 'package': user.package_tier.capitalize()
             })
 
-        total_24h = len(recent_users)
-        total_7d = User.query.filter(
-            User.created_at >= datetime.utcnow() - timedelta(days=7)
-        ).count()
+        # Hourly buckets: closed hours come from cache, only the
+        # current hour is counted again on each poll
+        buckets, values, _ = time_series.buckets('signups', 'hour', now - timedelta(days=7), now, now=now)
+        hourly = [values[bucket].get('signups', 0) for bucket in buckets]
+        total_24h = sum(hourly[-24:])
+        total_7d = sum(hourly)
 
         return jsonify({
             'signups': signups,
@@ -1251,7 +1243,7 @@ def live_signups():
 @app.route('/api/promotion-config', methods=['GET'])
 def promotion_config():
     try:
-        promotion_end = os.getenv('PROMOTION_END_DATE')
+        promotion_end = settings.promotion_end_date
 
         if not promotion_end:
             default_end = datetime.utcnow() + timedelta(days=7)
@@ -1266,7 +1258,104 @@ def promotion_config():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# The revision that describes the schema of pre-migration databases, and its tables
+INITIAL_REVISION = '3a422a79c550'
+LEGACY_TABLES = ('users', 'payments', 'referrals', 'domain_rentals', 'payment_charges', 'subscription_charges',
+                 'env_vault', 'email_leads', 'user_stats', 'daily_rollups')
+
+@app.cli.command('bootstrap-db')
+@click.pass_context
+def bootstrap_db(ctx):
+    """Create or upgrade the schema; run once per deploy before starting workers"""
+    tables = set(db.inspect(db.engine).get_table_names())
+    if 'alembic_version' in tables or 'users' not in tables:
+        migrate_upgrade()
+        print("Schema is at the latest migration")
+        return
+
+    # Databases created by the old import-time create_all(): bring them up to
+    # the initial migration's schema, stamp them at that revision and let the
+    # later migrations run. The missing baseline tables come from the current
+    # models, so this holds only while no later migration alters one of
+    # LEGACY_TABLES; a migration that does must also change this path.
+    db.metadata.create_all(db.engine, tables=[db.metadata.tables[name] for name in LEGACY_TABLES])
+    columns = [c['name'] for c in db.inspect(db.engine).get_columns('users')]
+    if 'referral_counter' not in columns:
+        ctx.invoke(init_referral_counters)
+    migrate_stamp(revision=INITIAL_REVISION)
+    migrate_upgrade()
+    # After the upgrade: some of these indexes are on tables later migrations create
+    ensure_analytics_indexes()
+    print("Adopted existing schema into migrations. Run 'flask rebuild-rollups' if dashboard totals are empty.")
+
+@app.cli.command('init-referral-counters')
+def init_referral_counters():
+    """Add users.referral_counter if missing and backfill it from existing referrals"""
+    columns = [c['name'] for c in db.inspect(db.engine).get_columns('users')]
+    if 'referral_counter' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(db.text('ALTER TABLE users ADD COLUMN referral_counter INTEGER NOT NULL DEFAULT 0'))
+        print("Added users.referral_counter")
+
+    # Passed-up referrals are credited to the site owner, so the referrer's own
+    # rows undercount by one whenever their pass-up has been used.
+    direct_counts = dict(
+        db.session.query(Referral.referrer_id, db.func.count(Referral.id))
+        .filter(db.or_(Referral.passed_up.is_(False), Referral.passed_up.is_(None)))
+        .group_by(Referral.referrer_id)
+        .all()
+    )
+    updated = 0
+    for user_id, pass_up_used in db.session.query(User.id, User.pass_up_used).all():
+        counter = direct_counts.get(user_id, 0) + (1 if pass_up_used else 0)
+        db.session.execute(db.update(User).where(User.id == user_id).values(referral_counter=counter))
+        updated += 1
+    db.session.commit()
+    print(f"Backfilled referral_counter for {updated} users")
+
+@app.cli.command('create-analytics-indexes')
+def create_analytics_indexes_command():
+    """Add the created_at / payment_date indexes used by analytics to existing tables"""
+    for name in ensure_analytics_indexes():
+        print(f"Index ready: {name}")
+
+@app.cli.command('compress-static')
+def compress_static_command():
+    """Write .gz/.br variants of static text assets; run at build time"""
+    stats = precompress_static(app.static_folder)
+    sizes = ', '.join(f"{encoding}: {size:,} bytes" for encoding, size in stats['compressed_bytes'].items())
+    print(f"Precompressed {stats['files']} files ({stats['written']} written, {stats['skipped']} up to date); "
+          f"{stats['original_bytes']:,} bytes -> {sizes}")
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute user_stats and daily_rollups from payments, charges, referrals and rentals"""
+    result = rollups.rebuild_rollups()
+    print(f"Rebuilt rollups for {result['users']} users across {result['days']} days")
+
+@app.cli.command('import-data')
+@click.argument('model', type=click.Choice(list(IMPORT_MODELS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Input format (default: from file extension)')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per insert batch and transaction')
+@click.option('--checkpoint', 'checkpoint_name', help="Checkpoint name (default: PATH's absolute path)")
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first row')
+def import_data(model, path, fmt, chunk_size, checkpoint_name, restart):
+    """Bulk load users, payments, referrals, domain_rentals or email_leads from CSV/JSONL.
+
+    User rows may carry a 'referrer' column, which is attributed in bulk with the
+    pass-up rule. Other models may use 'username' (or referrer_username /
+    referred_username) in place of numeric user ids.
+    """
+    importer = BulkImporter(model, attribution=referral_attribution, chunk_size=chunk_size, echo=click.echo)
+    try:
+        summary = importer.run(path, fmt=fmt, checkpoint_name=checkpoint_name, resume=not restart)
+    except BulkImportError as e:
+        raise click.ClickException(f"{e}. Re-run the same command to resume from the last checkpoint.")
+    click.echo(f"Loaded {summary['rows_loaded']} {model} rows in {summary['seconds']}s "
+               f"({summary['rows_per_second']:,.0f} rows/s), {summary['referrals_attributed']} referrals attributed")
+    click.echo("Run 'flask rebuild-rollups' once all files are loaded to refresh dashboard totals.")
+
 if __name__ == '__main__':
-    import os
-    debug_mode = os.getenv('FLASK_ENV') == 'development'
-    app.run(host='0.0.0.0', port=5000, debug=debug_mode)
+    insights_service.start_background_refresh(app)
+    app.run(host='0.0.0.0', port=5000, debug=settings.flask_debug)
@@ -0,0 +1,227 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import namedtuple
+from flask import Response
+from compression import available_encodings, choose_encoding, compress
+from settings import settings
+
+ASSET_DIRS = ('css', 'js', 'images')
+ASSET_URL_PREFIX = '/assets'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+HASH_LENGTH = 12
+PAGE_REVALIDATE_SECONDS = settings.page_revalidate_seconds
+
+NO_STORE_HEADERS = {
+    'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+}
+
+# src="..." / href="..." attributes and url(...) references in HTML
+ATTRIBUTE_REF = re.compile(r'''(\b(?:src|href)\s*=\s*)(["'])([^"'#?]+)([^"']*)\2''', re.IGNORECASE)
+CSS_URL_REF = re.compile(r'''(url\(\s*)(["']?)([^"')#?]+)([^"')]*)\2(\s*\))''', re.IGNORECASE)
+
+
+class AssetManifest:
+    """Content-hashed URLs for files under static/css, static/js and static/images.
+
+    Each asset is hashed the first time it is referenced and re-hashed only when
+    its mtime or size changes, so edits made while the app is running (e.g. by
+    the admin bot) get a new URL immediately. HTML pages are rewritten to point
+    at the hashed URLs and the result is cached until the page or any asset it
+    references changes.
+    """
+
+    def __init__(self, static_dir, asset_dirs=ASSET_DIRS, url_prefix=ASSET_URL_PREFIX):
+        self.static_dir = os.path.abspath(static_dir)
+        self.asset_dirs = tuple(asset_dirs)
+        self.url_prefix = url_prefix.rstrip('/')
+        self._lock = threading.Lock()
+        self._assets = {}   # logical path -> (stat key, hashed path)
+        self._hashed = {}   # hashed path -> logical path
+        self._pages = {}    # html filename -> (stat key, asset keys, html)
+
+    def _full_path(self, logical_path):
+        return os.path.join(self.static_dir, *logical_path.split('/'))
+
+    @staticmethod
+    def _stat_key(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _normalize(self, reference):
+        path = reference.strip()
+        if '://' in path or path.startswith('//') or path.startswith('data:'):
+            return None
+        path = path.lstrip('/')
+        if path.startswith('./'):
+            path = path[2:]
+        if '..' in path.split('/') or path.split('/', 1)[0] not in self.asset_dirs:
+            return None
+        return path
+
+    def hashed_path(self, logical_path):
+        """Return e.g. css/style.1a2b3c4d5e6f.css, or None if the asset doesn't exist"""
+        full_path = self._full_path(logical_path)
+        try:
+            key = self._stat_key(full_path)
+        except OSError:
+            return None
+
+        entry = self._assets.get(logical_path)
+        if entry and entry[0] == key:
+            return entry[1]
+
+        digest = hashlib.sha256()
+        with open(full_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+        stem, ext = os.path.splitext(logical_path)
+        hashed = f"{stem}.{digest.hexdigest()[:HASH_LENGTH]}{ext}"
+
+        with self._lock:
+            previous = self._assets.get(logical_path)
+            if previous:
+                self._hashed.pop(previous[1], None)
+            self._assets[logical_path] = (key, hashed)
+            self._hashed[hashed] = logical_path
+        return hashed
+
+    def url(self, logical_path):
+        hashed = self.hashed_path(logical_path)
+        return f"{self.url_prefix}/{hashed}" if hashed else None
+
+    def resolve(self, hashed_path):
+        """Map a hashed path back to its logical path, or None if it is stale or unknown"""
+        logical_path = self._hashed.get(hashed_path)
+        if logical_path is None:
+            # Another worker may have handed out this URL; hash the candidate
+            stem, ext = os.path.splitext(hashed_path)
+            base, _, digest = stem.rpartition('.')
+            if not base or len(digest) != HASH_LENGTH:
+                return None
+            logical_path = self._normalize(base + ext)
+            if logical_path is None:
+                return None
+        if self.hashed_path(logical_path) != hashed_path:
+            return None
+        return logical_path
+
+    def _rewrite(self, html):
+        used = []
+
+        def hashed_url(reference):
+            logical_path = self._normalize(reference)
+            url = self.url(logical_path) if logical_path else None
+            if url:
+                used.append(logical_path)
+            return url
+
+        def attribute(match):
+            url = hashed_url(match.group(3))
+            if url is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{url}{match.group(4)}{match.group(2)}"
+
+        def css_url(match):
+            url = hashed_url(match.group(3))
+            if url is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{url}{match.group(4)}{match.group(2)}{match.group(5)}"
+
+        html = ATTRIBUTE_REF.sub(attribute, html)
+        html = CSS_URL_REF.sub(css_url, html)
+        return html, used
+
+    def render_page(self, filename):
+        """Return the HTML page with asset references pointing at hashed URLs"""
+        full_path = os.path.join(self.static_dir, filename)
+        key = self._stat_key(full_path)
+        cached = self._pages.get(filename)
+        if cached and cached[0] == key and all(self.hashed_path(p) == h for p, h in cached[1]):
+            return cached[2]
+
+        with open(full_path, 'r', encoding='utf-8') as f:
+            html, used = self._rewrite(f.read())
+        asset_keys = tuple((p, self.hashed_path(p)) for p in dict.fromkeys(used))
+        with self._lock:
+            self._pages[filename] = (key, asset_keys, html)
+        return html
+
+    def page_is_current(self, filename, stat_key, asset_keys):
+        try:
+            if self._stat_key(os.path.join(self.static_dir, filename)) != stat_key:
+                return False
+        except OSError:
+            return False
+        return all(self.hashed_path(p) == h for p, h in asset_keys)
+
+    def page_entry(self, filename):
+        """Render filename and return (html, stat key, asset keys) for callers that cache it"""
+        html = self.render_page(filename)
+        key, asset_keys, _ = self._pages[filename]
+        return html, key, asset_keys
+
+
+CachedPage = namedtuple('CachedPage', ['bodies', 'stat_key', 'asset_keys', 'checked_at'])
+
+
+class PageCache:
+    """Rendered HTML shells held in memory as raw and precompressed bytes.
+
+    Pages are loaded at startup and served without touching the filesystem.
+    Every PAGE_REVALIDATE_SECONDS a request stats the page and its assets
+    and reloads it if anything changed, so edits still show up within
+    seconds.
+    """
+
+    def __init__(self, manifest, revalidate_seconds=PAGE_REVALIDATE_SECONDS):
+        self.manifest = manifest
+        self.revalidate_seconds = revalidate_seconds
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def _load(self, filename):
+        html, stat_key, asset_keys = self.manifest.page_entry(filename)
+        raw = html.encode('utf-8')
+        bodies = {None: raw}
+        for encoding in available_encodings():
+            bodies[encoding] = compress(raw, encoding, level=9)
+        page = CachedPage(bodies, stat_key, asset_keys, time.monotonic())
+        with self._lock:
+            self._pages[filename] = page
+        return page
+
+    def preload(self, filenames):
+        for filename in filenames:
+            try:
+                self._load(filename)
+            except FileNotFoundError:
+                pass
+
+    def get(self, filename):
+        page = self._pages.get(filename)
+        if page is None:
+            return self._load(filename)
+        now = time.monotonic()
+        if now - page.checked_at < self.revalidate_seconds:
+            return page
+        if self.manifest.page_is_current(filename, page.stat_key, page.asset_keys):
+            page = page._replace(checked_at=now)
+            with self._lock:
+                self._pages[filename] = page
+            return page
+        return self._load(filename)
+
+    def response(self, filename, accept_encoding=None):
+        """Build a no-store HTML response in the best encoding the client accepts"""
+        page = self.get(filename)
+        encoding = choose_encoding(accept_encoding)
+        response = Response(page.bodies[encoding], content_type='text/html; charset=utf-8', headers=NO_STORE_HEADERS)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,209 @@
+"""In-process benchmarks for response compression and the landing page cache,
+plus a worker boot benchmark.
+
+    python benchmark.py compression            # bytes and CPU per request, by Accept-Encoding
+    python benchmark.py compression -u 2000 -n 100
+    python benchmark.py pages                  # req/s for each way of serving an HTML shell
+    python benchmark.py boot -p 16             # 16 workers importing app, with/without create_all()
+
+Requests go through the Flask test client against a throwaway SQLite
+database seeded with synthetic users, so the numbers isolate the app's own
+work (rendering, querying, compressing) from the network and the WSGI
+server; use loadtest.py for end-to-end throughput under gunicorn. CPU is
+process time per request, which includes the test client's share; compare
+rows within one run rather than across machines.
+
+`boot` is the exception: it starts fresh interpreters side by side, the way
+gunicorn brings up its workers, against a SQLite file bootstrapped with
+`flask bootstrap-db` and, when TEST_DATABASE_URL points at PostgreSQL,
+against that server too.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+
+import click
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_app(users):
+    """Import the app against a fresh SQLite database holding `users` synthetic users"""
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.insert(0, BASE_DIR)
+    from app import app, serializer
+    from models import db, User
+    import rollups
+
+    with app.app_context():
+        db.create_all()
+        if users:
+            db.session.execute(db.insert(User.__table__), [
+                {'username': f"bench{i}", 'email': f"bench{i}@example.com", 'full_name': f"Bench User {i}",
+                 'package_tier': ('basic', 'pro', 'elite')[i % 3], 'daily_rate': 1.0, 'email_verified': True,
+                 'referral_counter': i % 13}
+                for i in range(users)
+            ])
+            db.session.commit()
+        rollups.rebuild_rollups()
+    return app, {'Authorization': f"Bearer {serializer.dumps({'admin': True})}"}
+
+
+def measure(client, path, headers, requests_per_case):
+    """Return (bytes per response, CPU ms per request, requests per second)"""
+    client.get(path, headers=headers)  # warm caches and lazy imports
+    body_bytes = 0
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(requests_per_case):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, f"{path}: HTTP {response.status_code}"
+        body_bytes = len(response.get_data())
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    return body_bytes, cpu * 1000 / requests_per_case, requests_per_case / wall
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option('--users', '-u', default=400, show_default=True, help='Synthetic users in the database')
+@click.option('--requests', '-n', 'requests_per_case', default=50, show_default=True,
+              help='Requests per endpoint and encoding')
+def compression(users, requests_per_case):
+    """Bytes and CPU per request for each endpoint, uncompressed vs compressed"""
+    app, admin_headers = load_app(users)
+    from compression import available_encodings, precompress_static
+
+    # The build step: .gz/.br siblings for the static files
+    precompress_static(app.static_folder)
+    endpoints = [
+        ('/api/admin/dashboard', admin_headers),
+        ('/api/leaderboard', {}),
+        ('/packages', {}),
+        ('/css/style.css', {}),
+        ('/api/admin/export/users?format=jsonl', admin_headers),
+    ]
+    encodings = ['identity', *available_encodings()]
+    client = app.test_client()
+
+    click.echo(f"{users} users, {requests_per_case} requests per row")
+    click.echo(f"{'endpoint':<40}{'encoding':>10}{'bytes':>10}{'CPU ms/req':>12}")
+    for path, headers in endpoints:
+        for encoding in encodings:
+            body_bytes, cpu_ms, _ = measure(client, path, dict(headers, **{'Accept-Encoding': encoding}),
+                                            requests_per_case)
+            click.echo(f"{path:<40}{encoding:>10}{body_bytes:>10,}{cpu_ms:>12.2f}")
+
+
+@cli.command()
+@click.option('--page', default='packages.html', show_default=True, help='HTML shell in static/ to serve')
+@click.option('--requests', '-n', 'requests_per_case', default=2000, show_default=True,
+              help='Sequential requests per strategy and encoding')
+def pages(page, requests_per_case):
+    """Requests per second for an HTML shell: plain file, render + on-the-fly compression, PageCache"""
+    app, _ = load_app(0)
+    from flask import Response, request, send_from_directory
+    from assets import NO_STORE_HEADERS
+    from compression import available_encodings
+    from app import asset_manifest, page_cache
+
+    # The two ways the shell was served before PageCache, registered next to
+    # the real route so all three share the same app and after_request hooks
+    app.add_url_rule('/__benchmark/file', 'benchmark_file',
+                     lambda: send_from_directory(app.static_folder, page))
+    app.add_url_rule('/__benchmark/render', 'benchmark_render',
+                     lambda: Response(asset_manifest.render_page(page), content_type='text/html; charset=utf-8',
+                                      headers=NO_STORE_HEADERS))
+    app.add_url_rule('/__benchmark/cache', 'benchmark_cache',
+                     lambda: page_cache.response(page, request.headers.get('Accept-Encoding')))
+    strategies = [
+        ('send_from_directory', '/__benchmark/file'),
+        ('render + compress', '/__benchmark/render'),
+        ('PageCache', '/__benchmark/cache'),
+    ]
+    client = app.test_client()
+
+    click.echo(f"{page}, {requests_per_case} sequential requests per row")
+    click.echo(f"{'strategy':<22}{'encoding':>10}{'bytes':>10}{'req/s':>10}{'CPU ms/req':>12}")
+    for encoding in ['identity', *available_encodings()]:
+        for name, path in strategies:
+            body_bytes, cpu_ms, rps = measure(client, path, {'Accept-Encoding': encoding}, requests_per_case)
+            click.echo(f"{name:<22}{encoding:>10}{body_bytes:>10,}{rps:>10,.0f}{cpu_ms:>12.3f}")
+
+
+# One worker boot: import app, then optionally the create_all() that used to
+# run at import time, counting the SQL statements it sends
+BOOT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+from models import db
+from sqlalchemy import event
+imported = time.perf_counter()
+statements = []
+if sys.argv[1] == 'create_all':
+    with app.app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+        db.create_all()
+finished = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_all_ms': (finished - imported) * 1000,
+                  'statements': len(statements)}))
+"""
+
+
+def boot_workers(database_url, processes, mode):
+    """Start `processes` interpreters at once; return (wall seconds, per-process results)"""
+    env = dict(os.environ, DATABASE_URL=database_url, RATE_LIMIT_ENABLED='false', LOG_LEVEL='WARNING')
+    started = time.perf_counter()
+    workers = [subprocess.Popen([sys.executable, '-c', BOOT_PROBE, mode], cwd=BASE_DIR, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+               for _ in range(processes)]
+    results = []
+    for worker in workers:
+        stdout, stderr = worker.communicate(timeout=300)
+        if worker.returncode != 0:
+            raise click.ClickException(f"worker boot failed ({mode}):\n{stderr[-2000:]}")
+        results.append(json.loads(stdout.strip().splitlines()[-1]))
+    return time.perf_counter() - started, results
+
+
+@cli.command()
+@click.option('--processes', '-p', default=16, show_default=True, help='Workers booted side by side')
+def boot(processes):
+    """Worker boot time with and without the old import-time create_all()"""
+    targets = [('sqlite', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'boot.db')}")]
+    test_database_url = os.getenv('TEST_DATABASE_URL', '')
+    if test_database_url.startswith(('postgres://', 'postgresql')):
+        targets.append(('postgresql', test_database_url))
+    else:
+        click.echo("TEST_DATABASE_URL is not a PostgreSQL URL; measuring SQLite only")
+
+    click.echo(f"{processes} workers booted side by side, {os.cpu_count()} CPU(s)")
+    click.echo(f"{'backend':<12}{'boot':<12}{'wall ms':>10}{'import ms':>11}{'create_all ms':>15}"
+               f"{'max':>8}{'SQL/worker':>12}")
+    for backend, database_url in targets:
+        env = dict(os.environ, DATABASE_URL=database_url, LOG_LEVEL='WARNING')
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'bootstrap-db'], cwd=BASE_DIR, env=env,
+                       check=True, capture_output=True)
+        for mode in ('create_all', 'no_ddl'):
+            wall, results = boot_workers(database_url, processes, mode)
+            create_all_ms = [r['create_all_ms'] for r in results]
+            click.echo(f"{backend:<12}{mode:<12}{wall * 1000:>10,.0f}"
+                       f"{statistics.median(r['import_ms'] for r in results):>11,.0f}"
+                       f"{statistics.median(create_all_ms):>15,.1f}{max(create_all_ms):>8,.1f}"
+                       f"{statistics.median(r['statements'] for r in results):>12,.0f}")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,219 @@
+import os
+import csv
+import json
+import time
+import hashlib
+from datetime import datetime, timezone
+from models import db, User, Payment, Referral, DomainRental, EmailLead, ImportCheckpoint
+
+IMPORT_MODELS = {
+    'users': User,
+    'payments': Payment,
+    'referrals': Referral,
+    'domain_rentals': DomainRental,
+    'email_leads': EmailLead,
+}
+
+# Extra input columns that are resolved to foreign keys instead of inserted
+USERNAME_COLUMNS = {
+    'username': 'user_id',
+    'referrer_username': 'referrer_id',
+    'referred_username': 'referred_id',
+}
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+
+
+class BulkImportError(Exception):
+    pass
+
+
+def iter_rows(path, fmt=None):
+    """Stream dict rows from a CSV or JSONL file"""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv')
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _coerce(column, value):
+    if value is None or value == '':
+        return None
+    python_type = column.type.python_type
+    if python_type is bool:
+        return value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+    if python_type is datetime:
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value)
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        # Columns hold naive UTC: convert offsets rather than dropping them
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    if python_type in (int, float):
+        return python_type(value)
+    return str(value)
+
+
+class Checkpoint:
+    """Tracks how many input rows have been committed so an import can resume.
+
+    The count lives in import_checkpoints and save() only stages it in the
+    session, so it commits in the same transaction as the chunk it covers: a
+    crash can lose a chunk and its checkpoint together, never one without the
+    other.
+    """
+
+    def __init__(self, model_name, source, name=None):
+        stat = os.stat(source)
+        self.model_name = model_name
+        self.source = os.path.abspath(source)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.key = hashlib.sha256(f"{model_name}:{name or self.source}".encode('utf-8')).hexdigest()
+
+    def load(self):
+        row = db.session.get(ImportCheckpoint, self.key)
+        if row is None:
+            return 0
+        if (row.source_size, row.source_mtime_ns) != (self.size, self.mtime_ns):
+            raise BulkImportError(f"Checkpoint for {row.source} belongs to a different or modified input file")
+        return row.rows_done
+
+    def save(self, rows_done):
+        db.session.merge(ImportCheckpoint(key=self.key, model=self.model_name, source=self.source[-1000:],
+                                          source_size=self.size, source_mtime_ns=self.mtime_ns,
+                                          rows_done=rows_done))
+
+    def clear(self):
+        db.session.execute(db.delete(ImportCheckpoint).where(ImportCheckpoint.key == self.key))
+        db.session.commit()
+
+
+class BulkImporter:
+    """Loads rows into one model in chunked executemany inserts, one transaction per chunk"""
+
+    def __init__(self, model_name, attribution=None, chunk_size=5000, echo=print):
+        if model_name not in IMPORT_MODELS:
+            raise BulkImportError(f"Unknown model {model_name}. Choose from: {', '.join(IMPORT_MODELS)}")
+        self.model_name = model_name
+        self.table = IMPORT_MODELS[model_name].__table__
+        self.columns = {c.name: c for c in self.table.columns if not (c.primary_key and c.autoincrement)}
+        self.attribution = attribution
+        self.chunk_size = chunk_size
+        self.echo = echo
+
+    def _prepare(self, raw):
+        row = {}
+        for key, value in raw.items():
+            if key in self.columns:
+                row[key] = _coerce(self.columns[key], value)
+        return row
+
+    def _resolve_usernames(self, raws, rows):
+        wanted = {str(raw[k]).lower() for raw in raws for k in USERNAME_COLUMNS if raw.get(k) and USERNAME_COLUMNS[k] in self.columns}
+        if not wanted:
+            return
+        ids = {}
+        names = sorted(wanted)
+        for start in range(0, len(names), 1000):
+            ids.update(db.session.execute(
+                db.select(User.username, User.id).where(User.username.in_(names[start:start + 1000]))
+            ).all())
+        for raw, row in zip(raws, rows):
+            for key, target in USERNAME_COLUMNS.items():
+                if raw.get(key) and target in self.columns and row.get(target) is None:
+                    user_id = ids.get(str(raw[key]).lower())
+                    if user_id is None:
+                        raise BulkImportError(f"Unknown {key}: {raw[key]}")
+                    row[target] = user_id
+
+    def _insert(self, rows):
+        # executemany needs a uniform key set, so rows that omit optional
+        # columns (and should get column defaults) are inserted per shape
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for group in groups.values():
+            db.session.execute(db.insert(self.table), group)
+
+    def _attribute_referrals(self, raws, rows):
+        signups = [(raw.get('referrer'), row['username'], row.get('created_at'))
+                   for raw, row in zip(raws, rows) if raw.get('referrer')]
+        if not signups or self.attribution is None:
+            return 0
+        names = [username for _, username, _ in signups]
+        ids = dict(db.session.execute(
+            db.select(User.username, User.id).where(User.username.in_(names))
+        ).all())
+        return self.attribution.attribute_many(
+            [(referrer, ids[username], created_at) for referrer, username, created_at in signups]
+        )
+
+    def _load_chunk(self, raws):
+        rows = [self._prepare(raw) for raw in raws]
+        if self.model_name != 'users':
+            self._resolve_usernames(raws, rows)
+        else:
+            for row in rows:
+                row['username'] = row['username'].strip().lower()
+                row['email'] = row['email'].strip().lower()
+        self._insert(rows)
+        if self.model_name == 'users':
+            return self._attribute_referrals(raws, rows)
+        return 0
+
+    def run(self, path, fmt=None, checkpoint_name=None, resume=True):
+        checkpoint = Checkpoint(self.model_name, path, checkpoint_name)
+        skip = checkpoint.load() if resume else 0
+        if skip:
+            self.echo(f"Resuming {self.model_name} import after row {skip}")
+
+        started = time.perf_counter()
+        rows_done = skip
+        loaded = 0
+        referrals = 0
+        chunk = []
+
+        def flush():
+            nonlocal rows_done, loaded, referrals
+            chunk_start = time.perf_counter()
+            try:
+                referrals += self._load_chunk(chunk)
+                checkpoint.save(rows_done + len(chunk))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise BulkImportError(f"Rows {rows_done + 1}-{rows_done + len(chunk)} failed: {e}") from e
+            rows_done += len(chunk)
+            loaded += len(chunk)
+            elapsed = time.perf_counter() - started
+            self.echo(f"{self.model_name}: {rows_done} rows ({len(chunk) / max(time.perf_counter() - chunk_start, 1e-9):,.0f} rows/s chunk, "
+                      f"{loaded / max(elapsed, 1e-9):,.0f} rows/s overall)")
+            chunk.clear()
+
+        for index, raw in enumerate(iter_rows(path, fmt)):
+            if index < skip:
+                continue
+            chunk.append(raw)
+            if len(chunk) >= self.chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        elapsed = time.perf_counter() - started
+        checkpoint.clear()
+        return {
+            'model': self.model_name,
+            'rows_loaded': loaded,
+            'rows_skipped': skip,
+            'referrals_attributed': referrals,
+            'seconds': round(elapsed, 2),
+            'rows_per_second': round(loaded / elapsed, 1) if elapsed else 0.0
+        }
@@ -0,0 +1,117 @@
+import os
+import time
+import queue
+import atexit
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from models import db, AffiliateClick
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+CLICK_FLUSH_MS = settings.click_flush_ms
+CLICK_BATCH_SIZE = settings.click_batch_size
+CLICK_QUEUE_SIZE = settings.click_queue_size
+
+
+def hash_ip(ip, secret):
+    """Keyed hash so unique visitors can be counted without storing addresses"""
+    if not ip:
+        return None
+    return hashlib.sha256(f"{secret}:{ip}".encode('utf-8')).hexdigest()
+
+
+class ClickRecorder:
+    """Buffers click events in memory and batch-inserts them from a background thread.
+
+    record() never blocks or touches the database: events go on a bounded
+    queue (and are dropped and counted if it is full). The writer drains the
+    queue every CLICK_FLUSH_MS, or as soon as CLICK_BATCH_SIZE events are
+    waiting, and writes each batch with one executemany INSERT. The writer is
+    started lazily in the process that records, so it survives forking
+    servers, and pending clicks are flushed at exit.
+    """
+
+    def __init__(self, app=None, flush_ms=CLICK_FLUSH_MS, batch_size=CLICK_BATCH_SIZE, max_queue=CLICK_QUEUE_SIZE):
+        self.app = app
+        self.flush_interval = flush_ms / 1000
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.stats = {'recorded': 0, 'dropped': 0, 'written': 0, 'batches': 0, 'failed': 0}
+
+    def init_app(self, app):
+        self.app = app
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='click-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def record(self, username, host=None, referer=None, user_agent=None, ip_hash=None, clicked_at=None):
+        event = {
+            'username': username.lower(),
+            'clicked_at': clicked_at or datetime.utcnow(),
+            'host': (host or '')[:255] or None,
+            'referer': (referer or '')[:500] or None,
+            'user_agent': (user_agent or '')[:300] or None,
+            'ip_hash': ip_hash,
+        }
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(event)
+            self.stats['recorded'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with self.app.app_context():
+                db.session.execute(db.insert(AffiliateClick.__table__), batch)
+                db.session.commit()
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+        except Exception as e:
+            self.stats['failed'] += len(batch)
+            logger.error("Dropped %d affiliate clicks: %s", len(batch), e, extra={'event': 'clicks_dropped'})
+
+    def _run(self):
+        while True:
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Let a batch accumulate until the flush deadline unless it fills first
+            while self._queue.qsize() < self.batch_size - 1 and time.monotonic() < deadline:
+                time.sleep(min(0.01, max(0.0, deadline - time.monotonic())))
+            self._write(self._drain(first))
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        while not self._queue.empty():
+            self._write(self._drain())
+
+    def snapshot(self):
+        return dict(self.stats, queued=self._queue.qsize())
@@ -0,0 +1,232 @@
+import ast
+import re
+import threading
+
+TOKEN_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+JS_FUNCTION_RE = re.compile(r'(?:function\s+([A-Za-z_$][\w$]*)\s*\(|(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*=>))')
+HTML_ID_RE = re.compile(r'\bid=["\']([^"\']+)["\']')
+CSS_SELECTOR_RE = re.compile(r'^\s*([^{}@/][^{}]*?)\s*\{')
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FileIndex:
+    """Symbols, routes, tokens and trigrams for a single file's content"""
+
+    def __init__(self, filename, content):
+        self.filename = filename
+        self.content = content
+        self.lines = content.splitlines()
+        self.symbols = []
+        self.routes = []
+        self.tokens = {}
+        self.trigrams = {}
+
+        for lineno, line in enumerate(self.lines, start=1):
+            lowered = line.lower()
+            for token in TOKEN_RE.findall(lowered):
+                self.tokens.setdefault(token, set()).add(lineno)
+            for trigram in _trigrams(lowered):
+                self.trigrams.setdefault(trigram, set()).add(lineno)
+
+        if filename.endswith('.py'):
+            self._index_python()
+        else:
+            self._index_static()
+
+    def _index_python(self):
+        try:
+            tree = ast.parse(self.content)
+        except SyntaxError:
+            return
+
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                kind = 'class' if isinstance(node, ast.ClassDef) else 'function'
+                self.symbols.append({
+                    'name': node.name,
+                    'kind': kind,
+                    'start_line': start,
+                    'end_line': node.end_lineno or node.lineno
+                })
+                if kind == 'function':
+                    self._index_routes(node, start)
+
+    def _index_routes(self, node, start):
+        for decorator in node.decorator_list:
+            if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+                continue
+            if decorator.func.attr != 'route' or not decorator.args:
+                continue
+            path = decorator.args[0]
+            if not (isinstance(path, ast.Constant) and isinstance(path.value, str)):
+                continue
+            methods = ['GET']
+            for keyword in decorator.keywords:
+                if keyword.arg == 'methods' and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                    methods = [e.value for e in keyword.value.elts if isinstance(e, ast.Constant)]
+            self.routes.append({
+                'path': path.value,
+                'methods': methods,
+                'function': node.name,
+                'start_line': start,
+                'end_line': node.end_lineno or node.lineno
+            })
+
+    def _index_static(self):
+        is_css = self.filename.endswith('.css')
+        for lineno, line in enumerate(self.lines, start=1):
+            for match in JS_FUNCTION_RE.finditer(line):
+                self.symbols.append({
+                    'name': match.group(1) or match.group(2),
+                    'kind': 'js_function',
+                    'start_line': lineno,
+                    'end_line': lineno
+                })
+            for match in HTML_ID_RE.finditer(line):
+                self.symbols.append({
+                    'name': match.group(1),
+                    'kind': 'element_id',
+                    'start_line': lineno,
+                    'end_line': lineno
+                })
+            if is_css:
+                match = CSS_SELECTOR_RE.match(line)
+                if match:
+                    self.symbols.append({
+                        'name': match.group(1),
+                        'kind': 'css_selector',
+                        'start_line': lineno,
+                        'end_line': lineno
+                    })
+
+    def find_lines(self, query):
+        """Return sorted line numbers whose text contains query (case-insensitive)"""
+        needle = query.lower()
+        if not needle:
+            return []
+
+        if len(needle) >= 3:
+            candidates = None
+            for trigram in _trigrams(needle):
+                lines = self.trigrams.get(trigram)
+                if not lines:
+                    return []
+                candidates = set(lines) if candidates is None else candidates & lines
+                if not candidates:
+                    return []
+        elif TOKEN_RE.fullmatch(needle):
+            # Short identifiers: narrow with the token index before verifying
+            candidates = {n for token, lines in self.tokens.items() if needle in token for n in lines}
+        else:
+            candidates = range(1, len(self.lines) + 1)
+
+        return sorted(n for n in candidates if needle in self.lines[n - 1].lower())
+
+
+class CodeIndex:
+    """Incrementally maintained search index over a set of files.
+
+    Files are re-indexed only when the content handed to us by the loader
+    differs from what was last indexed, so repeated searches over unchanged
+    files cost a dictionary lookup per file.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _file_index(self, filename):
+        content = self._loader(filename)
+        with self._lock:
+            index = self._files.get(filename)
+        if index is not None and index.content == content:
+            return index
+        index = FileIndex(filename, content)
+        with self._lock:
+            self._files[filename] = index
+        return index
+
+    def search(self, query, filenames, kind='any', context_lines=2, max_results=20, max_lines_per_result=80):
+        """Search symbols, routes and text across filenames.
+
+        Returns a list of matches with file, line range and matching source, so a
+        single call answers most "where is X handled" questions.
+        """
+        query = query.strip()
+        needle = query.lower()
+        results = []
+        errors = {}
+
+        for filename in filenames:
+            try:
+                index = self._file_index(filename)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                errors[filename] = str(e)
+                continue
+
+            if kind in ('any', 'route'):
+                for route in index.routes:
+                    if needle in route['path'].lower() or needle == route['function'].lower():
+                        results.append(self._range_result(index, 'route', route['path'], route['start_line'], route['end_line'],
+                                                          methods=route['methods'], function=route['function']))
+
+            if kind in ('any', 'symbol'):
+                route_starts = {r['start_line'] for r in results if r['file'] == filename and r['kind'] == 'route'}
+                for symbol in index.symbols:
+                    if needle in symbol['name'].lower() and symbol['start_line'] not in route_starts:
+                        results.append(self._range_result(index, symbol['kind'], symbol['name'], symbol['start_line'], symbol['end_line']))
+
+            if kind in ('any', 'text'):
+                # Only lines a result will actually show count as covered: long
+                # symbols are cut to max_lines_per_result below
+                covered = {(r['file'], n) for r in results
+                           for n in range(r['start_line'], min(r['end_line'], r['start_line'] + max_lines_per_result - 1) + 1)}
+                lines = [n for n in index.find_lines(query) if (filename, n) not in covered]
+                for start, end in self._group_lines(lines, context_lines, len(index.lines)):
+                    results.append(self._range_result(index, 'text', query, start, end))
+
+        # Exact symbol/route hits first, then everything else in file order
+        results.sort(key=lambda r: (r['kind'] == 'text', r['name'].lower() != needle))
+        for result in results[:max_results]:
+            lines = result['content'].split('\n')
+            if len(lines) > max_lines_per_result:
+                result['content'] = '\n'.join(lines[:max_lines_per_result])
+                result['content_truncated'] = True
+        return {
+            'results': results[:max_results],
+            'total_matches': len(results),
+            'truncated': len(results) > max_results,
+            'errors': errors
+        }
+
+    @staticmethod
+    def _group_lines(lines, context_lines, total_lines):
+        ranges = []
+        for lineno in lines:
+            start = max(1, lineno - context_lines)
+            end = min(total_lines, lineno + context_lines)
+            if ranges and start <= ranges[-1][1] + 1:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    @staticmethod
+    def _range_result(index, kind, name, start_line, end_line, **extra):
+        result = {
+            'file': index.filename,
+            'kind': kind,
+            'name': name,
+            'start_line': start_line,
+            'end_line': end_line,
+            'content': '\n'.join(index.lines[start_line - 1:end_line])
+        }
+        result.update(extra)
+        return result
@@ -0,0 +1,145 @@
+import os
+import gzip
+import mimetypes
+from flask import request, send_from_directory
+from settings import settings
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+COMPRESS_MIN_SIZE = settings.compress_min_size
+COMPRESS_LEVEL = settings.compress_level
+BROTLI_QUALITY = settings.brotli_quality
+
+# Mimetypes worth compressing; images and fonts are already compressed
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'image/svg+xml', 'application/xml',
+}
+PRECOMPRESS_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json', '.txt', '.xml'}
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding, offered=None):
+    """Pick the best encoding the client accepts (q > 0), preferring br over gzip"""
+    offered = offered or available_encodings()
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level=COMPRESS_LEVEL):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY if level < 9 else 11)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _is_compressible(mimetype):
+    return mimetype in COMPRESSIBLE_TYPES or (mimetype or '').startswith('text/')
+
+
+def precompress_static(static_dir, level=9):
+    """Write .gz (and .br when brotli is installed) next to every compressible
+    static file, skipping variants newer than their source. Returns counts and bytes."""
+    stats = {'files': 0, 'written': 0, 'skipped': 0, 'original_bytes': 0, 'compressed_bytes': {}}
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in PRECOMPRESS_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            source_mtime = os.stat(path).st_mtime_ns
+            with open(path, 'rb') as f:
+                data = f.read()
+            stats['files'] += 1
+            stats['original_bytes'] += len(data)
+            for encoding in available_encodings():
+                target = path + ENCODING_SUFFIXES[encoding]
+                if os.path.exists(target) and os.stat(target).st_mtime_ns >= source_mtime:
+                    stats['skipped'] += 1
+                    size = os.path.getsize(target)
+                else:
+                    compressed = compress(data, encoding, level)
+                    tmp_path = f"{target}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(compressed)
+                    os.replace(tmp_path, target)
+                    stats['written'] += 1
+                    size = len(compressed)
+                stats['compressed_bytes'][encoding] = stats['compressed_bytes'].get(encoding, 0) + size
+    return stats
+
+
+def send_precompressed(directory, filename, **kwargs):
+    """send_from_directory, but serve a fresh .br/.gz sibling when the client accepts it"""
+    mimetype = mimetypes.guess_type(filename)[0]
+    source = os.path.join(directory, filename)
+    if _is_compressible(mimetype) and os.path.isfile(source):
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding:
+            variant = filename + ENCODING_SUFFIXES[encoding]
+            variant_path = os.path.join(directory, variant)
+            if os.path.isfile(variant_path) and os.stat(variant_path).st_mtime_ns >= os.stat(source).st_mtime_ns:
+                response = send_from_directory(directory, variant, mimetype=mimetype, **kwargs)
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+    response = send_from_directory(directory, filename, **kwargs)
+    if _is_compressible(mimetype):
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_compression(app, min_size=COMPRESS_MIN_SIZE, level=COMPRESS_LEVEL):
+    """Compress buffered text/JSON responses of at least min_size bytes on the fly"""
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or not _is_compressible(response.mimetype)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # The representation changed, so a strong validator no longer applies
+            etag, weak = response.get_etag()
+            response.set_etag(etag, weak=True)
+        return response
+
+    return compress_response
@@ -0,0 +1,182 @@
+import os
+import time
+import threading
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from settings import settings
+
+
+class PoolMetrics:
+    """Connection pool counters, shared by every engine this process creates"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.connects = 0
+            self.timeouts = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+
+    def record_wait(self, wait_ms, timed_out=False):
+        with self._lock:
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def on_checkin(self):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def on_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self, engine=None):
+        with self._lock:
+            data = {
+                # Counters are per process; the pid tells gunicorn workers apart
+                'worker_pid': os.getpid(),
+                'checkouts': self.checkouts,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'total_wait_ms': round(self.total_wait_ms, 2),
+                'avg_wait_ms': round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 2)
+            }
+        if engine is not None:
+            pool = engine.pool
+            data['backend'] = engine.dialect.name
+            data['pool_class'] = type(pool).__name__
+            data['pool_status'] = pool.status()
+            if hasattr(pool, 'size'):
+                data['pool_size'] = pool.size()
+                data['overflow'] = pool.overflow()
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            # Only pool_timeout expiring counts; connect errors are not starvation
+            timed_out = True
+            raise
+        finally:
+            pool_metrics.record_wait((time.perf_counter() - start) * 1000, timed_out)
+
+
+def normalize_database_url(url):
+    """Map provider-style URLs onto the drivers in requirements.txt"""
+    if not url:
+        return url
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    if url.startswith('mysql://'):
+        return 'mysql+pymysql://' + url[len('mysql://'):]
+    return url
+
+
+def engine_options(url):
+    """Return SQLALCHEMY_ENGINE_OPTIONS tuned for the backend behind url.
+
+    Pool sizing defaults to one connection per gunicorn thread with a small
+    overflow; every knob comes from the DB_* / SQLITE_* settings.
+    """
+    if not url:
+        return {}
+
+    backend = make_url(url).get_backend_name()
+    statement_timeout_ms = settings.db_statement_timeout_ms
+    pooled = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': settings.db_pool_size,
+        'max_overflow': settings.db_max_overflow,
+        'pool_timeout': settings.db_pool_timeout,
+        'pool_recycle': settings.db_pool_recycle or 1800,
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+    }
+
+    if backend == 'postgresql':
+        pooled['connect_args'] = {
+            'connect_timeout': settings.db_connect_timeout,
+            'options': f"-c statement_timeout={statement_timeout_ms} "
+                       f"-c idle_in_transaction_session_timeout={settings.db_idle_tx_timeout_ms}",
+            'application_name': settings.db_application_name,
+        }
+        return pooled
+
+    if backend == 'mysql':
+        # Recycle below the common 300s wait_timeout on managed MySQL
+        pooled['pool_recycle'] = settings.db_pool_recycle or 280
+        pooled['connect_args'] = {
+            'connect_timeout': settings.db_connect_timeout,
+            'init_command': f"SET SESSION max_execution_time={statement_timeout_ms}",
+        }
+        return pooled
+
+    if backend == 'sqlite':
+        database = make_url(url).database
+        options = {'connect_args': {'timeout': settings.sqlite_busy_timeout_ms / 1000}}
+        if database and database != ':memory:' and not database.startswith('file::memory:'):
+            # File databases get a real pool; pre-ping and recycle are pointless locally
+            options.update({
+                'poolclass': InstrumentedQueuePool,
+                'pool_size': pooled['pool_size'],
+                'max_overflow': pooled['max_overflow'],
+                'pool_timeout': pooled['pool_timeout'],
+            })
+        return options
+
+    return {'pool_pre_ping': True}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_kb}")
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine):
+    """Attach pool metrics listeners and per-connection SQLite pragmas to engine"""
+    if getattr(engine, '_rizzosai_instrumented', False):
+        return engine
+    engine._rizzosai_instrumented = True
+
+    event.listen(engine, 'checkout', lambda *args: pool_metrics.on_checkout())
+    event.listen(engine, 'checkin', lambda *args: pool_metrics.on_checkin())
+    event.listen(engine, 'connect', lambda *args: pool_metrics.on_connect())
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _apply_sqlite_pragmas)
+    return engine
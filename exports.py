@@ -0,0 +1,88 @@
+import io
+import csv
+import json
+import zlib
+from datetime import datetime, date
+from models import db, User, Payment, PaymentCharge, SubscriptionCharge, Referral
+
+EXPORT_DATASETS = {
+    'users': User,
+    'payments': Payment,
+    'payment_charges': PaymentCharge,
+    'subscription_charges': SubscriptionCharge,
+    'referrals': Referral,
+}
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _batches(model, batch_size):
+    """Yield lists of row dicts using a server-side cursor, ordered by primary key"""
+    table = model.__table__
+    stmt = db.select(table).order_by(table.c.id).execution_options(stream_results=True, yield_per=batch_size)
+    result = db.session.execute(stmt)
+    try:
+        for partition in result.partitions(batch_size):
+            yield [row._mapping for row in partition]
+    finally:
+        result.close()
+
+
+def _csv_chunks(model, batch_size):
+    columns = [c.name for c in model.__table__.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for batch in _batches(model, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            writer.writerow([_jsonable(row[c]) for c in columns])
+        yield buffer.getvalue()
+
+
+def _jsonl_chunks(model, batch_size):
+    columns = [c.name for c in model.__table__.columns]
+    for batch in _batches(model, batch_size):
+        yield ''.join(json.dumps({c: _jsonable(row[c]) for c in columns}) + '\n' for row in batch)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset, fmt='csv', gzip=False, batch_size=EXPORT_BATCH_SIZE, content_encoding=False):
+    """Return (generator, content_type, filename) for a dataset export.
+
+    Rows are fetched in batches from a server-side cursor and written out as
+    they arrive, so memory stays flat regardless of table size and the first
+    bytes go out before the query finishes. gzip produces a .gz download;
+    content_encoding gzips the body but keeps the original type and filename,
+    for serving with Content-Encoding: gzip.
+    """
+    model = EXPORT_DATASETS[dataset]
+    if fmt == 'jsonl':
+        chunks = _jsonl_chunks(model, batch_size)
+        content_type = 'application/x-ndjson'
+    else:
+        chunks = _csv_chunks(model, batch_size)
+        content_type = 'text/csv; charset=utf-8'
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d}.{fmt}"
+
+    if gzip:
+        return _gzipped(chunks), 'application/gzip', filename + '.gz'
+    if content_encoding:
+        return _gzipped(chunks), content_type, filename
+    return (chunk.encode('utf-8') for chunk in chunks), content_type, filename
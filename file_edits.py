@@ -0,0 +1,140 @@
+import os
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX hosts fall back to thread locks only
+    fcntl = None
+
+LOCK_DIR = os.path.join(tempfile.gettempdir(), 'rizzosai-edit-locks')
+
+
+def _read_umask():
+    # os.umask can only be read by setting it; do that once, at import, before
+    # any worker threads exist
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+UMASK = _read_umask()
+
+
+class EditError(Exception):
+    """Raised when an edit cannot be applied to the current file content"""
+
+
+class EditConflict(EditError):
+    """Raised when a file changed between the caller's read and the edit"""
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class FileEditor:
+    """Applies replace-style edits atomically and safely across threads and processes.
+
+    Every write holds a per-file thread lock plus an flock on a lock file outside
+    the served tree, writes the new content to a temp file in the same directory
+    and os.replace()s it over the original, so readers never see a truncated
+    file and concurrent gunicorn workers cannot interleave read-modify-write.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _thread_lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @contextmanager
+    def lock(self, path):
+        path = os.path.abspath(path)
+        with self._thread_lock(path):
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(LOCK_DIR, exist_ok=True)
+            lock_name = hashlib.sha1(path.encode('utf-8')).hexdigest() + '.lock'
+            with open(os.path.join(LOCK_DIR, lock_name), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self, path):
+        """Return (content, content_hash) for path, read from disk.
+
+        The compare-and-swap must see what is actually on disk: the shared
+        cache is keyed on (mtime, size), which a same-size write within one
+        timestamp tick (or a tool that preserves mtime) does not change. The
+        cache is refreshed from the read instead.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if self._cache is not None:
+            self._cache.update(path, content)
+        return content, content_hash(content)
+
+    def _write(self, path, content):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates 0600: keep an existing file's mode, and give new
+            # files the mode open() would have (0666 less the umask)
+            if os.path.exists(path):
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            else:
+                os.chmod(tmp_path, 0o666 & ~UMASK)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if self._cache is not None:
+            self._cache.update(path, content)
+
+    def apply(self, path, edits, expected_hash=None):
+        """Apply a batch of (old_content, new_content) replacements in one write.
+
+        Edits are applied in order, each replacing the first occurrence. If
+        expected_hash is given and the file no longer matches it, EditConflict
+        is raised and nothing is written. Returns the new content hash.
+        """
+        if not edits:
+            raise EditError("No edits provided")
+
+        with self.lock(path):
+            current, current_hash = self._read(path)
+            if expected_hash and current_hash != expected_hash:
+                raise EditConflict("File changed since it was read. Read it again and retry the edit.")
+
+            updated = current
+            for i, (old_content, new_content) in enumerate(edits, start=1):
+                if not old_content or old_content not in updated:
+                    raise EditError(f"Edit {i}: old content not found in file. Please read the file first to get the exact content.")
+                updated = updated.replace(old_content, new_content, 1)
+
+            if updated == current:
+                return current_hash
+            self._write(path, updated)
+            return content_hash(updated)
+
+    def create(self, path, content):
+        """Atomically create path with content, failing if it already exists"""
+        with self.lock(path):
+            if os.path.exists(path):
+                raise FileExistsError(path)
+            self._write(path, content)
+            return content_hash(content)
@@ -0,0 +1,61 @@
+"""Gunicorn settings: gunicorn app:app (this file is picked up from the working directory).
+
+The app mixes long-lived SSE streams (/api/admin/chat) with many short JSON
+requests, so the default sync worker -- one request per process -- would let
+a handful of open streams block everything else. gthread (the default here)
+gives each worker a thread pool; gevent (GUNICORN_WORKER_CLASS=gevent, needs
+the gevent package) multiplexes thousands of connections per worker. Every
+knob is an environment variable; `python loadtest.py` compares the options.
+"""
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(multiprocessing.cpu_count() * 2 + 1, 9))))
+# Threads per gthread worker; db_config sizes the connection pool from the same
+# variable. Note gunicorn runs a "sync" worker as gthread whenever threads > 1
+threads = int(os.getenv('GUNICORN_THREADS', '5'))
+# Concurrent connections per gevent worker
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '200'))
+
+# With gthread/gevent the timeout is a worker heartbeat, not a per-request
+# limit, so open SSE streams do not trip it; sync workers would be killed
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to cap slow memory growth; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Each worker imports the app itself, so engines, sessions and the lazily
+# started background threads are never shared across a fork
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Render and most PaaS routers terminate TLS and set X-Forwarded-*
+forwarded_allow_ips = os.getenv('FORWARDED_ALLOW_IPS', '*')
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Connections opened by the master before forking must not be reused,
+        # and the log writer thread did not survive the fork
+        from app import app, db
+        from log_config import configure_logging
+        configure_logging()
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Only the worker that takes the refresh lock actually starts the thread
+    from app import app
+    from ai_insights import insights_service
+    insights_service.start_background_refresh(app)
@@ -0,0 +1,41 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access and caches the result.
+
+    setup, if given, is called once with the freshly imported module (e.g. to
+    set an API key) before any attribute is handed out.
+    """
+
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._setup is not None:
+                        self._setup(module)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<LazyModule {self._name} ({state})>'
+
+
+def lazy_import(name, setup=None):
+    return LazyModule(name, setup)
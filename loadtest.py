@@ -0,0 +1,388 @@
+"""Load-test the app under gunicorn, once per worker class, and compare the results.
+
+    python loadtest.py                                  # sync, gthread (+ gevent if installed)
+    python loadtest.py -k gthread -w 4 -t 8 -c 64 -d 30
+
+Each run starts gunicorn with gunicorn.conf.py against a throwaway SQLite
+database seeded through `flask bootstrap-db` / `flask import-data`. Namecheap
+and Anthropic are replaced by a local mock server with fixed latency, so the
+domain check and the admin chat SSE stream do realistic amounts of waiting
+without leaving the machine. Client threads issue a weighted mix of the main
+endpoints while a few long-lived admin chat streams run alongside, the way
+the admin panel keeps them open. Reports throughput and tail latency per
+endpoint and per worker class, then polls /api/admin/db-metrics until every
+worker has reported and exits non-zero if any of them hit the connection
+pool timeout (pool starvation). To probe a pool smaller than the thread
+count, set DB_POOL_SIZE / DB_MAX_OVERFLOW in the environment, e.g.
+
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0 DB_POOL_TIMEOUT=1 python loadtest.py -k gthread -t 16
+
+The client is Python threads too, so absolute numbers are bounded by this
+machine; compare worker classes within one run rather than across machines.
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+import importlib.util
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import click
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_USERNAME = 'loadtest-admin'
+ADMIN_PASSWORD = 'loadtest-password'
+AFFILIATES = [f"loadtest{i}" for i in range(50)]
+
+# (name, weight, method, path factory, json body factory)
+SCENARIOS = [
+    ('GET /', 20, 'GET', lambda: '/', None),
+    ('GET /<affiliate>', 20, 'GET', lambda: f"/{random.choice(AFFILIATES)}", None),
+    ('GET /api/packages', 15, 'GET', lambda: '/api/packages', None),
+    ('GET /api/promotion-config', 10, 'GET', lambda: '/api/promotion-config', None),
+    ('GET /api/leaderboard', 10, 'GET', lambda: '/api/leaderboard', None),
+    ('GET /api/user/<username>', 10, 'GET', lambda: f"/api/user/{random.choice(AFFILIATES)}", None),
+    ('POST /api/check-domain-availability', 15, 'POST', lambda: '/api/check-domain-availability',
+     lambda: {'domain': f"loadtest-{random.randrange(10 ** 6)}"}),
+]
+
+
+class MockUpstream:
+    """Namecheap XML API and Anthropic Messages API stand-ins with fixed latency"""
+
+    def __init__(self, namecheap_latency, anthropic_latency):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type):
+                body = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(mock.namecheap_latency)
+                self._send('<?xml version="1.0" encoding="utf-8"?><ApiResponse Status="OK"><CommandResponse>'
+                           '<DomainCheckResult Domain="loadtest.com" Available="true" IsPremiumName="false" />'
+                           '</CommandResponse></ApiResponse>', 'application/xml')
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(mock.anthropic_latency)
+                self._send(json.dumps({
+                    'id': 'msg_loadtest', 'type': 'message', 'role': 'assistant', 'model': 'mock',
+                    'content': [{'type': 'text', 'text': 'All systems normal.'}],
+                    'stop_reason': 'end_turn', 'stop_sequence': None,
+                    'usage': {'input_tokens': 10, 'output_tokens': 5},
+                }), 'application/json')
+
+        self.namecheap_latency = namecheap_latency
+        self.anthropic_latency = anthropic_latency
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def app_env(database_url, upstream_url):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': database_url,
+        'FLASK_APP': 'app',
+        'ADMIN_USERNAME': ADMIN_USERNAME,
+        'ADMIN_PASSWORD': ADMIN_PASSWORD,
+        'NAMECHEAP_MOCK_MODE': 'false',
+        'NAMECHEAP_API_URL': upstream_url,
+        'NAMECHEAP_API_USER': 'loadtest',
+        'NAMECHEAP_API_KEY': 'loadtest',
+        'NAMECHEAP_CLIENT_IP': '127.0.0.1',
+        'ANTHROPIC_API_KEY': 'loadtest',
+        'ANTHROPIC_BASE_URL': upstream_url,
+        'OPENAI_API_KEY': '',
+        'RATE_LIMIT_ENABLED': 'false',
+        'GUNICORN_ACCESS_LOG': '',
+        'GUNICORN_LOG_LEVEL': 'warning',
+        # Pool counters live in each worker; recycling one mid-run would lose them
+        'GUNICORN_MAX_REQUESTS': '0',
+    })
+    return env
+
+
+def seed_database(workdir, env):
+    """Create the schema and load verified affiliates through the app's own CLI"""
+    users_path = os.path.join(workdir, 'users.jsonl')
+    with open(users_path, 'w') as f:
+        for i, username in enumerate(AFFILIATES):
+            f.write(json.dumps({
+                'username': username, 'email': f"{username}@example.com", 'full_name': f"Load Test {i}",
+                'package_tier': 'basic', 'daily_rate': 1.0, 'email_verified': True,
+            }) + '\n')
+    for args in (['bootstrap-db'], ['import-data', 'users', users_path], ['rebuild-rollups']):
+        result = subprocess.run([sys.executable, '-m', 'flask', *args], cwd=BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise click.ClickException(f"flask {' '.join(args)} failed:\n{result.stdout}{result.stderr}")
+
+
+def start_gunicorn(worker_class, workers, threads, port, env, log_path):
+    env = dict(env, PORT=str(port), GUNICORN_WORKER_CLASS=worker_class,
+               GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads))
+    log = open(log_path, 'ab')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                               cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise click.ClickException(f"gunicorn ({worker_class}) exited during startup; see {log_path}")
+        try:
+            requests.get(f"{base_url}/api/promotion-config", timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise click.ClickException(f"gunicorn ({worker_class}) did not start within 60s; see {log_path}")
+
+
+def stop_gunicorn(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def admin_token(base_url):
+    response = requests.post(f"{base_url}/api/admin/login",
+                             json={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD}, timeout=10)
+    response.raise_for_status()
+    return response.json()['token']
+
+
+def run_load(base_url, concurrency, duration, warmup, streams):
+    """Drive the endpoint mix plus admin chat streams; return per-endpoint samples"""
+    samples = {name: [] for name, *_ in SCENARIOS}
+    samples['SSE /api/admin/chat (first event)'] = []
+    samples['SSE /api/admin/chat (complete)'] = []
+    errors = {}
+    lock = threading.Lock()
+    token = admin_token(base_url)
+    names = [s[0] for s in SCENARIOS]
+    weights = [s[1] for s in SCENARIOS]
+    by_name = {s[0]: s for s in SCENARIOS}
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def record(name, elapsed, ok, began):
+        if began < measure_from:
+            return
+        with lock:
+            if ok:
+                samples[name].append(elapsed)
+            else:
+                errors[name] = errors.get(name, 0) + 1
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            name = random.choices(names, weights)[0]
+            _, _, method, path, body = by_name[name]
+            began = time.monotonic()
+            try:
+                response = session.request(method, base_url + path(), json=body() if body else None,
+                                           timeout=30, allow_redirects=False)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            record(name, time.monotonic() - began, ok, began)
+
+    def streamer():
+        session = requests.Session()
+        headers = {'Authorization': f"Bearer {token}"}
+        while time.monotonic() < stop_at:
+            began = time.monotonic()
+            first = None
+            try:
+                with session.post(f"{base_url}/api/admin/chat", json={'message': 'status report'},
+                                  headers=headers, stream=True, timeout=60) as response:
+                    ok = response.status_code == 200
+                    for _ in response.iter_lines():
+                        if first is None:
+                            first = time.monotonic() - began
+            except requests.RequestException:
+                ok = False
+            ok = ok and first is not None
+            record('SSE /api/admin/chat (first event)', first, ok, began)
+            record('SSE /api/admin/chat (complete)', time.monotonic() - began, ok, began)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    threads += [threading.Thread(target=streamer, daemon=True) for _ in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors
+
+
+def pool_metrics(base_url, token, workers, attempts_per_worker=25):
+    """Collect /api/admin/db-metrics from every worker, keyed by worker pid.
+
+    Each poll opens a new connection, so the kernel hands it to whichever
+    worker accepts next; polling stops once every worker has answered.
+    """
+    headers = {'Authorization': f"Bearer {token}", 'Connection': 'close'}
+    by_pid = {}
+    for _ in range(workers * attempts_per_worker):
+        response = requests.get(f"{base_url}/api/admin/db-metrics", headers=headers, timeout=10)
+        response.raise_for_status()
+        metrics = response.json()
+        by_pid[metrics['worker_pid']] = {key: metrics.get(key) for key in
+                                         ('pool_size', 'max_checked_out', 'timeouts', 'max_wait_ms', 'avg_wait_ms')}
+        if len(by_pid) >= workers:
+            break
+    return by_pid
+
+
+def summarize(worker_class, samples, errors, duration):
+    requests_done = sum(len(v) for k, v in samples.items() if not k.endswith('(first event)'))
+    all_latencies = [x for k, v in samples.items() if not k.startswith('SSE') for x in v]
+    return {
+        'worker_class': worker_class,
+        'requests_per_second': round(requests_done / duration, 1),
+        'errors': sum(errors.values()),
+        'p50_ms': round(percentile(all_latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(all_latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(all_latencies, 99) * 1000, 1),
+        'endpoints': {
+            name: {
+                'count': len(values),
+                'errors': errors.get(name, 0),
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1),
+            }
+            for name, values in samples.items()
+        },
+    }
+
+
+def print_report(results):
+    click.echo('')
+    click.echo(f"{'worker class':<14}{'req/s':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in results:
+        click.echo(f"{result['worker_class']:<14}{result['requests_per_second']:>10}{result['errors']:>8}"
+                   f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}")
+    click.echo(f"\n{'worker class':<14}{'pid':>8}{'pool':>6}{'max out':>9}{'timeouts':>10}{'max wait ms':>13}")
+    for result in results:
+        for pid, pool in sorted(result.get('pool', {}).items()):
+            click.echo(f"{result['worker_class']:<14}{pid:>8}{pool['pool_size'] or '-':>6}{pool['max_checked_out']:>9}"
+                       f"{pool['timeouts']:>10}{pool['max_wait_ms']:>13}")
+    for result in results:
+        click.echo(f"\n{result['worker_class']}:")
+        click.echo(f"  {'endpoint':<42}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, stats in result['endpoints'].items():
+            click.echo(f"  {name:<42}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10}{stats['p99_ms']:>10}")
+
+
+@click.command()
+@click.option('--worker-class', '-k', 'worker_classes', multiple=True,
+              help='Worker class to test; repeatable (default: sync, gthread, and gevent if installed)')
+@click.option('--workers', '-w', default=2, show_default=True, help='GUNICORN_WORKERS for every run')
+@click.option('--threads', '-t', default=5, show_default=True, help='GUNICORN_THREADS for gthread runs')
+@click.option('--concurrency', '-c', default=32, show_default=True, help='Concurrent client threads')
+@click.option('--duration', '-d', default=15.0, show_default=True, help='Measured seconds per worker class')
+@click.option('--warmup', default=3.0, show_default=True, help='Unmeasured seconds before each measurement')
+@click.option('--streams', default=4, show_default=True, help='Concurrent long-lived admin chat SSE clients')
+@click.option('--namecheap-latency', default=0.15, show_default=True, help='Mock Namecheap response delay (s)')
+@click.option('--anthropic-latency', default=1.5, show_default=True, help='Mock Anthropic response delay (s)')
+@click.option('--json-output', type=click.Path(dir_okay=False), help='Also write the results to this JSON file')
+@click.option('--keep', is_flag=True, help='Keep the temporary database and gunicorn logs')
+def main(worker_classes, workers, threads, concurrency, duration, warmup, streams,
+         namecheap_latency, anthropic_latency, json_output, keep):
+    if not worker_classes:
+        worker_classes = ['sync', 'gthread']
+        if importlib.util.find_spec('gevent'):
+            worker_classes.append('gevent')
+    if 'gevent' in worker_classes and not importlib.util.find_spec('gevent'):
+        raise click.ClickException('gevent is not installed (pip install gevent)')
+
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    upstream = MockUpstream(namecheap_latency, anthropic_latency)
+    upstream.start()
+    results = []
+    try:
+        for worker_class in worker_classes:
+            # A fresh database per run, so click rows from one run don't slow the next
+            database_url = f"sqlite:///{os.path.join(workdir, f'{worker_class}.db')}"
+            env = app_env(database_url, upstream.url)
+            seed_database(workdir, env)
+            # gunicorn silently turns sync into gthread when threads > 1
+            worker_threads = threads if worker_class == 'gthread' else 1
+            click.echo(f"{worker_class}: {workers} workers, {worker_threads} threads, "
+                       f"{concurrency} clients + {streams} streams for {duration:g}s")
+            process, base_url = start_gunicorn(worker_class, workers, worker_threads, free_port(), env,
+                                               os.path.join(workdir, f'gunicorn-{worker_class}.log'))
+            try:
+                samples, errors = run_load(base_url, concurrency, duration, warmup, streams)
+                pool = pool_metrics(base_url, admin_token(base_url), workers)
+            finally:
+                stop_gunicorn(process)
+            results.append(dict(summarize(worker_class, samples, errors, duration), pool=pool))
+    finally:
+        upstream.stop()
+        if keep:
+            click.echo(f"Database and logs kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if json_output:
+        with open(json_output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    # Pool starvation check: no checkout may have hit pool_timeout in any worker
+    starved = [f"{result['worker_class']} pid {pid}: {pool['timeouts']} timeouts"
+               for result in results for pid, pool in result['pool'].items() if pool['timeouts']]
+    if starved:
+        raise click.ClickException('Connection pool timeouts under load:\n  ' + '\n  '.join(starved))
+    missing = [f"{result['worker_class']}: {len(result['pool'])}/{workers}"
+               for result in results if len(result['pool']) < workers]
+    if missing:
+        raise click.ClickException('Pool metrics not collected from every worker: ' + ', '.join(missing))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from settings import settings
+
+LOG_LEVEL = settings.log_level
+# "json" for one object per line (production), "text" for readable local output
+LOG_FORMAT = settings.log_format
+LOG_QUEUE_SIZE = settings.log_queue_size
+# Libraries that log every HTTP call at INFO
+QUIET_LOGGERS = ('httpx', 'httpcore', 'urllib3', 'openai', 'anthropic', 'stripe')
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extra= fields, exception"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line output with extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extras = ' '.join(f"{key}={value}" for key, value in vars(record).items()
+                          if key not in _RECORD_ATTRS and not key.startswith('_'))
+        return f"{line} {extras}" if extras else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: when the queue is full the record is dropped and counted"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve %-args and the traceback on the calling thread (the objects
+        # may change or hold frames), but leave extra= fields intact for the formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Root logging via a bounded queue drained by a QueueListener thread.
+
+    Request threads only format the message and put it on the queue; the
+    listener thread does the JSON encoding and the blocking write to stdout.
+    The listener is per process (re-created after a fork) and flushed at exit.
+    """
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self._pid = None
+
+    def configure(self, level=LOG_LEVEL, fmt=LOG_FORMAT, queue_size=LOG_QUEUE_SIZE, stream=None):
+        if self._pid == os.getpid():
+            return self
+        self._pid = os.getpid()
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+        self.handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        self.listener = logging.handlers.QueueListener(self.handler.queue, output, respect_handler_level=False)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+
+        self.listener.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def snapshot(self):
+        if self.handler is None:
+            return {'configured': False}
+        return {'configured': True, 'level': logging.getLevelName(logging.getLogger().level),
+                'queued': self.handler.queue.qsize(), 'dropped': self.handler.dropped}
+
+
+log_pipeline = LogPipeline()
+
+
+def configure_logging(**kwargs):
+    return log_pipeline.configure(**kwargs)
@@ -15,10 +15,12 @@ class User(db.Model):
     daily_rate = db.Column(db.Float, nullable=False)
     email_verified = db.Column(db.Boolean, default=False)
     pass_up_used = db.Column(db.Boolean, default=False)
+    # Signups through this user's link, including the passed-up one; drives referral_order
+    referral_counter = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     onboarding_completed = db.Column(db.Boolean, default=False)
     freedom_pass_activated = db.Column(db.Boolean, default=False)
     freedom_pass_expires = db.Column(db.DateTime, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     verified_at = db.Column(db.DateTime, nullable=True)
     
     payments = db.relationship('Payment', backref='user', lazy=True)
@@ -36,7 +38,7 @@ class Payment(db.Model):
     stripe_session_id = db.Column(db.String(200), unique=True, nullable=False)
     amount = db.Column(db.Float, nullable=False)
     package_tier = db.Column(db.String(20), nullable=False)
-    payment_date = db.Column(db.DateTime, default=datetime.utcnow)
+    payment_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     status = db.Column(db.String(20), default='pending')
     
     def __repr__(self):
@@ -89,7 +91,7 @@ class PaymentCharge(db.Model):
     charge_type = db.Column(db.String(50), default='domain_initial')
     domain_name = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(20), default='pending')
-    payment_date = db.Column(db.DateTime, default=datetime.utcnow)
+    payment_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     user = db.relationship('User', backref='payment_charges', lazy=True)
     
@@ -108,7 +110,7 @@ class SubscriptionCharge(db.Model):
     billing_period_start = db.Column(db.DateTime, nullable=True)
     billing_period_end = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(20), default='active')
-    payment_date = db.Column(db.DateTime, default=datetime.utcnow)
+    payment_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     user = db.relationship('User', backref='subscription_charges', lazy=True)
     domain_rental = db.relationship('DomainRental', backref='subscription_charges', lazy=True)
@@ -137,8 +139,68 @@ class EmailLead(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), nullable=False, index=True)
     source = db.Column(db.String(50), default='sales_page')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     converted = db.Column(db.Boolean, default=False)
     
     def __repr__(self):
         return f'<EmailLead {self.email}>'
+
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    referral_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue_total = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    commission_total = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    active_rentals = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id} - {self.referral_count} referrals>'
+
+class DailyRollup(db.Model):
+    __tablename__ = 'daily_rollups'
+
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    referrals = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    package_revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    domain_revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    subscription_revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    failed_charges = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    commissions = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    rentals_started = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rentals_cancelled = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DailyRollup {self.day}>'
+
+class AffiliateClick(db.Model):
+    __tablename__ = 'affiliate_clicks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), nullable=False, index=True)
+    clicked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    host = db.Column(db.String(255), nullable=True)
+    referer = db.Column(db.String(500), nullable=True)
+    user_agent = db.Column(db.String(300), nullable=True)
+    ip_hash = db.Column(db.String(64), nullable=True)
+
+    def __repr__(self):
+        return f'<AffiliateClick {self.username} @ {self.clicked_at}>'
+
+class ImportCheckpoint(db.Model):
+    __tablename__ = 'import_checkpoints'
+
+    # sha256 of "<model>:<checkpoint name>"; the name defaults to the input file's path
+    key = db.Column(db.String(64), primary_key=True)
+    model = db.Column(db.String(50), nullable=False)
+    source = db.Column(db.String(1000), nullable=False)
+    source_size = db.Column(db.BigInteger, nullable=False)
+    source_mtime_ns = db.Column(db.BigInteger, nullable=False)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.model} {self.source} @ {self.rows_done}>'
@@ -1,25 +1,35 @@
-import os
+import logging
 import requests
 import xml.etree.ElementTree as ET
+from functools import lru_cache
 from typing import Dict, Optional
+from settings import settings as default_settings
+
+logger = logging.getLogger(__name__)
 
 class NamecheapClient:
-    def __init__(self):
-        self.api_user = os.getenv('NAMECHEAP_API_USER', '')
-        self.api_key = os.getenv('NAMECHEAP_API_KEY', '')
-        self.username = os.getenv('NAMECHEAP_USERNAME', self.api_user)
-        self.client_ip = os.getenv('NAMECHEAP_CLIENT_IP', '')
+    def __init__(self, settings=None):
+        settings = settings or default_settings
+        self.api_user = settings.namecheap_api_user
+        self.api_key = settings.namecheap_api_key
+        self.username = settings.namecheap_username or self.api_user
+        self.client_ip = settings.namecheap_client_ip
         
         # Use sandbox by default for testing
-        self.sandbox = os.getenv('NAMECHEAP_SANDBOX', 'true').lower() == 'true'
+        self.sandbox = settings.namecheap_sandbox
         self.base_url = 'https://api.sandbox.namecheap.com/xml.response' if self.sandbox else 'https://api.namecheap.com/xml.response'
+        # Explicit endpoint override (e.g. a local mock for load testing)
+        self.base_url = settings.namecheap_api_url or self.base_url
         
         # Mock mode for testing without credentials
-        self.mock_mode = os.getenv('NAMECHEAP_MOCK_MODE', 'true').lower() == 'true'
+        self.mock_mode = settings.namecheap_mock_mode
         
         if not self.mock_mode and (not self.api_key or not self.api_user or not self.client_ip):
-            print("[Namecheap] WARNING: API credentials not configured. Running in MOCK MODE.")
+            logger.warning("Namecheap API credentials not configured; running in mock mode")
             self.mock_mode = True
+
+        # Reused across calls so the TLS connection to the API stays open
+        self.session = requests.Session()
     
     def _make_request(self, command: str, extra_params: Dict = None) -> Optional[ET.Element]:
         """Make API request to Namecheap"""
@@ -35,23 +45,23 @@ class NamecheapClient:
             params.update(extra_params)
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=15)
+            response = self.session.get(self.base_url, params=params, timeout=15)
             
             if response.status_code != 200:
-                print(f"[Namecheap] HTTP Error: {response.status_code}")
+                logger.warning("Namecheap %s returned HTTP %s", command, response.status_code)
                 return None
             
             root = ET.fromstring(response.text)
             return root
             
         except Exception as e:
-            print(f"[Namecheap] Request error: {str(e)}")
+            logger.error("Namecheap %s request failed: %s", command, e)
             return None
     
     def check_domain_availability(self, domain_name: str) -> Dict:
         """Check if a domain is available for registration"""
         if self.mock_mode:
-            print(f"[Namecheap] MOCK MODE - Showing {domain_name} as available")
+            logger.debug("Namecheap mock mode: reporting %s as available", domain_name)
             return {
                 'success': True,
                 'available': True,
@@ -61,7 +71,7 @@ class NamecheapClient:
             }
         
         try:
-            print(f"[Namecheap] Checking domain: {domain_name}")
+            logger.debug("Namecheap: checking %s", domain_name)
             
             root = self._make_request('namecheap.domains.check', {
                 'DomainList': domain_name
@@ -80,7 +90,7 @@ class NamecheapClient:
             if status != 'OK':
                 errors = root.findall('.//Error')
                 error_msg = errors[0].text if errors else 'Unknown error'
-                print(f"[Namecheap] API Error: {error_msg}")
+                logger.warning("Namecheap availability check for %s failed: %s", domain_name, error_msg)
                 return {
                     'success': False,
                     'error': error_msg
@@ -98,7 +108,7 @@ class NamecheapClient:
             is_available = domain_result.get('Available', 'false').lower() == 'true'
             premium = domain_result.get('IsPremiumName', 'false').lower() == 'true'
             
-            print(f"[Namecheap] Domain {domain_name}: {'Available' if is_available else 'Not Available'}")
+            logger.debug("Namecheap: %s available=%s", domain_name, is_available)
             
             return {
                 'success': True,
@@ -109,7 +119,7 @@ class NamecheapClient:
             }
             
         except Exception as e:
-            print(f"[Namecheap] Unexpected error: {str(e)}")
+            logger.exception("Namecheap availability check for %s failed", domain_name)
             return {
                 'success': False,
                 'error': str(e)
@@ -118,7 +128,7 @@ class NamecheapClient:
     def register_domain(self, domain_name: str, user_email: str, user_full_name: str, years: int = 1) -> Dict:
         """Register a domain (requires contact information)"""
         if self.mock_mode:
-            print(f"[Namecheap] MOCK MODE - Simulating successful registration")
+            logger.info("Namecheap mock mode: simulating registration of %s", domain_name)
             return {
                 'success': True,
                 'domain': domain_name,
@@ -132,7 +142,7 @@ class NamecheapClient:
             first_name = name_parts[0] if name_parts else 'User'
             last_name = name_parts[1] if len(name_parts) > 1 else 'Account'
             
-            print(f"[Namecheap] Registering domain: {domain_name}")
+            logger.info("Namecheap: registering %s", domain_name)
             
             # Note: This requires complete contact information
             # For production, you'll need to collect full address, phone, etc.
@@ -192,7 +202,7 @@ class NamecheapClient:
             if status != 'OK':
                 errors = root.findall('.//Error')
                 error_msg = errors[0].text if errors else 'Unknown error'
-                print(f"[Namecheap] Registration Error: {error_msg}")
+                logger.error("Namecheap registration of %s failed: %s", domain_name, error_msg)
                 return {
                     'success': False,
                     'error': error_msg
@@ -213,7 +223,7 @@ class NamecheapClient:
             transaction_id = domain_result.get('TransactionID', '')
             
             if registered:
-                print(f"[Namecheap] Successfully registered {domain}")
+                logger.info("Namecheap: registered %s", domain, extra={'event': 'domain_registered', 'domain': domain})
                 return {
                     'success': True,
                     'domain': domain,
@@ -229,7 +239,7 @@ class NamecheapClient:
                 }
                 
         except Exception as e:
-            print(f"[Namecheap] Registration error: {str(e)}")
+            logger.exception("Namecheap registration of %s failed", domain_name)
             return {
                 'success': False,
                 'error': str(e)
@@ -286,3 +296,9 @@ class NamecheapClient:
                 'success': False,
                 'error': str(e)
             }
+
+
+@lru_cache(maxsize=1)
+def get_namecheap_client():
+    """Shared client, built once per process from the loaded settings"""
+    return NamecheapClient()
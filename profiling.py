@@ -0,0 +1,343 @@
+import os
+import sys
+import time
+import random
+import logging
+import threading
+from collections import deque, Counter
+from urllib.parse import urlsplit
+from flask import request, g, has_request_context, Response
+from sqlalchemy import event
+
+try:
+    import httpx
+except ImportError:  # only the OpenAI/Anthropic SDKs bring httpx in
+    httpx = None
+import requests
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+SLOW_REQUEST_MS = settings.slow_request_ms
+SLOW_REQUEST_HISTORY = settings.slow_request_history
+# Fraction of requests run under the stack sampler (0 disables profiling);
+# a profile is kept only when the request turns out to be slow
+PROFILE_SAMPLE_RATE = settings.profile_sample_rate
+PROFILE_INTERVAL_MS = settings.profile_interval_ms
+PROFILE_MAX_DEPTH = 64
+PROFILE_TOP_STACKS = 25
+# Bearer token Prometheus must send to /metrics; the endpoint is off when unset
+METRICS_TOKEN = settings.metrics_token
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """Samples the Python stacks of registered request threads on one background thread.
+
+    Each registered thread accumulates a Counter of collapsed stacks
+    ("root;...;leaf", flamegraph format). Sampling cost is a walk of each
+    registered thread's frames every interval; unregistered threads cost
+    nothing. Under gevent workers all greenlets share one OS thread, so
+    samples there show whichever greenlet happened to be running.
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._threads = {}  # thread id -> Counter
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='stack-sampler', daemon=True).start()
+
+    def start(self, thread_id):
+        with self._lock:
+            self._ensure_started()
+            self._threads[thread_id] = Counter()
+        self._wakeup.set()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._threads.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._threads:
+                self._wakeup.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._threads.items():
+                    frame = frames.get(thread_id)
+                    labels = []
+                    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    if labels:
+                        stacks[';'.join(reversed(labels))] += 1
+
+
+class RequestProfiler:
+    """Per-route request metrics: latency histograms, SQL and outbound HTTP time.
+
+    SQL is counted through SQLAlchemy cursor events on the app's engine;
+    outbound HTTP through requests.Session.send (requests, stripe) and
+    httpx.Client.send (OpenAI, Anthropic). Per-request totals live on flask.g,
+    so work done by background threads only shows up in the per-host
+    outbound totals. Requests slower than SLOW_REQUEST_MS are kept, with
+    their breakdown and (when sampled) their hottest stacks, for
+    /api/admin/slow-requests. Metrics are served in Prometheus text format.
+    """
+
+    def __init__(self, slow_ms=SLOW_REQUEST_MS, sample_rate=PROFILE_SAMPLE_RATE, history=SLOW_REQUEST_HISTORY):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.sampler = StackSampler()
+        self._lock = threading.Lock()
+        self._latency = {}   # (route, method) -> [bucket counts..., +Inf count, sum]
+        self._responses = Counter()  # (route, method, status)
+        self._route_totals = {}  # route -> {'sql_queries', 'sql_seconds', 'outbound_requests', 'outbound_seconds'}
+        self._outbound = {}  # host -> [requests, errors, seconds]
+        self._slow = deque(maxlen=history)
+        self.slow_requests = 0
+
+    # -- request lifecycle ------------------------------------------------
+
+    def before_request(self):
+        g._profile = {'start': time.perf_counter(), 'sql_queries': 0, 'sql_seconds': 0.0,
+                      'outbound_requests': 0, 'outbound_seconds': 0.0, 'status': 500, 'sampled': False}
+        if self.sample_rate and random.random() < self.sample_rate:
+            g._profile['sampled'] = True
+            self.sampler.start(threading.get_ident())
+
+    def after_request(self, response):
+        profile = g.get('_profile')
+        if profile is not None:
+            profile['status'] = response.status_code
+        return response
+
+    def teardown_request(self, exc=None):
+        # Teardown runs once a streamed (SSE) response has finished, so the
+        # latency covers the whole stream
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return
+        elapsed = time.perf_counter() - profile['start']
+        stacks = self.sampler.stop(threading.get_ident()) if profile['sampled'] else None
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        method = request.method
+        self._observe(route, method, profile['status'], elapsed, profile)
+        if elapsed * 1000 >= self.slow_ms:
+            self._record_slow(route, method, elapsed, profile, stacks)
+
+    def _observe(self, route, method, status, elapsed, profile):
+        with self._lock:
+            histogram = self._latency.get((route, method))
+            if histogram is None:
+                histogram = self._latency[(route, method)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(LATENCY_BUCKETS)] += 1
+            histogram[-1] += elapsed
+            self._responses[(route, method, status)] += 1
+            totals = self._route_totals.setdefault(route, {'sql_queries': 0, 'sql_seconds': 0.0,
+                                                           'outbound_requests': 0, 'outbound_seconds': 0.0})
+            for key in totals:
+                totals[key] += profile[key]
+
+    def _record_slow(self, route, method, elapsed, profile, stacks):
+        entry = {
+            'at': time.time(),
+            'method': method,
+            'route': route,
+            'path': request.path,
+            'status': profile['status'],
+            'duration_ms': round(elapsed * 1000, 1),
+            'sql_queries': profile['sql_queries'],
+            'sql_ms': round(profile['sql_seconds'] * 1000, 1),
+            'outbound_requests': profile['outbound_requests'],
+            'outbound_ms': round(profile['outbound_seconds'] * 1000, 1),
+        }
+        if stacks:
+            entry['samples'] = sum(stacks.values())
+            entry['stacks'] = [{'stack': stack, 'samples': count}
+                               for stack, count in stacks.most_common(PROFILE_TOP_STACKS)]
+        with self._lock:
+            self.slow_requests += 1
+            self._slow.append(entry)
+        logger.warning("Slow request %s %s took %sms", method, request.path, entry['duration_ms'],
+                       extra={'event': 'slow_request', 'route': route, 'status': entry['status'],
+                              'duration_ms': entry['duration_ms'], 'sql_queries': entry['sql_queries'],
+                              'sql_ms': entry['sql_ms'], 'outbound_ms': entry['outbound_ms']})
+
+    # -- SQL and outbound HTTP --------------------------------------------
+
+    def instrument_engine(self, engine):
+        if getattr(engine, '_rizzosai_profiled', False):
+            return engine
+        engine._rizzosai_profiled = True
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('_profile_query_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('_profile_query_start')
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            if has_request_context():
+                profile = g.get('_profile')
+                if profile is not None:
+                    profile['sql_queries'] += 1
+                    profile['sql_seconds'] += elapsed
+
+        @event.listens_for(engine, 'handle_error')
+        def handle_error(exception_context):
+            starts = exception_context.connection.info.get('_profile_query_start') if exception_context.connection else None
+            if starts:
+                starts.pop()
+
+        return engine
+
+    def record_outbound(self, url, elapsed, failed=False):
+        host = urlsplit(str(url)).hostname or 'unknown'
+        with self._lock:
+            stats = self._outbound.setdefault(host, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += int(failed)
+            stats[2] += elapsed
+        if has_request_context():
+            profile = g.get('_profile')
+            if profile is not None:
+                profile['outbound_requests'] += 1
+                profile['outbound_seconds'] += elapsed
+
+    def _wrap_send(self, cls):
+        original = cls.send
+        if getattr(original, '_rizzosai_profiled', False):
+            return
+        profiler = self
+
+        def send(client, outgoing, *args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                response = original(client, outgoing, *args, **kwargs)
+                failed = response.status_code >= 500
+                return response
+            finally:
+                profiler.record_outbound(outgoing.url, time.perf_counter() - start, failed)
+
+        send._rizzosai_profiled = True
+        cls.send = send
+
+    def instrument_http_clients(self):
+        self._wrap_send(requests.Session)
+        if httpx is not None:
+            self._wrap_send(httpx.Client)
+
+    # -- reporting --------------------------------------------------------
+
+    def slow_request_log(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for (route, method), histogram in self._latency.items():
+                count = sum(histogram[:-1])
+                routes[f"{method} {route}"] = {'count': count, 'avg_ms': round(histogram[-1] / count * 1000, 2) if count else 0}
+            outbound = {host: {'requests': s[0], 'errors': s[1], 'seconds': round(s[2], 3)} for host, s in self._outbound.items()}
+            return {'routes': routes, 'outbound': outbound, 'slow_requests': self.slow_requests,
+                    'slow_threshold_ms': self.slow_ms, 'profile_sample_rate': self.sample_rate}
+
+    def prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            metric('http_request_duration_seconds', 'histogram', 'Request latency by route, including streamed bodies')
+            for (route, method), histogram in sorted(self._latency.items()):
+                labels = f'route="{_escape(route)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += histogram[len(LATENCY_BUCKETS)]
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+            metric('http_responses_total', 'counter', 'Responses by route, method and status code')
+            for (route, method, status), count in sorted(self._responses.items()):
+                lines.append(f'http_responses_total{{route="{_escape(route)}",method="{method}",status="{status}"}} {count}')
+
+            for key, name, help_text in (
+                ('sql_queries', 'http_request_sql_queries_total', 'SQL statements executed while serving the route'),
+                ('sql_seconds', 'http_request_sql_seconds_total', 'Time spent in SQL while serving the route'),
+                ('outbound_requests', 'http_request_outbound_requests_total', 'Outbound HTTP calls made while serving the route'),
+                ('outbound_seconds', 'http_request_outbound_seconds_total', 'Time spent in outbound HTTP while serving the route'),
+            ):
+                metric(name, 'counter', help_text)
+                for route, totals in sorted(self._route_totals.items()):
+                    value = f"{float(totals[key]):.6f}" if key.endswith('_seconds') else f"{int(totals[key]):d}"
+                    lines.append(f'{name}{{route="{_escape(route)}"}} {value}')
+
+            metric('outbound_http_requests_total', 'counter', 'Outbound HTTP calls by host (all threads)')
+            for host, (count, _, _) in sorted(self._outbound.items()):
+                lines.append(f'outbound_http_requests_total{{host="{_escape(host)}"}} {count}')
+            metric('outbound_http_errors_total', 'counter', 'Outbound HTTP calls that failed or returned 5xx')
+            for host, (_, errors, _) in sorted(self._outbound.items()):
+                lines.append(f'outbound_http_errors_total{{host="{_escape(host)}"}} {errors}')
+            metric('outbound_http_seconds_total', 'counter', 'Time spent in outbound HTTP by host')
+            for host, (_, _, seconds) in sorted(self._outbound.items()):
+                lines.append(f'outbound_http_seconds_total{{host="{_escape(host)}"}} {seconds:.6f}')
+
+            metric('http_slow_requests_total', 'counter', f'Requests slower than {self.slow_ms:g}ms')
+            lines.append(f'http_slow_requests_total {self.slow_requests}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def init_profiling(app, engine, profiler, metrics_token=METRICS_TOKEN):
+    """Attach the profiler to app's request lifecycle, engine and HTTP clients, and add /metrics"""
+    app.before_request(profiler.before_request)
+    app.after_request(profiler.after_request)
+    app.teardown_request(profiler.teardown_request)
+    profiler.instrument_engine(engine)
+    profiler.instrument_http_clients()
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        if not metrics_token or request.headers.get('Authorization') != f"Bearer {metrics_token}":
+            return Response('Not Found\n', status=404, mimetype='text/plain')
+        return Response(profiler.prometheus(), mimetype='text/plain; version=0.0.4')
+
+    return profiler
+
+
+request_profiler = RequestProfiler()
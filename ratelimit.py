@@ -0,0 +1,148 @@
+import time
+import threading
+from functools import wraps
+from flask import request, jsonify
+from settings import settings
+
+try:
+    import redis
+except ImportError:  # optional; only needed for the shared backend
+    redis = None
+
+RATE_LIMIT_REDIS_URL = settings.rate_limit_redis_url
+RATE_LIMIT_ENABLED = settings.rate_limit_enabled
+MEMORY_BACKEND_MAX_KEYS = settings.rate_limit_max_keys
+# Proxies in front of the app that append to X-Forwarded-For (Render's router is one)
+TRUSTED_PROXY_HOPS = settings.trusted_proxy_hops
+
+
+def client_ip(trusted_hops=None):
+    """Client address as seen by the outermost trusted proxy.
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so with N trusted proxies the client is the Nth entry
+    from the right; entries further left come from the client and can be
+    forged. With no trusted proxies, or no header, the socket peer is used.
+    """
+    hops = TRUSTED_PROXY_HOPS if trusted_hops is None else trusted_hops
+    peer = request.remote_addr or '127.0.0.1'
+    forwarded_for = [entry.strip() for entry in request.headers.get('X-Forwarded-For', '').split(',') if entry.strip()]
+    if hops <= 0 or not forwarded_for:
+        return peer
+    return forwarded_for[-min(hops, len(forwarded_for))]
+
+
+def parse_rate(value, default):
+    """Parse "limit/seconds" (e.g. "20/60") from configuration"""
+    value = value or default
+    limit, _, seconds = value.partition('/')
+    return int(limit), int(seconds or 60)
+
+
+class MemoryBackend:
+    """Per-process fixed-window counters; the limiter weights two of them into a sliding window"""
+
+    def __init__(self, max_keys=MEMORY_BACKEND_MAX_KEYS):
+        self.max_keys = max_keys
+        self._counters = {}  # key -> [window index, count, previous count]
+        self._lock = threading.Lock()
+
+    def hit(self, key, window_index, window_seconds):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= self.max_keys:
+                    self._evict(window_index)
+                counter = self._counters[key] = [window_index, 0, 0]
+            elif counter[0] != window_index:
+                counter[2] = counter[1] if counter[0] == window_index - 1 else 0
+                counter[0] = window_index
+                counter[1] = 0
+            counter[1] += 1
+            return counter[1], counter[2]
+
+    def _evict(self, window_index):
+        stale = [key for key, counter in self._counters.items() if counter[0] < window_index - 1]
+        for key in stale:
+            del self._counters[key]
+        if len(self._counters) >= self.max_keys:
+            self._counters.clear()
+
+
+class RedisBackend:
+    """Counters shared by every worker and instance, kept in Redis"""
+
+    def __init__(self, url, prefix='ratelimit'):
+        if redis is None:
+            raise RuntimeError('RATE_LIMIT_REDIS_URL is set but the redis package is not installed')
+        self.client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.prefix = prefix
+
+    def hit(self, key, window_index, window_seconds):
+        current_key = f"{self.prefix}:{key}:{window_index}"
+        previous_key = f"{self.prefix}:{key}:{window_index - 1}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, window_seconds * 2)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+
+class RateLimiter:
+    """Sliding-window rate limits per route and client IP.
+
+    Each check is one counter increment. The previous window's count is
+    weighted by how much of it still overlaps the sliding window, which
+    approximates a true sliding log without storing timestamps. Checks run
+    before the view body, so rejected requests do no upstream work. If the
+    backend errors (e.g. Redis is unreachable), requests are let through.
+    """
+
+    def __init__(self, backend=None, enabled=RATE_LIMIT_ENABLED):
+        self.backend = backend or MemoryBackend()
+        self.enabled = enabled
+        self.stats = {'allowed': 0, 'rejected': 0, 'backend_errors': 0}
+
+    def check(self, name, limit, window_seconds, key):
+        """Return (allowed, retry_after_seconds)"""
+        now = time.time()
+        window_index = int(now // window_seconds)
+        elapsed = (now % window_seconds) / window_seconds
+        try:
+            current, previous = self.backend.hit(f"{name}:{key}", window_index, window_seconds)
+        except Exception:
+            self.stats['backend_errors'] += 1
+            return True, 0
+        weighted = current + previous * (1 - elapsed)
+        if weighted > limit:
+            self.stats['rejected'] += 1
+            return False, max(1, int(window_seconds * (1 - elapsed)) + 1)
+        self.stats['allowed'] += 1
+        return True, 0
+
+    def limit(self, name, rate, key_func=client_ip):
+        """Decorator: allow `rate` = (limit, seconds) requests per client for this route"""
+        limit, window_seconds = rate
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    allowed, retry_after = self.check(name, limit, window_seconds, key_func())
+                    if not allowed:
+                        response = jsonify({'error': 'Too many requests. Please try again shortly.'})
+                        response.status_code = 429
+                        response.headers['Retry-After'] = str(retry_after)
+                        return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        return dict(self.stats, backend=type(self.backend).__name__, enabled=self.enabled)
+
+
+def create_rate_limiter():
+    backend = RedisBackend(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else MemoryBackend()
+    return RateLimiter(backend)
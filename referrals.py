@@ -0,0 +1,179 @@
+import logging
+import threading
+from datetime import datetime
+from models import db, User, Referral
+
+PASS_UP_ORDER = 2
+
+logger = logging.getLogger(__name__)
+
+
+class ReferralAttribution:
+    """Credits signups to referrers, applying the 2nd-referral pass-up rule.
+
+    The referrer's counter is bumped in a single UPDATE ... RETURNING where the
+    database supports it, and their pass-up flag set when the returned order
+    is their 2nd referral. The UPDATE holds the referrer's row lock until the
+    caller commits, so concurrent signups under one affiliate are ordered
+    correctly.
+    The site owner's id is looked up once and then cached.
+    """
+
+    def __init__(self, site_owner_username):
+        self.site_owner_username = site_owner_username.lower()
+        self._site_owner_id = None
+        self._lock = threading.Lock()
+
+    def site_owner_id(self):
+        if self._site_owner_id is None:
+            owner_id = db.session.execute(
+                db.select(User.id).where(User.username == self.site_owner_username)
+            ).scalar_one_or_none()
+            # Only cache hits, so the owner is picked up once their account exists
+            if owner_id is not None:
+                with self._lock:
+                    self._site_owner_id = owner_id
+        return self._site_owner_id
+
+    def _claim_order(self, referrer_username, owner_id):
+        """Increment the referrer's counter; return (referrer_id, username, order) or None"""
+        stmt = (
+            db.update(User)
+            .where(User.username == referrer_username, User.email_verified.is_(True))
+            .values(referral_counter=User.referral_counter + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.engine.dialect.update_returning:
+            row = db.session.execute(stmt.returning(User.id, User.username, User.referral_counter)).first()
+        else:
+            result = db.session.execute(stmt)
+            row = None
+            if result.rowcount:
+                row = db.session.execute(
+                    db.select(User.id, User.username, User.referral_counter)
+                    .where(User.username == referrer_username)
+                ).first()
+        if row is None:
+            return None
+
+        # The pass-up flag is decided from the counter the UPDATE produced, not
+        # inside the same SET list: MySQL evaluates SET assignments left to
+        # right, so an expression there could see either counter value. The
+        # referrer's row is still locked by the UPDATE above.
+        referrer_id, _, referral_order = row
+        if referral_order == PASS_UP_ORDER and owner_id is not None and referrer_id != owner_id:
+            db.session.execute(
+                db.update(User)
+                .where(User.id == referrer_id)
+                .values(pass_up_used=True)
+                .execution_options(synchronize_session=False)
+            )
+        return tuple(row)
+
+    def attribute(self, referrer_username, referred_user, commission_amount=None, label='REFERRAL'):
+        """Record a referral for referred_user in the current transaction.
+
+        Returns the new Referral, or None if the referrer is unknown or unverified.
+        The caller owns the transaction and must commit.
+        """
+        if not referrer_username:
+            return None
+
+        owner_id = self.site_owner_id()
+        claimed = self._claim_order(referrer_username.lower(), owner_id)
+        if claimed is None:
+            return None
+        referrer_id, referrer_name, referral_order = claimed
+
+        passed_up = referral_order == PASS_UP_ORDER and owner_id is not None and owner_id != referrer_id
+        if passed_up:
+            logger.info("%s pass-up: %s's referral #%d (%s) passed up to %s", label, referrer_name, referral_order,
+                        referred_user.username, self.site_owner_username,
+                        extra={'event': 'referral_pass_up', 'referrer': referrer_name, 'referred': referred_user.username,
+                               'referral_order': referral_order, 'recipient': self.site_owner_username})
+        elif referral_order == PASS_UP_ORDER:
+            logger.warning("Pass-up skipped: site owner %r not found or is the referrer", self.site_owner_username,
+                           extra={'event': 'referral_pass_up_failed', 'referrer': referrer_name,
+                                  'referred': referred_user.username})
+        else:
+            logger.debug("Direct %s: %s's referral #%d (%s)", label, referrer_name, referral_order, referred_user.username,
+                         extra={'event': 'referral_direct', 'referrer': referrer_name, 'referred': referred_user.username,
+                                'referral_order': referral_order})
+
+        referral = Referral(  # type: ignore
+            referrer_id=owner_id if passed_up else referrer_id,
+            referred_id=referred_user.id,
+            referral_order=referral_order,
+            passed_up=passed_up,
+            pass_up_recipient=owner_id if passed_up else None,
+            created_at=datetime.utcnow()
+        )
+        if commission_amount is not None:
+            referral.commission_amount = commission_amount
+        db.session.add(referral)
+        return referral
+
+    def attribute_many(self, signups, commission_amount=None):
+        """Attribute many signups at once for backfills and imports.
+
+        signups is an iterable of (referrer_username, referred_user_id, created_at)
+        in signup order. Referrers are fetched and locked in one query, orders are
+        assigned in memory, and counters and referrals are written with one
+        executemany each. Returns the number of referrals inserted.
+        """
+        signups = [(name.lower(), referred_id, created_at) for name, referred_id, created_at in signups if name]
+        if not signups:
+            return 0
+
+        owner_id = self.site_owner_id()
+        usernames = sorted({name for name, _, _ in signups})
+        referrers = {}
+        for chunk_start in range(0, len(usernames), 500):
+            chunk = usernames[chunk_start:chunk_start + 500]
+            rows = db.session.execute(
+                db.select(User.id, User.username, User.referral_counter, User.pass_up_used)
+                .where(User.username.in_(chunk), User.email_verified.is_(True))
+                .order_by(User.id)
+                .with_for_update()
+            ).all()
+            for row in rows:
+                referrers[row.username] = {
+                    'id': row.id,
+                    'counter': row.referral_counter or 0,
+                    'pass_up_used': bool(row.pass_up_used)
+                }
+
+        referral_rows = []
+        for name, referred_id, created_at in signups:
+            referrer = referrers.get(name)
+            if referrer is None:
+                continue
+            referrer['counter'] += 1
+            order = referrer['counter']
+            passed_up = order == PASS_UP_ORDER and owner_id is not None and owner_id != referrer['id']
+            if passed_up:
+                referrer['pass_up_used'] = True
+            row = {
+                'referrer_id': owner_id if passed_up else referrer['id'],
+                'referred_id': referred_id,
+                'referral_order': order,
+                'passed_up': passed_up,
+                'pass_up_recipient': owner_id if passed_up else None,
+                'created_at': created_at or datetime.utcnow()
+            }
+            if commission_amount is not None:
+                row['commission_amount'] = commission_amount
+            referral_rows.append(row)
+
+        if not referral_rows:
+            return 0
+
+        db.session.execute(
+            db.update(User.__table__)
+            .where(User.__table__.c.id == db.bindparam('b_id'))
+            .values(referral_counter=db.bindparam('b_counter'), pass_up_used=db.bindparam('b_pass_up_used')),
+            [{'b_id': r['id'], 'b_counter': r['counter'], 'b_pass_up_used': r['pass_up_used']} for r in referrers.values()]
+        )
+        db.session.execute(db.insert(Referral.__table__), referral_rows)
+        return len(referral_rows)
@@ -0,0 +1,170 @@
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional
+
+from settings import settings
+
+RENDER_API_BASE = settings.render_api_base
+
+
+class RenderClient:
+    """Thin Render API client with a pooled session and a short-TTL read cache.
+
+    list/get results are cached for `cache_ttl` seconds and dropped whenever a
+    service is restarted, suspended or resumed through this client, so the
+    admin bot can answer follow-up questions without hitting the API again.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 cache_ttl: Optional[float] = None, max_workers: int = 8, timeout: float = 10):
+        self.api_key = api_key if api_key is not None else settings.render_api_key
+        self.base_url = (base_url or RENDER_API_BASE).rstrip('/')
+        self.cache_ttl = cache_ttl if cache_ttl is not None else settings.render_cache_ttl
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json"
+        })
+
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _cached(self, key):
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+            self._cache.pop(key, None)
+        return None
+
+    def _remember(self, key, value):
+        if self.cache_ttl > 0:
+            with self._cache_lock:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, value)
+        return value
+
+    def invalidate(self, service_id: Optional[str] = None):
+        with self._cache_lock:
+            if service_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(('service', service_id), None)
+                self._cache.pop(('services',), None)
+
+    def _get(self, path: str, params: Optional[Dict] = None):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, path: str):
+        response = self.session.post(f"{self.base_url}{path}", timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _unwrap(item: Dict, key: str) -> Dict:
+        # List endpoints return [{"cursor": ..., "<key>": {...}}]; accept bare objects too
+        return item.get(key, item) if isinstance(item, dict) else item
+
+    def list_services(self, use_cache: bool = True, page_size: int = 100) -> List[Dict]:
+        """Return every service in the account, following cursor pagination"""
+        if use_cache:
+            cached = self._cached(('services',))
+            if cached is not None:
+                return cached
+
+        services = []
+        cursor = None
+        while True:
+            params = {'limit': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            page = self._get('/services', params)
+            if not page:
+                break
+            services.extend(self._unwrap(item, 'service') for item in page)
+            next_cursor = page[-1].get('cursor') if isinstance(page[-1], dict) else None
+            if len(page) < page_size or not next_cursor or next_cursor == cursor:
+                break
+            cursor = next_cursor
+
+        with self._cache_lock:
+            if self.cache_ttl > 0:
+                expires = time.monotonic() + self.cache_ttl
+                for service in services:
+                    if service.get('id'):
+                        self._cache[('service', service['id'])] = (expires, service)
+        return self._remember(('services',), services)
+
+    def get_service(self, service_id: str, use_cache: bool = True) -> Dict:
+        if use_cache:
+            cached = self._cached(('service', service_id))
+            if cached is not None:
+                return cached
+        return self._remember(('service', service_id), self._get(f'/services/{service_id}'))
+
+    def get_latest_deploy(self, service_id: str) -> Optional[Dict]:
+        deploys = self._get(f'/services/{service_id}/deploys', {'limit': 1})
+        return self._unwrap(deploys[0], 'deploy') if deploys else None
+
+    def _service_status(self, service: Dict) -> Dict:
+        status = {
+            "id": service.get("id"),
+            "name": service.get("name"),
+            "type": service.get("type"),
+            "suspended": service.get("suspended"),
+            "updatedAt": service.get("updatedAt")
+        }
+        try:
+            deploy = self.get_latest_deploy(service["id"])
+            if deploy:
+                status["deploy_status"] = deploy.get("status")
+                status["deploy_finishedAt"] = deploy.get("finishedAt")
+        except Exception as e:
+            status["error"] = str(e)
+        return status
+
+    def get_services_status(self, service_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Return status plus latest deploy for many services, fetched concurrently"""
+        if service_ids:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                services = list(pool.map(self._safe_get_service, service_ids))
+        else:
+            services = self.list_services()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(
+                lambda s: s if s.get("error") else self._service_status(s),
+                services
+            ))
+
+    def _safe_get_service(self, service_id: str) -> Dict:
+        try:
+            return self.get_service(service_id)
+        except Exception as e:
+            return {"id": service_id, "error": str(e)}
+
+    def restart_service(self, service_id: str):
+        self._post(f'/services/{service_id}/restart')
+        self.invalidate(service_id)
+
+    def suspend_service(self, service_id: str):
+        self._post(f'/services/{service_id}/suspend')
+        self.invalidate(service_id)
+
+    def resume_service(self, service_id: str):
+        self._post(f'/services/{service_id}/resume')
+        self.invalidate(service_id)
@@ -0,0 +1,190 @@
+from datetime import datetime, date
+from sqlalchemy.dialects import postgresql, sqlite, mysql
+from models import db, User, Payment, Referral, DomainRental, PaymentCharge, SubscriptionCharge, UserStats, DailyRollup
+
+REVENUE_COLUMNS = {
+    'package': 'package_revenue',
+    'domain': 'domain_revenue',
+    'subscription': 'subscription_revenue',
+}
+
+ACTIVE_RENTAL_STATUS = 'active'
+
+
+def _day(value):
+    if value is None:
+        return datetime.utcnow().date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _increment(model, key, increments):
+    """Add increments to the rollup row identified by key, creating it if needed.
+
+    Uses a single INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE so concurrent
+    writers never lose an increment or race on row creation.
+    """
+    table = model.__table__
+    now = datetime.utcnow()
+    values = dict(key, updated_at=now, **increments)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        insert = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table).values(**values)
+        updates = {col: table.c[col] + insert.excluded[col] for col in increments}
+        updates['updated_at'] = insert.excluded.updated_at
+        db.session.execute(insert.on_conflict_do_update(index_elements=list(key), set_=updates))
+        return
+
+    if dialect == 'mysql':
+        insert = mysql.insert(table).values(**values)
+        updates = {col: table.c[col] + insert.inserted[col] for col in increments}
+        updates['updated_at'] = insert.inserted.updated_at
+        db.session.execute(insert.on_duplicate_key_update(**updates))
+        return
+
+    where = [table.c[col] == value for col, value in key.items()]
+    result = db.session.execute(
+        db.update(table).where(*where).values(updated_at=now, **{col: table.c[col] + amount for col, amount in increments.items()})
+    )
+    if not result.rowcount:
+        db.session.execute(db.insert(table).values(**values))
+
+
+def record_signup(user):
+    _increment(DailyRollup, {'day': _day(user.created_at)}, {'signups': 1})
+    _increment(UserStats, {'user_id': user.id}, {'referral_count': 0})
+
+
+def record_referral(referral):
+    commission = referral.commission_amount or 0.0
+    _increment(UserStats, {'user_id': referral.referrer_id}, {'referral_count': 1, 'commission_total': commission})
+    _increment(DailyRollup, {'day': _day(referral.created_at)}, {'referrals': 1, 'commissions': commission})
+
+
+def record_charge(user_id, amount, kind, when=None):
+    """Record a completed charge; kind is one of package, domain or subscription"""
+    _increment(UserStats, {'user_id': user_id}, {'revenue_total': amount or 0.0})
+    _increment(DailyRollup, {'day': _day(when)}, {REVENUE_COLUMNS[kind]: amount or 0.0})
+
+
+def record_failed_charge(when=None):
+    _increment(DailyRollup, {'day': _day(when)}, {'failed_charges': 1})
+
+
+def record_rental_status(user_id, old_status, new_status, when=None):
+    """Track active rental counts across a rental status transition (old_status None for new rentals)"""
+    delta = int(new_status == ACTIVE_RENTAL_STATUS) - int(old_status == ACTIVE_RENTAL_STATUS)
+    if delta:
+        _increment(UserStats, {'user_id': user_id}, {'active_rentals': delta})
+    daily = {}
+    if old_status is None:
+        daily['rentals_started'] = 1
+    if new_status == 'cancelled' and old_status != 'cancelled':
+        daily['rentals_cancelled'] = 1
+    if daily:
+        _increment(DailyRollup, {'day': _day(when)}, daily)
+
+
+def earnings_expression():
+    """Daily rate times credited referrals, with a floor of one (as shown to affiliates)"""
+    referral_count = db.func.coalesce(UserStats.referral_count, 0)
+    return db.func.coalesce(User.daily_rate, 0) * db.case((referral_count > 1, referral_count), else_=1)
+
+
+def user_stats_query():
+    """Users joined to their rollup row, with referral_count and earnings columns"""
+    return (
+        db.session.query(
+            User,
+            db.func.coalesce(UserStats.referral_count, 0).label('referral_count'),
+            earnings_expression().label('earnings'),
+        )
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+    )
+
+
+def platform_totals():
+    totals = db.session.query(
+        db.func.coalesce(db.func.sum(DailyRollup.signups), 0),
+        db.func.coalesce(db.func.sum(DailyRollup.referrals), 0),
+        db.func.coalesce(db.func.sum(DailyRollup.package_revenue), 0.0),
+        db.func.coalesce(db.func.sum(DailyRollup.domain_revenue), 0.0),
+        db.func.coalesce(db.func.sum(DailyRollup.subscription_revenue), 0.0),
+    ).one()
+    active_rentals = db.session.query(db.func.coalesce(db.func.sum(UserStats.active_rentals), 0)).scalar()
+    return {
+        'total_users': int(totals[0]),
+        'active_referrals': int(totals[1]),
+        'total_revenue': float(totals[2]),
+        'domain_revenue': float(totals[3]),
+        'subscription_revenue': float(totals[4]),
+        'active_rentals': int(active_rentals)
+    }
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from the source tables with GROUP BY queries"""
+    daily = {}
+    users = {}
+
+    def day_row(day):
+        return daily.setdefault(_day(day), {'signups': 0, 'referrals': 0, 'package_revenue': 0.0, 'domain_revenue': 0.0,
+                                            'subscription_revenue': 0.0, 'failed_charges': 0, 'commissions': 0.0,
+                                            'rentals_started': 0, 'rentals_cancelled': 0})
+
+    def user_row(user_id):
+        return users.setdefault(user_id, {'referral_count': 0, 'revenue_total': 0.0, 'commission_total': 0.0, 'active_rentals': 0})
+
+    for day, count in db.session.query(db.func.date(User.created_at), db.func.count(User.id)).group_by(db.func.date(User.created_at)):
+        day_row(day)['signups'] += count
+    for (user_id,) in db.session.query(User.id):
+        user_row(user_id)
+
+    referral_day = db.func.date(Referral.created_at)
+    for day, count, commission in db.session.query(referral_day, db.func.count(Referral.id), db.func.sum(Referral.commission_amount)).group_by(referral_day):
+        row = day_row(day)
+        row['referrals'] += count
+        row['commissions'] += commission or 0.0
+    for user_id, count, commission in db.session.query(Referral.referrer_id, db.func.count(Referral.id), db.func.sum(Referral.commission_amount)).group_by(Referral.referrer_id):
+        row = user_row(user_id)
+        row['referral_count'] += count
+        row['commission_total'] += commission or 0.0
+
+    charge_sources = [
+        (Payment, Payment.status == 'completed', 'package_revenue'),
+        (PaymentCharge, PaymentCharge.status == 'completed', 'domain_revenue'),
+        (SubscriptionCharge, SubscriptionCharge.status == 'paid', 'subscription_revenue'),
+    ]
+    for model, condition, column in charge_sources:
+        charge_day = db.func.date(model.payment_date)
+        for day, amount in db.session.query(charge_day, db.func.sum(model.amount)).filter(condition).group_by(charge_day):
+            day_row(day)[column] += amount or 0.0
+        for user_id, amount in db.session.query(model.user_id, db.func.sum(model.amount)).filter(condition).group_by(model.user_id):
+            user_row(user_id)['revenue_total'] += amount or 0.0
+
+    failed_day = db.func.date(SubscriptionCharge.payment_date)
+    for day, count in db.session.query(failed_day, db.func.count(SubscriptionCharge.id)).filter(SubscriptionCharge.status == 'failed').group_by(failed_day):
+        day_row(day)['failed_charges'] += count
+
+    started_day = db.func.date(db.func.coalesce(DomainRental.rent_started_at, DomainRental.created_at))
+    for day, count in db.session.query(started_day, db.func.count(DomainRental.id)).group_by(started_day):
+        day_row(day)['rentals_started'] += count
+    cancelled_day = db.func.date(DomainRental.updated_at)
+    for day, count in db.session.query(cancelled_day, db.func.count(DomainRental.id)).filter(DomainRental.rental_status == 'cancelled').group_by(cancelled_day):
+        day_row(day)['rentals_cancelled'] += count
+    for user_id, count in db.session.query(DomainRental.user_id, db.func.count(DomainRental.id)).filter(DomainRental.rental_status == ACTIVE_RENTAL_STATUS).group_by(DomainRental.user_id):
+        user_row(user_id)['active_rentals'] += count
+
+    now = datetime.utcnow()
+    db.session.execute(db.delete(DailyRollup.__table__))
+    db.session.execute(db.delete(UserStats.__table__))
+    if daily:
+        db.session.execute(db.insert(DailyRollup.__table__), [dict(values, day=day, updated_at=now) for day, values in daily.items()])
+    if users:
+        db.session.execute(db.insert(UserStats.__table__), [dict(values, user_id=user_id, updated_at=now) for user_id, values in users.items()])
+    db.session.commit()
+    return {'days': len(daily), 'users': len(users)}
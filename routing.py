@@ -0,0 +1,143 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from settings import settings
+
+# Usernames pass str.isalnum() at signup, which accepts any Unicode letter or
+# digit ([^\W_] is the regex equivalent); domain-flow accounts take the first
+# domain label, which may also contain inner hyphens
+USERNAME_PATTERN = re.compile(r'^[^\W_](?:(?:[^\W_]|-){0,48}[^\W_])?$')
+
+AFFILIATE_CACHE_MAX_ENTRIES = settings.affiliate_cache_max_entries
+AFFILIATE_NEGATIVE_TTL = settings.affiliate_negative_ttl
+AFFILIATE_SET_REFRESH_SECONDS = settings.affiliate_set_refresh_seconds
+
+
+def is_username_format(value):
+    return bool(value) and USERNAME_PATTERN.match(value) is not None
+
+
+class HostRouter:
+    """Maps a request host to the landing page for that host.
+
+    Rules are (host substring, page) pairs checked in order, compiled into one
+    regex; the answer for each distinct host is memoised, so a request costs
+    one dict lookup.
+    """
+
+    def __init__(self, rules, default, max_hosts=256):
+        self.rules = list(rules)
+        self.default = default
+        self.max_hosts = max_hosts
+        self._pattern = re.compile('|'.join(f'(?P<r{i}>{re.escape(marker)})' for i, (marker, _) in enumerate(self.rules))) if self.rules else None
+        self._hosts = {}
+
+    def page_for(self, host):
+        host = (host or '').lower()
+        page = self._hosts.get(host)
+        if page is None:
+            page = self.default
+            match = self._pattern.search(host) if self._pattern else None
+            if match:
+                page = self.rules[int(match.lastgroup[1:])][1]
+            if len(self._hosts) >= self.max_hosts:
+                self._hosts.clear()
+            self._hosts[host] = page
+        return page
+
+
+class AffiliateResolver:
+    """Answers "is this path a verified affiliate's username?" from memory.
+
+    Paths that cannot be usernames are rejected by format alone. Verified
+    usernames are held as an in-memory set, loaded in full on first use and
+    reloaded every refresh_seconds (so verifications on other workers and
+    removals show up), and updated immediately by mark_verified. A name not in
+    the set is checked against the database once and then remembered as a
+    miss for negative_ttl seconds in a bounded LRU.
+    """
+
+    def __init__(self, lookup, load_all=None, max_entries=AFFILIATE_CACHE_MAX_ENTRIES,
+                 negative_ttl=AFFILIATE_NEGATIVE_TTL, refresh_seconds=AFFILIATE_SET_REFRESH_SECONDS):
+        self.lookup = lookup
+        self.load_all = load_all
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.refresh_seconds = refresh_seconds
+        self._known = set()
+        self._loaded_at = None
+        self._misses = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.stats = {'rejected': 0, 'hits': 0, 'negative_hits': 0, 'lookups': 0, 'refreshes': 0}
+
+    def refresh(self):
+        """Reload the full verified-username set"""
+        known = {name.lower() for name in self.load_all()}
+        with self._lock:
+            self._known = known
+            self._misses.clear()
+            self._loaded_at = time.monotonic()
+        self.stats['refreshes'] += 1
+
+    def _refresh_if_stale(self):
+        if self.load_all is None:
+            return
+        if self._loaded_at is None:
+            with self._refresh_lock:
+                if self._loaded_at is None:
+                    self.refresh()
+            return
+        if time.monotonic() - self._loaded_at >= self.refresh_seconds and self._refresh_lock.acquire(blocking=False):
+            # One request reloads; the rest keep answering from the current set
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def _remember_miss(self, username):
+        with self._lock:
+            self._misses[username] = time.monotonic() + self.negative_ttl
+            self._misses.move_to_end(username)
+            while len(self._misses) > self.max_entries:
+                self._misses.popitem(last=False)
+
+    def is_affiliate(self, username):
+        if not is_username_format(username):
+            self.stats['rejected'] += 1
+            return False
+        username = username.lower()
+
+        self._refresh_if_stale()
+        if username in self._known:
+            self.stats['hits'] += 1
+            return True
+
+        expires = self._misses.get(username)
+        if expires is not None and expires > time.monotonic():
+            self.stats['negative_hits'] += 1
+            return False
+
+        self.stats['lookups'] += 1
+        if self.lookup(username):
+            self.mark_verified(username)
+            return True
+        self._remember_miss(username)
+        return False
+
+    def mark_verified(self, username):
+        if username:
+            username = username.lower()
+            with self._lock:
+                self._known.add(username)
+                self._misses.pop(username, None)
+
+    def forget(self, username):
+        username = (username or '').lower()
+        with self._lock:
+            self._known.discard(username)
+            self._misses.pop(username, None)
+
+    def snapshot(self):
+        return dict(self.stats, known=len(self._known), cached_misses=len(self._misses))
@@ -0,0 +1,200 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+def _flag(name, default):
+    return os.getenv(name, default).lower() == 'true'
+
+
+def _int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def _float(name, default):
+    return float(os.getenv(name, str(default)))
+
+
+def _optional_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def _public_base_url(raw):
+    base_url = raw.split(',')[0]
+    if not base_url.startswith('http'):
+        base_url = f'https://{base_url}'
+    return base_url
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Process configuration, read from the environment (and .env) exactly once"""
+
+    database_url: Optional[str]
+    session_secret: str
+    flask_debug: bool
+    public_base_url: str
+    site_owner_username: str
+    promo_active: bool
+    promotion_end_date: str
+    admin_username: str
+    admin_password: str
+    stripe_secret_key: str
+    stripe_webhook_secret: str
+    openai_api_key: str
+    anthropic_api_key: str
+    render_api_key: str
+    render_api_base: str
+    render_cache_ttl: float
+    namecheap_api_user: str
+    namecheap_api_key: str
+    namecheap_username: str
+    namecheap_client_ip: str
+    namecheap_sandbox: bool
+    namecheap_mock_mode: bool
+    namecheap_api_url: str
+    openai_base_url: str
+    # Database pool and timeouts (db_config); pool_recycle None = per-backend default
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: int
+    db_pool_recycle: Optional[int]
+    db_connect_timeout: int
+    db_statement_timeout_ms: int
+    db_idle_tx_timeout_ms: int
+    db_application_name: str
+    sqlite_busy_timeout_ms: int
+    sqlite_cache_kb: int
+    # Logging (log_config)
+    log_level: str
+    log_format: str
+    log_queue_size: int
+    # Rate limiting and client addresses (ratelimit, app); per-endpoint rules are "limit/seconds", '' = default
+    rate_limit_enabled: bool
+    trusted_proxy_hops: int
+    rate_limit_redis_url: str
+    rate_limit_max_keys: int
+    rate_limit_domain_availability: str
+    rate_limit_claim_domain: str
+    rate_limit_domain_checkout: str
+    # Admin auth
+    admin_token_cache_size: int
+    admin_rate_limit_per_minute: int
+    admin_file_cache_max_entries: int
+    # Request profiling and /metrics (profiling)
+    slow_request_ms: float
+    slow_request_history: int
+    profile_sample_rate: float
+    profile_interval_ms: float
+    metrics_token: str
+    # Affiliate routing and click recording (routing, clicks)
+    affiliate_cache_max_entries: int
+    affiliate_negative_ttl: float
+    affiliate_set_refresh_seconds: float
+    click_flush_ms: int
+    click_batch_size: int
+    click_queue_size: int
+    # Static pages and compression (assets, compression)
+    page_revalidate_seconds: float
+    compress_min_size: int
+    compress_level: int
+    brotli_quality: int
+    # Analytics and AI insights
+    analytics_settle_seconds: int
+    analytics_max_buckets: int
+    analytics_cache_max_entries: int
+    ai_insights_model: str
+    ai_insights_ttl: int
+    ai_insights_refresh_seconds: int
+    ai_insights_timeout: float
+    ai_insights_shared_path: str
+
+    @property
+    def namecheap_configured(self):
+        return bool(self.namecheap_api_key and self.namecheap_api_user)
+
+
+@lru_cache(maxsize=None)
+def get_settings():
+    load_dotenv()
+    namecheap_api_user = os.getenv('NAMECHEAP_API_USER', '')
+    return Settings(
+        database_url=os.getenv('DATABASE_URL'),
+        session_secret=os.getenv('SESSION_SECRET', 'dev-secret-key-change-in-production'),
+        flask_debug=os.getenv('FLASK_ENV') == 'development',
+        public_base_url=_public_base_url(os.getenv('REPLIT_DOMAINS', 'http://localhost:5000')),
+        site_owner_username=os.getenv('SITE_OWNER_USERNAME', 'rizzosai'),
+        promo_active=_flag('PROMO_ACTIVE', 'true'),
+        promotion_end_date=os.getenv('PROMOTION_END_DATE', ''),
+        admin_username=os.getenv('ADMIN_USERNAME', 'admin'),
+        admin_password=os.getenv('ADMIN_PASSWORD', 'rizzosai2025'),
+        stripe_secret_key=os.getenv('STRIPE_SECRET_KEY', ''),
+        stripe_webhook_secret=os.getenv('STRIPE_WEBHOOK_SECRET', ''),
+        openai_api_key=os.getenv('OPENAI_API_KEY', ''),
+        anthropic_api_key=os.getenv('ANTHROPIC_API_KEY', ''),
+        render_api_key=os.getenv('RENDER_API_KEY', ''),
+        render_api_base=os.getenv('RENDER_API_BASE', 'https://api.render.com/v1'),
+        render_cache_ttl=_float('RENDER_CACHE_TTL', 15),
+        namecheap_api_user=namecheap_api_user,
+        namecheap_api_key=os.getenv('NAMECHEAP_API_KEY', ''),
+        namecheap_username=os.getenv('NAMECHEAP_USERNAME', ''),
+        namecheap_client_ip=os.getenv('NAMECHEAP_CLIENT_IP', ''),
+        namecheap_sandbox=_flag('NAMECHEAP_SANDBOX', 'true'),
+        namecheap_mock_mode=_flag('NAMECHEAP_MOCK_MODE', 'true'),
+        namecheap_api_url=os.getenv('NAMECHEAP_API_URL', ''),
+        openai_base_url=os.getenv('OPENAI_BASE_URL', ''),
+        db_pool_size=_int('DB_POOL_SIZE', _int('GUNICORN_THREADS', 5)),
+        db_max_overflow=_int('DB_MAX_OVERFLOW', 5),
+        db_pool_timeout=_int('DB_POOL_TIMEOUT', 10),
+        db_pool_recycle=_optional_int('DB_POOL_RECYCLE'),
+        db_connect_timeout=_int('DB_CONNECT_TIMEOUT', 10),
+        db_statement_timeout_ms=_int('DB_STATEMENT_TIMEOUT_MS', 15000),
+        db_idle_tx_timeout_ms=_int('DB_IDLE_TX_TIMEOUT_MS', 60000),
+        db_application_name=os.getenv('DB_APPLICATION_NAME', 'rizzosai'),
+        sqlite_busy_timeout_ms=_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        sqlite_cache_kb=_int('SQLITE_CACHE_KB', 16000),
+        log_level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        log_format=os.getenv('LOG_FORMAT', 'json').lower(),
+        log_queue_size=_int('LOG_QUEUE_SIZE', 10000),
+        rate_limit_enabled=_flag('RATE_LIMIT_ENABLED', 'true'),
+        trusted_proxy_hops=_int('TRUSTED_PROXY_HOPS', 1),
+        rate_limit_redis_url=os.getenv('RATE_LIMIT_REDIS_URL', ''),
+        rate_limit_max_keys=_int('RATE_LIMIT_MAX_KEYS', 100000),
+        rate_limit_domain_availability=os.getenv('RATE_LIMIT_DOMAIN_AVAILABILITY', ''),
+        rate_limit_claim_domain=os.getenv('RATE_LIMIT_CLAIM_DOMAIN', ''),
+        rate_limit_domain_checkout=os.getenv('RATE_LIMIT_DOMAIN_CHECKOUT', ''),
+        admin_token_cache_size=_int('ADMIN_TOKEN_CACHE_SIZE', 256),
+        admin_rate_limit_per_minute=_int('ADMIN_RATE_LIMIT_PER_MINUTE', 0),
+        admin_file_cache_max_entries=_int('ADMIN_FILE_CACHE_MAX_ENTRIES', 32),
+        slow_request_ms=_float('SLOW_REQUEST_MS', 1000),
+        slow_request_history=_int('SLOW_REQUEST_HISTORY', 50),
+        profile_sample_rate=_float('PROFILE_SAMPLE_RATE', 0),
+        profile_interval_ms=_float('PROFILE_INTERVAL_MS', 5),
+        metrics_token=os.getenv('METRICS_TOKEN', ''),
+        affiliate_cache_max_entries=_int('AFFILIATE_CACHE_MAX_ENTRIES', 10000),
+        affiliate_negative_ttl=_float('AFFILIATE_NEGATIVE_TTL', 60),
+        affiliate_set_refresh_seconds=_float('AFFILIATE_SET_REFRESH_SECONDS', 300),
+        click_flush_ms=_int('CLICK_FLUSH_MS', 500),
+        click_batch_size=_int('CLICK_BATCH_SIZE', 500),
+        click_queue_size=_int('CLICK_QUEUE_SIZE', 50000),
+        page_revalidate_seconds=_float('PAGE_REVALIDATE_SECONDS', 2),
+        compress_min_size=_int('COMPRESS_MIN_SIZE', 1024),
+        compress_level=_int('COMPRESS_LEVEL', 6),
+        brotli_quality=_int('BROTLI_QUALITY', 5),
+        analytics_settle_seconds=_int('ANALYTICS_SETTLE_SECONDS', 300),
+        analytics_max_buckets=_int('ANALYTICS_MAX_BUCKETS', 2000),
+        analytics_cache_max_entries=_int('ANALYTICS_CACHE_MAX_ENTRIES', 50000),
+        ai_insights_model=os.getenv('AI_INSIGHTS_MODEL', 'gpt-5'),
+        ai_insights_ttl=_int('AI_INSIGHTS_TTL', 900),
+        ai_insights_refresh_seconds=_int('AI_INSIGHTS_REFRESH_SECONDS', 0),
+        ai_insights_timeout=_float('AI_INSIGHTS_TIMEOUT', 30),
+        ai_insights_shared_path=os.getenv('AI_INSIGHTS_SHARED_PATH',
+                                          os.path.join(tempfile.gettempdir(), 'rizzosai-ai-insights.json')),
+    )
+
+
+settings = get_settings()
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings are parsed once at import, so the test database must be chosen
+# before anything imports app. TEST_DATABASE_URL runs the suite against a
+# real server (Postgres/MySQL); the default is a throwaway SQLite file.
+_tmpdir = tempfile.mkdtemp(prefix='rizzosai-tests-')
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL') or f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+@pytest.fixture(scope='session')
+def flask_app():
+    from app import app
+    return app
+
+
+@pytest.fixture
+def db_session(flask_app):
+    """Fresh schema for each test, inside an app context"""
+    from models import db
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def make_user():
+    """Build (unsaved) User rows with the required columns filled in"""
+    from models import User
+
+    def build(username, verified=True, **fields):
+        values = dict(username=username, email=f"{username}@example.com", full_name=username.title(),
+                      package_tier='basic', daily_rate=1.0, email_verified=verified)
+        values.update(fields)
+        return User(**values)
+    return build
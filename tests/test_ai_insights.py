@@ -0,0 +1,211 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import ai_insights
+from ai_insights import InsightsService, fingerprint
+
+STATS = {
+    'total_users': 10, 'verified_users': 8, 'total_revenue': 100.0, 'domain_revenue': 60.0,
+    'subscription_revenue': 40.0, 'active_referrals': 3, 'active_rentals': 2,
+    'signups_7d': 2, 'signups_30d': 5, 'leads_7d': 4, 'leads_30d': 9,
+    'conversions_7d': 1, 'conversions_30d': 3, 'revenue_7d': 20.0, 'revenue_30d': 80.0,
+}
+
+
+class FakeOpenAI:
+    """OpenAI-compatible /v1/chat/completions stub that counts calls"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with fake.lock:
+                    fake.calls.append(body)
+                    number = len(fake.calls)
+                time.sleep(fake.latency)
+                payload = json.dumps({
+                    'id': f"chatcmpl-{number}", 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': body['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': f"Insight #{number}"}}],
+                    'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def fake_openai():
+    fake = FakeOpenAI()
+    yield fake
+    fake.server.shutdown()
+
+
+@pytest.fixture
+def service_factory(fake_openai, tmp_path):
+    services = []
+
+    def build(**kwargs):
+        kwargs.setdefault('shared_path', str(tmp_path / 'insights.json'))
+        service = InsightsService(base_url=fake_openai.base_url, api_key='sk-test', **kwargs)
+        services.append(service)
+        return service
+    yield build
+    for service in services:
+        service.stop_background_refresh()
+
+
+@pytest.fixture
+def live_stats(monkeypatch):
+    """collect_stats() returns whatever the test puts in stats['current']"""
+    stats = {'current': dict(STATS)}
+    monkeypatch.setattr(ai_insights, 'collect_stats', lambda now=None: dict(stats['current']))
+    return stats
+
+
+def test_same_stats_are_served_from_cache(fake_openai, service_factory):
+    service = service_factory(ttl=60)
+
+    first = service.refresh(dict(STATS))
+    second = service.refresh(dict(STATS))
+
+    assert len(fake_openai.calls) == 1
+    assert first['cached'] is False and second['cached'] is True
+    assert second['insights'] == first['insights'] == 'Insight #1'
+    assert fake_openai.calls[0]['model'] == service.model
+    assert 'Total Users: 10' in fake_openai.calls[0]['messages'][1]['content']
+
+
+def test_changed_stats_invalidate_by_fingerprint(fake_openai, service_factory):
+    service = service_factory(ttl=60)
+    changed = dict(STATS, signups_7d=3)
+
+    service.refresh(dict(STATS))
+    result = service.refresh(changed)
+
+    assert fingerprint(changed) != fingerprint(STATS)
+    assert len(fake_openai.calls) == 2
+    assert result['cached'] is False and result['fingerprint'] == fingerprint(changed)
+
+
+def test_ttl_expiry_calls_the_model_again(fake_openai, service_factory):
+    service = service_factory(ttl=0.2)
+
+    service.refresh(dict(STATS))
+    time.sleep(0.25)
+    service.refresh(dict(STATS))
+
+    assert len(fake_openai.calls) == 2
+
+
+def test_concurrent_misses_share_one_call(fake_openai, service_factory):
+    fake_openai.latency = 0.3
+    service = service_factory(ttl=60)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(service.refresh(dict(STATS)))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake_openai.calls) == 1
+    assert {r['insights'] for r in results} == {'Insight #1'}
+
+
+def test_background_refresh_serves_without_waiting(flask_app, fake_openai, service_factory, live_stats):
+    refresher = service_factory(ttl=60, refresh_interval=0.2)
+    assert refresher.start_background_refresh(flask_app) is not None
+
+    deadline = time.time() + 5
+    while refresher._latest is None and time.time() < deadline:
+        time.sleep(0.02)
+    assert len(fake_openai.calls) == 1
+
+    # Unchanged stats: served from cache, no model call
+    assert refresher.get()['insights'] == 'Insight #1'
+    assert len(fake_openai.calls) == 1
+
+    # Moved stats: the stale result comes back at once and the refresher is woken
+    fake_openai.latency = 0.3
+    live_stats['current']['signups_7d'] += 1
+    started = time.perf_counter()
+    stale = refresher.get()
+    assert time.perf_counter() - started < 0.2
+    assert stale['stale'] is True and stale['insights'] == 'Insight #1'
+
+    deadline = time.time() + 5
+    while refresher._latest['insights'] == 'Insight #1' and time.time() < deadline:
+        time.sleep(0.02)
+    assert refresher.get()['insights'] == 'Insight #2'
+
+
+def test_only_one_process_refreshes_and_others_read_its_result(flask_app, fake_openai, service_factory, live_stats):
+    refresher = service_factory(ttl=60, refresh_interval=30)
+    other_worker = service_factory(ttl=60, refresh_interval=30)
+
+    assert refresher.start_background_refresh(flask_app) is not None
+    assert other_worker.start_background_refresh(flask_app) is None
+
+    deadline = time.time() + 5
+    while refresher._latest is None and time.time() < deadline:
+        time.sleep(0.02)
+
+    result = other_worker.get()
+    assert result['insights'] == 'Insight #1' and result['cached'] is True
+    assert len(fake_openai.calls) == 1
+
+    # The lock passes on once the refresher goes away
+    refresher.stop_background_refresh()
+    assert other_worker.start_background_refresh(flask_app) is not None
+
+
+def test_other_process_wakes_the_refresher_through_the_shared_path(flask_app, fake_openai, service_factory,
+                                                                   live_stats):
+    # A long interval, so only the wake request can explain a second call
+    refresher = service_factory(ttl=60, refresh_interval=30)
+    other_worker = service_factory(ttl=60, refresh_interval=30)
+    assert refresher.start_background_refresh(flask_app) is not None
+
+    deadline = time.time() + 5
+    while refresher._latest is None and time.time() < deadline:
+        time.sleep(0.02)
+    assert other_worker.get()['insights'] == 'Insight #1'
+
+    live_stats['current']['signups_7d'] += 1
+    stale = other_worker.get()
+    assert stale['stale'] is True and stale['insights'] == 'Insight #1'
+
+    deadline = time.time() + 5
+    while len(fake_openai.calls) < 2 and time.time() < deadline:
+        time.sleep(0.02)
+    assert len(fake_openai.calls) == 2
+    assert refresher._latest['insights'] == 'Insight #2'
+    assert other_worker.get()['insights'] == 'Insight #2'
+
+
+def test_importing_the_app_does_not_start_a_refresher(flask_app):
+    from app import insights_service
+    assert insights_service._refresh_thread is None
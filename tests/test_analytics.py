@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics import TimeSeries
+from models import EmailLead, AffiliateClick
+
+NOW = datetime(2026, 3, 10, 12, 30)
+
+
+@pytest.fixture
+def admin_headers(flask_app):
+    from app import serializer
+    return {'Authorization': f"Bearer {serializer.dumps({'admin': True})}"}
+
+
+def test_aware_range_is_converted_to_utc(flask_app, db_session, admin_headers):
+    client = flask_app.test_client()
+
+    response = client.get('/api/admin/analytics?metrics=signups&granularity=hour'
+                          '&start=2026-03-09T14:00:00%2B02:00&end=2026-03-09T16:00:00%2B02:00', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['buckets'] == ['2026-03-09T12:00:00', '2026-03-09T13:00:00']
+
+
+def test_conversions_are_recomputed_for_closed_buckets(db_session):
+    lead = EmailLead(email='lead@example.com', created_at=NOW - timedelta(days=3))
+    db_session.add(lead)
+    db_session.add(EmailLead(email='other@example.com', created_at=NOW - timedelta(days=3), converted=True))
+    db_session.commit()
+    series = TimeSeries(settle_seconds=0)
+    start = NOW - timedelta(days=5)
+
+    first = series.series(['conversions', 'signups'], 'day', start, NOW, now=NOW)
+    lead.converted = True
+    db_session.commit()
+    second = series.series(['conversions', 'signups'], 'day', start, NOW, now=NOW)
+
+    assert first['metrics']['conversions']['totals'] == {'leads': 2, 'conversions': 1}
+    assert second['metrics']['conversions']['totals'] == {'leads': 2, 'conversions': 2}
+    assert second['cache']['conversions']['cached_buckets'] == 0
+    # Other metrics still serve closed buckets from the cache
+    assert second['cache']['signups']['cached_buckets'] == 5
+
+
+def test_unique_visitor_total_counts_each_visitor_once(db_session):
+    for days_ago, ip_hash in [(1, 'a'), (2, 'a'), (3, 'a'), (2, 'b'), (3, 'c')]:
+        db_session.add(AffiliateClick(username='alice', clicked_at=NOW - timedelta(days=days_ago), ip_hash=ip_hash))
+    db_session.commit()
+
+    result = TimeSeries().series(['clicks'], 'day', NOW - timedelta(days=5), NOW, now=NOW)
+
+    clicks = result['metrics']['clicks']
+    assert sum(clicks['series']['unique_visitors']) == 5
+    assert clicks['totals'] == {'clicks': 5, 'unique_visitors': 3}
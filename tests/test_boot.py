@@ -0,0 +1,54 @@
+"""Worker boot budget: each gunicorn worker imports app itself, so its import
+time and resident memory are paid on every (re)start. Measured in a fresh
+interpreter with `python -X importtime`; budgets can be tightened or relaxed
+per machine with BOOT_IMPORT_BUDGET_MS / BOOT_RSS_BUDGET_MB."""
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv('BOOT_IMPORT_BUDGET_MS', '2500'))
+RSS_BUDGET_MB = float(os.getenv('BOOT_RSS_BUDGET_MB', '120'))
+# Loaded on first use only (lazy_imports / get_anthropic_client / InsightsService.client)
+LAZY_MODULES = ('stripe', 'anthropic', 'openai', 'admin_ai_bot')
+
+PROBE = """
+import json, resource, sys
+import app
+print(json.dumps({
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'loaded': [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def boot(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'boot.db'}")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    # "import time: self [us] | cumulative | imported package"
+    cumulative_us = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                cumulative_us[name.strip()] = int(cumulative)
+    return cumulative_us, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_worker_boot_stays_within_budget(tmp_path):
+    cumulative_us, probe = boot(tmp_path)
+
+    import_ms = cumulative_us['app'] / 1000
+    rss_mb = probe['rss_kb'] / 1024
+    assert import_ms < IMPORT_BUDGET_MS, f"import app took {import_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+    assert rss_mb < RSS_BUDGET_MB, f"worker RSS after import is {rss_mb:.1f} MB (budget {RSS_BUDGET_MB:.0f} MB)"
+
+
+def test_heavy_sdks_are_not_imported_at_boot(tmp_path):
+    cumulative_us, probe = boot(tmp_path)
+
+    assert probe['loaded'] == []
+    assert not set(LAZY_MODULES) & set(cumulative_us)
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from bulk_import import BulkImporter, BulkImportError, Checkpoint, _coerce
+from models import EmailLead, ImportCheckpoint
+
+
+def write_leads(path, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({'email': f"lead{i}@example.com", 'created_at': '2026-03-01T10:00:00Z'}) + '\n')
+
+
+def test_aware_timestamps_are_converted_to_utc():
+    column = EmailLead.__table__.c.created_at
+
+    assert _coerce(column, '2026-03-01T10:00:00+02:00') == datetime(2026, 3, 1, 8, 0)
+    assert _coerce(column, '2026-03-01T10:00:00Z') == datetime(2026, 3, 1, 10, 0)
+    assert _coerce(column, '2026-03-01T10:00:00') == datetime(2026, 3, 1, 10, 0)
+
+
+def test_failed_chunk_rolls_back_with_its_checkpoint_and_resume_loads_each_row_once(db_session, tmp_path, monkeypatch):
+    path = str(tmp_path / 'leads.jsonl')
+    write_leads(path, 10)
+    importer = BulkImporter('email_leads', chunk_size=3, echo=lambda *args: None)
+    insert = importer._insert
+    calls = []
+
+    def crash_on_third_chunk(rows):
+        calls.append(len(rows))
+        insert(rows)
+        if len(calls) == 3:
+            raise RuntimeError('worker killed')
+
+    monkeypatch.setattr(importer, '_insert', crash_on_third_chunk)
+    with pytest.raises(BulkImportError):
+        importer.run(path)
+
+    # Chunks 1-2 and their checkpoint committed together; chunk 3 left nothing behind
+    assert db_session.query(EmailLead).count() == 6
+    assert Checkpoint('email_leads', path).load() == 6
+
+    monkeypatch.setattr(importer, '_insert', insert)
+    summary = importer.run(path)
+
+    assert summary['rows_skipped'] == 6 and summary['rows_loaded'] == 4
+    emails = [email for (email,) in db_session.query(EmailLead.email)]
+    assert sorted(emails) == sorted(f"lead{i}@example.com" for i in range(10))
+    assert db_session.query(ImportCheckpoint).count() == 0
+
+
+def test_checkpoint_rejects_a_modified_input_file(db_session, tmp_path):
+    path = str(tmp_path / 'leads.jsonl')
+    write_leads(path, 4)
+    Checkpoint('email_leads', path).save(2)
+    db_session.commit()
+
+    write_leads(path, 5)
+    with pytest.raises(BulkImportError):
+        Checkpoint('email_leads', path).load()
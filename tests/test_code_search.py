@@ -0,0 +1,28 @@
+from code_search import CodeIndex
+
+
+def long_function(body_lines):
+    lines = ['def handler():'] + [f"    step_{i} = {i}" for i in range(body_lines)] + ['    return step_0', '']
+    return '\n'.join(lines)
+
+
+def test_text_hits_past_a_truncated_symbol_are_returned():
+    files = {'views.py': long_function(120).replace('step_110 = 110', 'step_110 = handler_marker')}
+    index = CodeIndex(files.__getitem__)
+
+    response = index.search('handler', ['views.py'], max_lines_per_result=80)
+
+    symbol = next(r for r in response['results'] if r['kind'] == 'function')
+    assert symbol['content_truncated'] is True and 'handler_marker' not in symbol['content']
+    text = [r for r in response['results'] if r['kind'] == 'text']
+    assert any('handler_marker' in r['content'] for r in text)
+
+
+def test_text_hits_inside_a_shown_symbol_are_not_repeated():
+    files = {'views.py': long_function(10).replace('step_5 = 5', 'step_5 = handler_marker')}
+    index = CodeIndex(files.__getitem__)
+
+    response = index.search('handler', ['views.py'], max_lines_per_result=80)
+
+    assert [r['kind'] for r in response['results']] == ['function']
+    assert 'handler_marker' in response['results'][0]['content']
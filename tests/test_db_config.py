@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from db_config import InstrumentedQueuePool, pool_metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    pool_metrics.reset()
+    yield
+    pool_metrics.reset()
+
+
+def test_pool_timeout_is_counted(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.1)
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert pool_metrics.snapshot()['timeouts'] == 1
+
+
+def test_connect_errors_are_not_counted_as_timeouts():
+    def refuse():
+        raise sqlite3.OperationalError('unable to open database file')
+
+    engine = create_engine('sqlite://', creator=refuse, poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.1)
+    with pytest.raises(exc.OperationalError):
+        engine.connect()
+
+    assert pool_metrics.snapshot()['timeouts'] == 0
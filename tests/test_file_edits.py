@@ -0,0 +1,103 @@
+import os
+import stat
+import threading
+
+import pytest
+
+import file_edits
+from file_edits import FileEditor, EditConflict, content_hash
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_files_get_the_umask_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_edits, 'UMASK', 0o027)
+    path = str(tmp_path / 'new.py')
+
+    FileEditor().create(path, 'x = 1\n')
+
+    assert mode(path) == 0o640
+
+
+def test_edits_keep_the_existing_mode(tmp_path):
+    path = tmp_path / 'script.sh'
+    path.write_text('echo old\n')
+    os.chmod(path, 0o751)
+
+    FileEditor().apply(str(path), [('old', 'new')])
+
+    assert path.read_text() == 'echo new\n'
+    assert mode(path) == 0o751
+
+
+def test_stale_hash_raises_conflict_and_writes_nothing(tmp_path):
+    path = tmp_path / 'views.py'
+    path.write_text('AAAA\n')
+    stale = content_hash('AAAA\n')
+    path.write_text('BBBB\n')
+
+    with pytest.raises(EditConflict):
+        FileEditor().apply(str(path), [('BBBB', 'CCCC')], expected_hash=stale)
+
+    assert path.read_text() == 'BBBB\n'
+
+
+def test_same_size_write_with_preserved_mtime_is_not_hidden_by_the_cache(tmp_path):
+    from admin_ai_bot import FileCache
+    path = tmp_path / 'views.py'
+    path.write_text('AAAA\n')
+    cache = FileCache()
+    entry, _ = cache.get(str(path))
+    before = os.stat(path)
+
+    # Another worker rewrites the file in place, keeping size and mtime
+    path.write_text('BBBB\n')
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+
+    with pytest.raises(EditConflict):
+        FileEditor(cache).apply(str(path), [('AAAA', 'CCCC')], expected_hash=entry.digest)
+    assert path.read_text() == 'BBBB\n'
+    assert cache.get(str(path))[0].content == 'BBBB\n'
+
+
+def test_several_edits_land_in_one_write(tmp_path, monkeypatch):
+    path = tmp_path / 'views.py'
+    path.write_text('a = 1\nb = 2\nc = 3\n')
+    editor = FileEditor()
+    writes = []
+    write = editor._write
+    monkeypatch.setattr(editor, '_write', lambda p, content: (writes.append(content), write(p, content)))
+
+    new_hash = editor.apply(str(path), [('a = 1', 'a = 10'), ('c = 3', 'c = 30')],
+                            expected_hash=content_hash('a = 1\nb = 2\nc = 3\n'))
+
+    assert writes == ['a = 10\nb = 2\nc = 30\n']
+    assert path.read_text() == writes[0] and new_hash == content_hash(writes[0])
+
+
+def test_concurrent_edits_from_two_threads_are_both_applied(tmp_path):
+    path = tmp_path / 'counters.py'
+    names = [f"name_{i}" for i in range(40)]
+    path.write_text(''.join(f"{name} = 0\n" for name in names))
+    editors = [FileEditor(), FileEditor()]  # separate instances: only the flock serialises them
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def edit(editor, mine):
+        barrier.wait()
+        for name in mine:
+            try:
+                editor.apply(str(path), [(f"{name} = 0", f"{name} = 1")])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=edit, args=(editors[i], names[i::2])) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert path.read_text() == ''.join(f"{name} = 1\n" for name in names)
@@ -0,0 +1,72 @@
+import dataclasses
+
+import pytest
+from flask import Flask, jsonify
+
+from ratelimit import RateLimiter, MemoryBackend, client_ip
+
+PROXY = '10.0.0.5'
+
+
+def ip_for(forwarded_for=None, trusted_hops=1, remote_addr=PROXY):
+    app = Flask(__name__)
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for is not None else {}
+    with app.test_request_context('/', headers=headers, environ_base={'REMOTE_ADDR': remote_addr}):
+        return client_ip(trusted_hops)
+
+
+@pytest.mark.parametrize('forwarded_for, trusted_hops, expected', [
+    ('203.0.113.7', 1, '203.0.113.7'),
+    # A client-supplied entry to the left of the proxy's is ignored
+    ('1.2.3.4, 203.0.113.7', 1, '203.0.113.7'),
+    ('1.2.3.4, 203.0.113.7, 10.0.0.9', 2, '203.0.113.7'),
+    # Fewer entries than trusted hops: the furthest one there is
+    ('203.0.113.7', 3, '203.0.113.7'),
+    # No trusted proxies: the header is not trusted at all
+    ('1.2.3.4', 0, PROXY),
+    (None, 1, PROXY),
+    ('', 1, PROXY),
+])
+def test_client_ip_uses_the_trusted_proxy_entry(forwarded_for, trusted_hops, expected):
+    assert ip_for(forwarded_for, trusted_hops) == expected
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_limit():
+    app = Flask(__name__)
+    limiter = RateLimiter(MemoryBackend(), enabled=True)
+
+    @app.route('/check')
+    @limiter.limit('check', (3, 60))
+    def check():
+        return jsonify(ok=True)
+
+    client = app.test_client()
+    statuses = [client.get('/check', headers={'X-Forwarded-For': f"198.51.100.{i}, 203.0.113.7"}).status_code
+                for i in range(5)]
+
+    assert statuses == [200, 200, 200, 429, 429]
+
+
+def test_claim_domain_sends_namecheap_the_trusted_client_ip(flask_app, monkeypatch):
+    import app as app_module
+
+    sent = {}
+
+    class NamecheapResponse:
+        status_code = 200
+        content = b'<ApiResponse xmlns="http://api.namecheap.com/xml.response"/>'
+
+    def fake_get(url, params=None, timeout=None):
+        sent.update(params)
+        return NamecheapResponse()
+
+    monkeypatch.setattr(app_module, 'settings', dataclasses.replace(
+        app_module.settings, namecheap_api_user='user', namecheap_api_key='key', namecheap_username='user'))
+    monkeypatch.setattr(app_module.requests, 'get', fake_get)
+
+    response = flask_app.test_client().post(
+        '/api/claim-domain', json={'domain': 'example.com', 'email': 'a@example.com'},
+        headers={'X-Forwarded-For': '1.2.3.4, 203.0.113.7'}, environ_base={'REMOTE_ADDR': PROXY})
+
+    assert response.status_code == 200
+    assert sent['ClientIp'] == '203.0.113.7'
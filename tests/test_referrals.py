@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from referrals import PASS_UP_ORDER
+
+SIGNUPS = 40
+
+
+def test_concurrent_signups_get_gapless_orders_and_one_pass_up(flask_app, db_session, make_user):
+    from app import referral_attribution
+    from models import db, User, Referral
+
+    db_session.add_all([make_user('rizzosai'), make_user('busyaffiliate')])
+    db_session.commit()
+    referral_attribution._site_owner_id = None
+
+    barrier = threading.Barrier(SIGNUPS)
+    errors = []
+
+    def signup(i):
+        with flask_app.app_context():
+            try:
+                user = make_user(f"signup{i}")
+                db.session.add(user)
+                barrier.wait()
+                db.session.flush()
+                assert referral_attribution.attribute('busyaffiliate', user) is not None
+                db.session.commit()
+            except Exception as e:  # surfaced below; a thread can't fail the test itself
+                db.session.rollback()
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=signup, args=(i,)) for i in range(SIGNUPS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db_session.expire_all()
+    affiliate = User.query.filter_by(username='busyaffiliate').one()
+    owner = User.query.filter_by(username='rizzosai').one()
+    referrals = Referral.query.order_by(Referral.referral_order).all()
+
+    assert [r.referral_order for r in referrals] == list(range(1, SIGNUPS + 1))
+    passed_up = [r for r in referrals if r.passed_up]
+    assert len(passed_up) == 1
+    assert passed_up[0].referral_order == PASS_UP_ORDER
+    assert passed_up[0].referrer_id == owner.id
+    assert all(r.referrer_id == affiliate.id for r in referrals if not r.passed_up)
+    assert affiliate.referral_counter == SIGNUPS
+    assert affiliate.pass_up_used is True
+
+
+@pytest.mark.parametrize('owner_exists', [True, False])
+def test_second_referral_is_passed_up_only_when_owner_exists(flask_app, db_session, make_user, owner_exists):
+    from app import referral_attribution
+    from models import User
+
+    users = [make_user('affiliate')] + ([make_user('rizzosai')] if owner_exists else [])
+    db_session.add_all(users)
+    db_session.commit()
+    referral_attribution._site_owner_id = None
+
+    results = []
+    for i in range(3):
+        user = make_user(f"r{i}")
+        db_session.add(user)
+        db_session.flush()
+        results.append(referral_attribution.attribute('affiliate', user))
+        db_session.commit()
+
+    assert [r.passed_up for r in results] == [False, owner_exists, False]
+    assert User.query.filter_by(username='affiliate').one().pass_up_used is owner_exists
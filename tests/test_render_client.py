@@ -0,0 +1,133 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+from render_client import RenderClient
+
+SERVICE_COUNT = 250
+DEPLOY_LATENCY = 0.2
+
+
+class MockRender:
+    """Enough of the Render v1 API for RenderClient: paginated /services, services, deploys, actions"""
+
+    def __init__(self):
+        self.services = [{'id': f"srv-{i:04d}", 'name': f"service-{i}", 'type': 'web_service', 'suspended': 'not_suspended'}
+                         for i in range(SERVICE_COUNT)]
+        self.requests = []
+        self.lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                with mock.lock:
+                    mock.requests.append(('GET', url.path, query, self.headers.get('Authorization')))
+                parts = url.path.strip('/').split('/')
+                if parts == ['v1', 'services']:
+                    limit = int(query.get('limit', ['20'])[0])
+                    start = 0
+                    if 'cursor' in query:
+                        start = next(i for i, s in enumerate(mock.services) if s['id'] == query['cursor'][0]) + 1
+                    page = mock.services[start:start + limit]
+                    return self._send(200, [{'cursor': s['id'], 'service': s} for s in page])
+                if len(parts) == 3 and parts[:2] == ['v1', 'services']:
+                    service = next((s for s in mock.services if s['id'] == parts[2]), None)
+                    return self._send(200, service) if service else self._send(404, {'message': 'not found'})
+                if len(parts) == 4 and parts[3] == 'deploys':
+                    time.sleep(DEPLOY_LATENCY)
+                    return self._send(200, [{'cursor': 'd1', 'deploy': {'id': 'dep-1', 'status': 'live',
+                                                                         'finishedAt': '2026-01-01T00:00:00Z'}}])
+                self._send(404, {'message': 'not found'})
+
+            def do_POST(self):
+                with mock.lock:
+                    mock.requests.append(('POST', self.path, {}, self.headers.get('Authorization')))
+                self.send_response(202)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self, method, path_prefix):
+        with self.lock:
+            return sum(1 for m, path, _, _ in self.requests if m == method and path.startswith(path_prefix))
+
+
+@pytest.fixture
+def render():
+    mock = MockRender()
+    yield mock
+    mock.server.shutdown()
+
+
+def test_list_services_follows_cursor_pagination(render):
+    client = RenderClient(api_key='rnd_test', base_url=render.base_url, cache_ttl=0)
+
+    services = client.list_services(page_size=100)
+
+    assert [s['id'] for s in services] == [s['id'] for s in render.services]
+    pages = [query for method, path, query, _ in render.requests if path == '/v1/services']
+    assert len(pages) == 3
+    assert 'cursor' not in pages[0]
+    assert pages[1]['cursor'] == ['srv-0099'] and pages[2]['cursor'] == ['srv-0199']
+    assert all(auth == 'Bearer rnd_test' for _, _, _, auth in render.requests)
+
+
+def test_list_and_get_are_cached_for_the_ttl(render):
+    client = RenderClient(api_key='k', base_url=render.base_url, cache_ttl=0.3)
+
+    client.list_services()
+    client.list_services()
+    client.get_service('srv-0007')  # filled in by the list call
+    assert render.count('GET', '/v1/services') == 3
+
+    time.sleep(0.35)
+    client.get_service('srv-0007')
+    assert render.count('GET', '/v1/services/srv-0007') == 1
+
+
+def test_actions_invalidate_the_cache(render):
+    client = RenderClient(api_key='k', base_url=render.base_url, cache_ttl=60)
+
+    client.get_service('srv-0001')
+    client.restart_service('srv-0001')
+    client.get_service('srv-0001')
+
+    assert render.count('POST', '/v1/services/srv-0001/restart') == 1
+    assert render.count('GET', '/v1/services/srv-0001') == 2
+
+
+def test_bulk_status_fetches_deploys_concurrently(render):
+    client = RenderClient(api_key='k', base_url=render.base_url, cache_ttl=0, max_workers=8)
+    service_ids = [f"srv-{i:04d}" for i in range(8)] + ['srv-missing']
+
+    started = time.perf_counter()
+    statuses = client.get_services_status(service_ids)
+    elapsed = time.perf_counter() - started
+
+    by_id = {s['id']: s for s in statuses}
+    assert [s['id'] for s in statuses] == service_ids
+    assert all(by_id[f"srv-{i:04d}"]['deploy_status'] == 'live' for i in range(8))
+    assert 'error' in by_id['srv-missing']
+    # Eight deploy lookups at DEPLOY_LATENCY each; sequential would take 8x
+    assert elapsed < DEPLOY_LATENCY * 4
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import rollups
+from models import db, Payment, PaymentCharge, SubscriptionCharge, DomainRental, UserStats, DailyRollup
+from referrals import ReferralAttribution
+
+DAY1 = datetime(2026, 3, 1, 9, 30)
+DAY2 = datetime(2026, 3, 2, 23, 59)
+DAY3 = datetime(2026, 3, 3, 0, 1)
+
+
+def rollup_rows():
+    """user_stats and daily_rollups without their updated_at bookkeeping"""
+    def rows(model, key):
+        columns = [c for c in model.__table__.columns if c.name != 'updated_at']
+        return sorted(
+            (tuple(round(value, 2) if isinstance(value, float) else value for value in row)
+             for row in db.session.execute(db.select(*columns))),
+            key=lambda row: row[key],
+        )
+    return {'user_stats': rows(UserStats, 0), 'daily_rollups': rows(DailyRollup, 0)}
+
+
+def package_signup(make_user, attribution, username, when, amount, referrer=None):
+    """The package checkout success path: user, completed payment, optional referral"""
+    user = make_user(username, created_at=when)
+    db.session.add(user)
+    db.session.flush()
+    payment = Payment(user_id=user.id, stripe_session_id=f"cs_{username}", amount=amount, package_tier='basic',
+                      payment_date=when, status='completed')
+    db.session.add(payment)
+    rollups.record_signup(user)
+    rollups.record_charge(user.id, payment.amount, 'package', payment.payment_date)
+    referral = attribution.attribute(referrer, user)
+    if referral:
+        rollups.record_referral(referral)
+    db.session.commit()
+    return user
+
+
+def test_incremental_rollups_match_a_full_rebuild(db_session, make_user):
+    attribution = ReferralAttribution('rizzosai')
+    package_signup(make_user, attribution, 'rizzosai', DAY1, 99.0)
+    package_signup(make_user, attribution, 'affiliate', DAY1, 29.0)
+    package_signup(make_user, attribution, 'first', DAY2, 29.0, referrer='affiliate')
+    # Second referral: passed up to the site owner
+    package_signup(make_user, attribution, 'second', DAY2, 49.5, referrer='affiliate')
+    package_signup(make_user, attribution, 'unreferred', DAY3, 19.99, referrer='nobody')
+
+    # Domain rental checkout: signup, referral with commission, initial charge, rental start
+    renter = make_user('renter', created_at=DAY3)
+    db_session.add(renter)
+    db_session.flush()
+    rollups.record_signup(renter)
+    referral = attribution.attribute('first', renter, commission_amount=20.00, label='DOMAIN RENTAL REFERRAL')
+    rollups.record_referral(referral)
+    charge = PaymentCharge(user_id=renter.id, stripe_session_id='cs_rental', amount=20.00, domain_name='renter.com',
+                           status='completed', payment_date=DAY3)
+    db_session.add(charge)
+    rollups.record_charge(renter.id, charge.amount, 'domain', charge.payment_date)
+    rental = DomainRental(user_id=renter.id, domain_name='renter.com', registrar_status='registered',
+                          rental_status='active', stripe_subscription_id='sub_1', rent_started_at=DAY3, created_at=DAY3)
+    db_session.add(rental)
+    rollups.record_rental_status(renter.id, None, rental.rental_status, rental.rent_started_at)
+    db_session.commit()
+
+    # A paid renewal, a failed one, then the subscription is cancelled
+    paid = SubscriptionCharge(user_id=renter.id, domain_rental_id=rental.id, stripe_subscription_id='sub_1',
+                              stripe_invoice_id='in_1', amount=20.00, status='paid', payment_date=DAY3)
+    db_session.add(paid)
+    rollups.record_charge(renter.id, paid.amount, 'subscription', paid.payment_date)
+    db_session.commit()
+    failed = SubscriptionCharge(user_id=renter.id, domain_rental_id=rental.id, stripe_subscription_id='sub_1',
+                                stripe_invoice_id='in_2', amount=20.00, status='failed', payment_date=DAY3)
+    db_session.add(failed)
+    rollups.record_failed_charge(failed.payment_date)
+    rollups.record_rental_status(renter.id, rental.rental_status, 'payment_failed')
+    rental.rental_status = 'payment_failed'
+    db_session.commit()
+    rollups.record_rental_status(renter.id, rental.rental_status, 'cancelled')
+    rental.rental_status = 'cancelled'
+    db_session.commit()
+
+    # A second rental that stays active
+    second_rental = DomainRental(user_id=renter.id, domain_name='renter.net', rental_status='active',
+                                 stripe_subscription_id='sub_2', rent_started_at=DAY2, created_at=DAY2)
+    db_session.add(second_rental)
+    rollups.record_rental_status(renter.id, None, second_rental.rental_status, second_rental.rent_started_at)
+    db_session.commit()
+
+    incremental = rollup_rows()
+    rollups.rebuild_rollups()
+    rebuilt = rollup_rows()
+
+    assert incremental == rebuilt
+    totals = rollups.platform_totals()
+    assert totals == {'total_users': 6, 'active_referrals': 3, 'total_revenue': 226.49, 'domain_revenue': 20.0,
+                      'subscription_revenue': 20.0, 'active_rentals': 1}
+    assert len(rebuilt['daily_rollups']) == 4
@@ -0,0 +1,32 @@
+import sys
+from urllib.parse import quote
+
+import pytest
+
+from routing import is_username_format
+
+
+@pytest.mark.parametrize('username', ['alice', 'bob99', 'josé', 'müller99', 'łukasz', '日本語ユーザー', 'my-domain'])
+def test_signup_usernames_and_domain_labels_are_accepted(username):
+    assert is_username_format(username)
+
+
+@pytest.mark.parametrize('path', ['wp-login.php', '.env', 'dashboard.html', 'a_b', '-abc', 'abc-', ''])
+def test_file_like_paths_are_rejected(path):
+    assert not is_username_format(path)
+
+
+def test_format_accepts_exactly_what_signup_accepts():
+    # Signup requires username.isalnum(); check every code point against it
+    assert all(is_username_format(chr(code) * 3) == chr(code).isalnum()
+               for code in range(sys.maxunicode + 1) if chr(code) != '-')
+
+
+def test_non_ascii_affiliate_link_redirects_to_packages(flask_app, db_session, make_user):
+    db_session.add(make_user('josé'))
+    db_session.commit()
+
+    response = flask_app.test_client().get(f"/{quote('josé')}")
+
+    assert response.status_code == 302
+    assert response.headers['Location'].startswith('/packages?ref=')